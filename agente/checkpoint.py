@@ -0,0 +1,138 @@
+import glob
+import json
+import os
+import threading
+import numpy as np
+from q_learning_numpy import NumpyQLearning, NUM_STATES, NUM_ACTIONS, encode_state, decode_state
+
+CHECKPOINT_PATTERN = 'checkpoint_*.npz'
+POLICY_FILE = 'policy.npy'
+
+
+# Tabla Q de cualquier agente como arreglos densos (valores, pares escritos) de forma (486, 2)
+def q_table_arrays(agent):
+    if isinstance(agent, NumpyQLearning):
+        return agent.q_table.copy(), agent.visited.copy()
+    values = np.zeros((NUM_STATES, NUM_ACTIONS), dtype=np.float64)
+    visited = np.zeros((NUM_STATES, NUM_ACTIONS), dtype=bool)
+    for (state, action), value in agent.export_q_table().items():
+        values[encode_state(state), action] = value
+        visited[encode_state(state), action] = True
+    return values, visited
+
+
+def restore_q_table(agent, values, visited):
+    if isinstance(agent, NumpyQLearning):
+        agent.q_table[:] = values
+        agent.visited[:] = visited
+    else:
+        agent.import_q_table({(decode_state(int(index)), int(action)): float(values[index, action])
+                              for index, action in zip(*np.nonzero(visited))})
+
+
+# Escribe con `write(f)` en un archivo temporal y lo renombra: el archivo final nunca queda a medias
+def atomic_write(path, write):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+# Guarda los valores Q en un .npy que load_policy puede mapear sin copiarlo
+def export_policy(agent, path):
+    values, _ = q_table_arrays(agent)
+    atomic_write(path, lambda f: np.save(f, values))
+
+
+def load_policy(path, mmap=True):
+    """
+    Agente NumpyQLearning de sólo lectura (epsilon 0) con la tabla de un archivo de
+    export_policy. Con mmap=True la tabla se mapea desde disco en vez de copiarse.
+    """
+    values = np.load(path, mmap_mode='r' if mmap else None)
+    if values.shape != (NUM_STATES, NUM_ACTIONS):
+        raise ValueError(f"{path} no contiene una tabla Q de forma {(NUM_STATES, NUM_ACTIONS)}")
+    agent = NumpyQLearning(epsilon=0.0, epsilon_min=0.0)
+    agent.q_table = values
+    agent.visited = values != 0
+    return agent
+
+
+def save_checkpoint(path, arrays, state):
+    # Checkpoint: arreglos en un .npz sin comprimir y el estado escalar como JSON
+    arrays = dict(arrays, state=np.array(json.dumps(state)))
+    atomic_write(path, lambda f: np.savez(f, **arrays))
+
+
+def load_checkpoint(path):
+    # Retorna (arreglos, estado) de un archivo de save_checkpoint
+    with np.load(path) as data:
+        arrays = {key: data[key] for key in data.files if key != 'state'}
+        state = json.loads(str(data['state']))
+    return arrays, state
+
+
+# Checkpoint más reciente de un directorio (o el archivo dado); None si no hay
+def latest_checkpoint(path):
+    if os.path.isfile(path):
+        return path
+    checkpoints = sorted(glob.glob(os.path.join(path, CHECKPOINT_PATTERN)))
+    return checkpoints[-1] if checkpoints else None
+
+
+class CheckpointManager:
+    """
+    Guarda checkpoints numerados por episodio (checkpoint_000050.npz) en `directory`,
+    conservando sólo los últimos `keep`, y el policy.npy del más reciente.
+
+    save() recibe una copia del estado tomada en el hilo de entrenamiento y la escribe
+    en un hilo aparte, así que el entrenamiento sigue mientras se escribe el archivo.
+    Hay a lo más una escritura en curso: un save() nuevo espera a la anterior.
+    Los errores del hilo se relanzan en el siguiente save() o wait().
+    """
+
+    def __init__(self, directory, keep=3, background=True):
+        self.directory = directory
+        self.keep = keep
+        self.background = background
+        self.thread = None
+        self.error = None
+        self.saved = []
+
+    def path(self, episode):
+        return os.path.join(self.directory, f"checkpoint_{episode:06d}.npz")
+
+    def save(self, episode, arrays, state):
+        self.wait()
+        if not self.background:
+            self.write(episode, arrays, state)
+            return
+        self.thread = threading.Thread(target=self.write, args=(episode, arrays, state), daemon=True)
+        self.thread.start()
+
+    def write(self, episode, arrays, state):
+        try:
+            path = self.path(episode)
+            save_checkpoint(path, arrays, state)
+            atomic_write(os.path.join(self.directory, POLICY_FILE), lambda f: np.save(f, arrays['q_values']))
+            self.saved.append(path)
+
+            # Borrar los checkpoints más antiguos
+            checkpoints = sorted(glob.glob(os.path.join(self.directory, CHECKPOINT_PATTERN)))
+            for old in checkpoints[:-self.keep]:
+                os.remove(old)
+        except Exception as error:
+            self.error = error
+
+    # Espera a que termine la escritura en curso
+    def wait(self):
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
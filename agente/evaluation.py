@@ -0,0 +1,230 @@
+"""
+Evaluación paralela de políticas de semáforo: el agente y las políticas de referencia
+(ciclo fijo, cola máxima) en los mismos episodios, con intervalos de confianza.
+
+Uso:
+    python evaluation.py [--model ../models/q_table.pkl] [--episodes 30] [--max-steps 1000]
+                         [--workers N] [--demand CSV] [--seed 0]
+"""
+import argparse
+import copy
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+import numpy as np
+from policies import FixedCyclePolicy, MaxQueuePolicy
+
+# Métricas de un episodio de evaluación (mismo orden que EPISODE_METRICS de train_agent): recompensa
+# total, promedios por step de autos esperando, autos que avanzaron y autos en la grilla, y cambios de fase
+EVALUATION_METRICS = ('rewards', 'wait_times', 'throughput', 'phase_changes', 'total_vehicles')
+
+# Métricas en que un valor menor es mejor (para indicar qué política gana)
+LOWER_IS_BETTER = ('wait_times', 'total_vehicles', 'phase_changes')
+
+
+# Políticas de referencia: ciclo fijo con varios periodos (cambio en los steps period, 2*period, ...,
+# como el baseline de compare_with_baseline) y cola máxima
+def baseline_policies(periods=(20, 30, 45, 60)):
+    policies = {f"ciclo fijo {period}": FixedCyclePolicy(period, offset=1) for period in periods}
+    policies['cola máxima'] = MaxQueuePolicy()
+    return policies
+
+
+# Cuantil p de la t de Student con df grados de libertad: exacto con 1 y 2 grados,
+# con la expansión de Cornish-Fisher (Abramowitz y Stegun 26.7.5) con más
+def t_quantile(p, df):
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = NormalDist().inv_cdf(p)
+    return (z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3)
+            + (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * df ** 4))
+
+
+# Media e intervalo de confianza (media ± semiancho) de cada columna de `values` (episodios x métricas)
+def confidence_interval(values, confidence=0.95):
+    values = np.asarray(values, dtype=np.float64)
+    mean = values.mean(axis=0)
+    if len(values) < 2:
+        return mean, np.full_like(mean, np.nan)
+    half_width = t_quantile(0.5 + confidence / 2, len(values) - 1) * values.std(axis=0, ddof=1) / math.sqrt(len(values))
+    return mean, half_width
+
+
+# Acción de la política y cuántos steps se puede repetir sin volver a consultarla (None: hasta
+# que cambie el estado). Un agente QLearning sin exploración decide según el estado, salvo empate.
+def policy_run(policy, state, step):
+    if hasattr(policy, 'get_run'):
+        return policy.get_run(state, step)
+    action = policy.get_action(state, training=False)
+    if hasattr(policy, 'get_q_value') and policy.get_q_value(state, 0) == policy.get_q_value(state, 1):
+        return action, 1
+    return action, None
+
+
+def run_policy_episode(env, policy, max_steps):
+    """
+    Corre un episodio de `max_steps` steps con la política (sin aprender) y retorna sus
+    métricas en el orden de EVALUATION_METRICS. Con EventIntersection los tramos en que la
+    acción se repite se avanzan con advance; con los otros motores, step por step.
+    """
+    totals = np.zeros(3)  # Autos esperando, autos que avanzaron y autos en la grilla, sumados por step
+    total_reward = 0.0
+    state = env.get_state()
+    step = 0
+    while step < max_steps:
+        action, repeat = policy_run(policy, state, step)
+        limit = max_steps - step if repeat is None else min(repeat, max_steps - step)
+        if limit > 1 and hasattr(env, 'advance'):
+            runs = env.advance(action, limit)
+        else:
+            env.apply_action(action)
+            moved = env.step()
+            runs = ((1, moved, env.get_waiting_vehicles_count(), env.get_vehicle_count()),)
+
+        for steps, moved, waiting, vehicles in runs:
+            totals += (waiting * steps, moved * steps, vehicles * steps)
+            total_reward += env.step_reward(action, moved, waiting) * steps
+            step += steps
+        state = env.get_state()
+
+    wait, throughput, vehicles = totals / max(max_steps, 1)
+    return total_reward, wait, throughput, env.phase_changes, vehicles
+
+
+def branch_returns(env, policy, horizon, actions=(0, 1)):
+    """
+    Compara acciones desde el estado actual de `env` sin volver a simular lo anterior: por
+    cada acción restaura la misma foto (ver Intersection.snapshot) con sus sorteos, así que
+    todas las ramas ven el mismo tráfico; aplica la acción en el primer step y sigue con
+    `policy` hasta completar `horizon` steps. Retorna la recompensa total de cada rama y
+    deja `env` como estaba.
+    """
+    snapshot = env.snapshot()
+    returns = []
+    for action in actions:
+        env.restore(snapshot)
+        env.apply_action(action)
+        moved = env.step()
+        reward = env.step_reward(action, moved, env.get_waiting_vehicles_count())
+        returns.append(reward + run_policy_episode(env, policy, horizon - 1)[0])
+    env.restore(snapshot)
+    return returns
+
+
+# Generador del episodio `episode`: depende sólo de la semilla (entero o lista de enteros), el
+# episodio y el uso, así todas las políticas ven el mismo tráfico (números aleatorios comunes)
+def episode_rng(seed, episode, stream=0):
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(episode, stream)))
+
+
+def make_environment(spec, seed, episode):
+    engine_cls, grid_size, schedule, env_params = spec
+    env = engine_cls(grid_size=grid_size, rng=episode_rng(seed, episode))
+    return env.configure(schedule, **env_params)
+
+
+def _evaluate_worker(task):
+    # Evalúa una política en algunos episodios; retorna (nombre, episodios, métricas por episodio)
+    name, policy, spec, seed, episodes, max_steps = task
+    results = []
+    for episode in episodes:
+        # Los empates del agente se sortean con un generador propio del episodio
+        if hasattr(policy, 'rng'):
+            policy.rng = episode_rng(seed, episode, 1)
+        results.append(run_policy_episode(make_environment(spec, seed, episode), policy, max_steps))
+    return name, episodes, results
+
+
+def evaluate_policies(policies, spec, num_episodes=30, max_steps=1000, seed=0, max_workers=None,
+                      confidence=0.95, reference=None):
+    """
+    Evalúa cada política de `policies` ({nombre: política con get_action}) en los mismos
+    `num_episodes` episodios: el episodio i usa el mismo entorno y la misma semilla para
+    todas (spec = (clase del motor, grid_size, Horario o None, parámetros de configure)).
+
+    Los episodios se reparten en un ProcessPoolExecutor de `max_workers` procesos (por
+    defecto os.cpu_count(); con 1 se corren en este proceso sobre copias de las políticas).
+
+    Retorna {nombre: {'episodes': arreglo (episodios x EVALUATION_METRICS), 'mean',
+    'ci'}}, con el semiancho del intervalo de confianza en 'ci'. Con `reference` (nombre
+    de una política) cada otra política trae además 'diff' y 'diff_ci': la diferencia
+    con la referencia episodio a episodio, que con tráfico común tiene un intervalo
+    mucho más angosto que comparar las medias por separado.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    # Bloques de episodios: unos cuatro por worker para repartir la carga
+    chunk = max(1, math.ceil(len(policies) * num_episodes / (4 * max_workers)))
+    tasks = [(name, policy, spec, seed, list(range(start, min(start + chunk, num_episodes))), max_steps)
+             for name, policy in policies.items() for start in range(0, num_episodes, chunk)]
+
+    if max_workers == 1 or len(tasks) == 1:
+        outputs = [_evaluate_worker(copy.deepcopy(task)) for task in tasks]
+    else:
+        with ProcessPoolExecutor(min(max_workers, len(tasks))) as executor:
+            outputs = list(executor.map(_evaluate_worker, tasks))
+
+    values = {name: np.zeros((num_episodes, len(EVALUATION_METRICS))) for name in policies}
+    for name, episodes, results in outputs:
+        values[name][episodes] = results
+
+    report = {}
+    for name, episodes in values.items():
+        mean, half_width = confidence_interval(episodes, confidence)
+        report[name] = {'episodes': episodes, 'mean': mean, 'ci': half_width}
+        if reference is not None and name != reference:
+            report[name]['diff'], report[name]['diff_ci'] = confidence_interval(episodes - values[reference], confidence)
+    return report
+
+
+# Tabla de texto con la media ± intervalo de cada métrica y, si hay referencia, la diferencia con ella
+def format_report(report, reference=None, confidence=0.95):
+    lines = [f"{'política':>16} " + " ".join(f"{metric:>20}" for metric in EVALUATION_METRICS)]
+    for name, result in report.items():
+        cells = [f"{mean:>10.2f} ± {ci:<7.2f}" for mean, ci in zip(result['mean'], result['ci'])]
+        lines.append(f"{name:>16} " + " ".join(cells))
+    if reference is not None:
+        lines.append(f"\nDiferencia con {reference} (intervalo de {100 * confidence:.0f}%, tráfico común); "
+                     f"* = {reference} es mejor con confianza")
+        for name, result in report.items():
+            if name == reference:
+                continue
+            cells = []
+            for metric, diff, ci in zip(EVALUATION_METRICS, result['diff'], result['diff_ci']):
+                # diff = política - referencia
+                better = diff - ci > 0 if metric in LOWER_IS_BETTER else diff + ci < 0
+                cells.append(f"{diff:>+10.2f} ± {ci:<6.2f}{'*' if better else ' '}")
+            lines.append(f"{name:>16} " + " ".join(cells))
+    return "\n".join(lines)
+
+
+def main():
+    # Import local: train_agent importa este módulo
+    from train_agent import TrafficSimulator
+
+    parser = argparse.ArgumentParser(description="Evaluación del agente contra políticas de referencia")
+    parser.add_argument('--model', default='../models/q_table.pkl')
+    parser.add_argument('--table', default='dict')
+    parser.add_argument('--episodes', type=int, default=30)
+    parser.add_argument('--max-steps', type=int, default=1000)
+    parser.add_argument('--workers', type=int, help="procesos (por defecto uno por núcleo)")
+    parser.add_argument('--engine', help="motor de los entornos (por defecto 'python'; 'events' da los mismos "
+                                         "resultados, más rápido)")
+    parser.add_argument('--demand', help="perfil de demanda en CSV (ver backend/horario.py)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--confidence', type=float, default=0.95)
+    args = parser.parse_args()
+
+    simulator = TrafficSimulator(table=args.table)
+    simulator.agent.load(args.model)
+    if args.demand:
+        simulator.set_demand(args.demand)
+    simulator.compare_policies(num_episodes=args.episodes, max_steps=args.max_steps, max_workers=args.workers,
+                               engine=args.engine, seed=args.seed, confidence=args.confidence)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import json
+import os
+import numpy as np
+
+SCHEMA_FILE = 'schema.json'
+
+
+def column_path(path, table, column):
+    return os.path.join(path, f"{table}.{column}.bin")
+
+
+class MetricsWriter:
+    """
+    Registro de métricas en disco, por columnas y sólo agregando al final.
+
+    `path` es un directorio con un schema.json y un archivo binario por columna
+    (valores crudos de su dtype, sin encabezado). `tables` define las tablas:
+    {nombre: ((columna, dtype), ...)}. Las filas se acumulan en bloques
+    preasignados de `chunk_size` filas por tabla y se escriben al llenarse el
+    bloque o al llamar flush(), así que la memoria usada no crece con el
+    entrenamiento y el archivo se puede leer (MetricsLog) mientras se escribe.
+
+    Con resume=True se continúa un registro existente (mismo esquema): se descartan
+    las filas incompletas que haya dejado una escritura interrumpida. Si `path` no
+    tiene schema.json se empieza un registro nuevo, igual que con resume=False.
+    """
+
+    def __init__(self, path, tables, chunk_size=4096, resume=False):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.tables = {name: tuple((column, np.dtype(dtype).str) for column, dtype in columns)
+                       for name, columns in tables.items()}
+
+        os.makedirs(path, exist_ok=True)
+        schema_path = os.path.join(path, SCHEMA_FILE)
+        resume = resume and os.path.exists(schema_path)
+        if resume:
+            with open(schema_path) as f:
+                existing = {name: tuple(tuple(column) for column in columns)
+                            for name, columns in json.load(f)['tables'].items()}
+            if existing != self.tables:
+                raise ValueError(f"El esquema de {path} no coincide con el registro existente")
+            written = repair(path, self.tables)
+        else:
+            with open(schema_path, 'w') as f:
+                json.dump({'tables': self.tables}, f, indent=2)
+            written = dict.fromkeys(self.tables, 0)
+
+        self.written = written  # Filas ya escritas en disco por tabla
+        self.buffers = {}
+        self.filled = dict.fromkeys(self.tables, 0)
+        self.files = {}
+        for name, columns in self.tables.items():
+            self.buffers[name] = {column: np.empty(chunk_size, dtype=dtype) for column, dtype in columns}
+            for column, _ in columns:
+                # En modo 'ab' cada escritura va al final del archivo, también después de truncate()
+                f = open(column_path(path, name, column), 'ab')
+                if not resume:
+                    f.truncate(0)
+                self.files[(name, column)] = f
+
+    # Filas de la tabla, incluyendo las que aún no se escriben
+    def rows(self, table):
+        return self.written[table] + self.filled[table]
+
+    # Agrega una fila (valores en el orden de las columnas)
+    def append(self, table, values):
+        buffers = self.buffers[table]
+        index = self.filled[table]
+        for (column, _), value in zip(self.tables[table], values):
+            buffers[column][index] = value
+        self.filled[table] = index + 1
+        if index + 1 == self.chunk_size:
+            self.flush_table(table)
+
+    # Agrega varias filas: {columna: arreglo}, todas del mismo largo
+    def extend(self, table, columns):
+        count = len(next(iter(columns.values())))
+        start = 0
+        while start < count:
+            index = self.filled[table]
+            block = min(self.chunk_size - index, count - start)
+            for column, buffer in self.buffers[table].items():
+                buffer[index:index + block] = columns[column][start:start + block]
+            self.filled[table] = index + block
+            start += block
+            if self.filled[table] == self.chunk_size:
+                self.flush_table(table)
+
+    def flush_table(self, table):
+        filled = self.filled[table]
+        if filled == 0:
+            return
+        for column, buffer in self.buffers[table].items():
+            f = self.files[(table, column)]
+            f.write(buffer[:filled].tobytes())
+            f.flush()
+        self.written[table] += filled
+        self.filled[table] = 0
+
+    def flush(self):
+        for table in self.tables:
+            self.flush_table(table)
+
+    # Descarta las filas de la tabla desde `rows` en adelante
+    def truncate(self, table, rows):
+        self.flush_table(table)
+        rows = min(rows, self.written[table])
+        for column, dtype in self.tables[table]:
+            self.files[(table, column)].truncate(rows * np.dtype(dtype).itemsize)
+        self.written[table] = rows
+
+    def close(self):
+        self.flush()
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def repair(path, tables):
+    # Recorta cada tabla a la cantidad de filas completas (presentes en todas sus columnas)
+    rows = {}
+    for name, columns in tables.items():
+        counts = []
+        for column, dtype in columns:
+            file_path = column_path(path, name, column)
+            size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+            counts.append(size // np.dtype(dtype).itemsize)
+        rows[name] = min(counts)
+        for column, dtype in columns:
+            with open(column_path(path, name, column), 'ab') as f:
+                f.truncate(rows[name] * np.dtype(dtype).itemsize)
+    return rows
+
+
+class MetricsTable:
+    # Columnas de una tabla de MetricsLog, como arreglos de sólo lectura mapeados desde disco
+
+    def __init__(self, path, name, columns):
+        self.path = path
+        self.name = name
+        self.columns = dict(columns)
+
+    def keys(self):
+        return self.columns.keys()
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __contains__(self, column):
+        return column in self.columns
+
+    def __len__(self):
+        return min((os.path.getsize(column_path(self.path, self.name, column)) // np.dtype(dtype).itemsize
+                    for column, dtype in self.columns.items()), default=0)
+
+    # Se mapean sólo las filas completas al momento de la llamada
+    def __getitem__(self, column):
+        dtype = np.dtype(self.columns[column])
+        rows = len(self)
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(column_path(self.path, self.name, column), dtype=dtype, mode='r', shape=(rows,))
+
+
+class MetricsLog:
+    """
+    Lectura de un registro de MetricsWriter. Cada columna se mapea desde disco al pedirla,
+    así que no se carga el registro completo y se puede leer mientras se sigue escribiendo.
+
+    log.table('steps')['waiting'] retorna una columna; log['rewards'] es un atajo para las
+    columnas de la tabla 'episodes', de modo que un MetricsLog se usa como el dict de
+    métricas que retorna TrafficSimulator.train.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, SCHEMA_FILE)) as f:
+            self.tables = json.load(f)['tables']
+
+    def table(self, name):
+        return MetricsTable(self.path, name, self.tables[name])
+
+    def keys(self):
+        return self.table('episodes').keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __contains__(self, column):
+        return column in self.table('episodes')
+
+    def __len__(self):
+        return len(self.table('episodes'))
+
+    def __getitem__(self, column):
+        return self.table('episodes')[column]
+
+    # Filas de la tabla de steps de un episodio: {columna: arreglo}
+    def episode_steps(self, episode):
+        steps = self.table('steps')
+        mask = steps['episode'] == episode
+        return {column: np.asarray(steps[column][mask]) for column in steps.keys()}
+
+    def __repr__(self):
+        sizes = ', '.join(f"{name}={len(self.table(name))}" for name in self.tables)
+        return f"MetricsLog({self.path!r}, {sizes})"
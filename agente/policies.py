@@ -0,0 +1,45 @@
+# Políticas de semáforo de referencia, con la misma interfaz que QLearning (get_action)
+
+
+class FixedCyclePolicy:
+    # Política de ciclo fijo: pide cambiar de fase cada `period` steps. Con offset=0 cambia en
+    # el step period, 2*period, ... contando desde 1; con offset=1 uno después, como el baseline
+    # de TrafficSimulator.compare_with_baseline. Misma interfaz que QLearning.
+
+    def __init__(self, period=30, offset=0):
+        self.period = period
+        self.offset = offset
+        self.steps = 0
+
+    def get_action(self, state, training=False):
+        self.steps += 1
+        phase = self.steps - self.offset
+        return 1 if phase > 0 and phase % self.period == 0 else 0
+
+    # Acción en el step `step` del episodio (desde 0) y cuántos steps se repite (ver
+    # agente/evaluation.py); equivale a llamar get_action en cada step desde el inicio
+    def get_run(self, state, step):
+        phase = step + 1 - self.offset
+        if phase <= 0:
+            return 0, self.period - phase
+        if phase % self.period == 0:
+            return 1, 1
+        return 0, self.period - phase % self.period
+
+
+class MaxQueuePolicy:
+    # Política actuada de cola máxima: pide cambiar de fase cuando la dirección con más autos
+    # esperando (nivel de tráfico del estado) tiene luz roja y la fase lleva al menos la
+    # categoría de tiempo `min_category`. Decide sólo según el estado. Misma interfaz que QLearning.
+
+    def __init__(self, min_category=1):
+        self.min_category = min_category
+
+    def get_action(self, state, training=False):
+        north, south, east, west, light, category = state
+        green, red = ((north, south), (east, west)) if light == 0 else ((east, west), (north, south))
+        return 1 if category >= self.min_category and max(red) > max(green) else 0
+
+    # La acción se repite hasta que cambie el estado
+    def get_run(self, state, step):
+        return self.get_action(state), None
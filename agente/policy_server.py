@@ -0,0 +1,277 @@
+"""
+Servidor de inferencia para la política entrenada (mantener o cambiar de fase).
+
+Carga la tabla Q en modo sólo lectura y responde por HTTP (asyncio, sin dependencias):
+    POST /actions  {"states": [[norte, sur, este, oeste, fase, tiempo], ...]}
+                   -> {"actions": [0 o 1, ...], "version": n}
+    GET  /stats    -> latencia p50/p99 (ms), requests/seg, estados/seg y recargas
+    POST /stats/reset  reinicia las estadísticas
+    GET  /health   -> {"status": "ok", "version": n}
+
+El modelo puede ser un policy.npy (ver checkpoint.export_policy, se mapea desde disco),
+un directorio de checkpoints (se usa su policy.npy), un checkpoint .npz o el pickle de
+QLearning.save. Si el archivo cambia, el modelo se recarga sin detener el servidor.
+Ante un empate entre las dos acciones se responde 0 (mantener).
+
+Uso:
+    python agente/policy_server.py serve models/checkpoints [--port 8765]
+    python agente/policy_server.py load [--port 8765] [--clients 8] [--batch 16] [--seconds 10]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import time
+from collections import deque
+import numpy as np
+from q_learning import QLearning
+from q_learning_numpy import STATE_RADIX, encode_states
+from checkpoint import POLICY_FILE, load_policy, load_checkpoint, q_table_arrays
+
+DEFAULT_PORT = 8765
+
+
+# Tabla Q (486, 2) del modelo en `path`, mapeada desde disco si es un .npy
+def load_q_values(path):
+    if os.path.isdir(path):
+        path = os.path.join(path, POLICY_FILE)
+    if path.endswith('.npy'):
+        return load_policy(path).q_table
+    if path.endswith('.npz'):
+        arrays, _ = load_checkpoint(path)
+        return arrays['q_values']
+    agent = QLearning()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if not agent.load(path):
+            raise FileNotFoundError(f"No se encontró el modelo en {path}")
+    return q_table_arrays(agent)[0]
+
+
+class LatencyStats:
+    # Latencias de las últimas `window` requests y tasas desde que se reiniciaron las estadísticas
+
+    def __init__(self, window=10000):
+        self.latencies = deque(maxlen=window)
+        self.reset()
+
+    def reset(self):
+        self.latencies.clear()
+        self.requests = 0
+        self.states = 0
+        self.start = time.perf_counter()
+
+    def record(self, seconds, states=1):
+        self.latencies.append(seconds)
+        self.requests += 1
+        self.states += states
+
+    def summary(self):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        p50, p99 = (np.percentile(self.latencies, (50, 99)) * 1000).tolist() if self.latencies else (0.0, 0.0)
+        return {
+            'requests': self.requests,
+            'states': self.states,
+            'p50_ms': p50,
+            'p99_ms': p99,
+            'requests_per_second': self.requests / elapsed,
+            'states_per_second': self.states / elapsed
+        }
+
+
+class PolicyServer:
+    """
+    Servidor HTTP de la política. `path` es el modelo (ver load_q_values); cada
+    `reload_interval` segundos se revisa si el archivo cambió y se recarga. Los
+    checkpoints se escriben de forma atómica, así que nunca se lee un archivo a medias.
+    """
+
+    def __init__(self, path, host='127.0.0.1', port=DEFAULT_PORT, reload_interval=1.0):
+        self.path = path
+        self.host = host
+        self.port = port
+        self.reload_interval = reload_interval
+        self.stats = LatencyStats()
+        self.version = 0
+        self.reloads = 0
+        self.server = None
+        self.model_mtime = None
+        self.q_values = None
+        self.reload()
+
+    def model_file(self):
+        return os.path.join(self.path, POLICY_FILE) if os.path.isdir(self.path) else self.path
+
+    # Carga el modelo si el archivo cambió; retorna si se recargó
+    def reload(self):
+        mtime = os.stat(self.model_file()).st_mtime_ns
+        if mtime == self.model_mtime:
+            return False
+        self.q_values = load_q_values(self.path)
+        self.model_mtime = mtime
+        self.version += 1
+        if self.version > 1:
+            self.reloads += 1
+        return True
+
+    # Acción de mayor valor Q para cada estado de `states` (arreglo (N, 6))
+    def predict(self, states):
+        states = np.asarray(states, dtype=np.int64).reshape(-1, len(STATE_RADIX))
+        if ((states < 0) | (states >= STATE_RADIX)).any():
+            raise ValueError(f"Estados fuera de rango: cada componente debe ser menor que {STATE_RADIX}")
+        q = self.q_values[encode_states(states)]
+        return (q[:, 1] > q[:, 0]).astype(np.int8)
+
+    def handle(self, method, target, body):
+        # Retorna (código HTTP, respuesta JSON)
+        if method == 'POST' and target == '/actions':
+            start = time.perf_counter()
+            try:
+                states = json.loads(body)['states']
+                actions = self.predict(states)
+            except (ValueError, KeyError, TypeError) as error:
+                return 400, {'error': str(error)}
+            self.stats.record(time.perf_counter() - start, len(actions))
+            return 200, {'actions': actions.tolist(), 'version': self.version}
+        if method == 'GET' and target == '/stats':
+            return 200, dict(self.stats.summary(), version=self.version, reloads=self.reloads)
+        if method == 'POST' and target == '/stats/reset':
+            self.stats.reset()
+            return 200, {'status': 'ok'}
+        if method == 'GET' and target == '/health':
+            return 200, {'status': 'ok', 'version': self.version}
+        return 404, {'error': f"{method} {target} no existe"}
+
+    async def handle_connection(self, reader, writer):
+        # HTTP/1.1 mínimo con conexiones persistentes
+        try:
+            while True:
+                try:
+                    header = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                lines = header.decode('latin-1').split('\r\n')
+                method, target, _ = lines[0].split(' ', 2)
+                headers = dict(line.split(':', 1) for line in lines[1:] if ':' in line)
+                headers = {key.strip().lower(): value.strip() for key, value in headers.items()}
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                status, response = self.handle(method, target, body)
+                payload = json.dumps(response).encode()
+                writer.write(f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                             f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n"
+                             .encode('latin-1') + payload)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        finally:
+            writer.close()
+
+    async def watch_model(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                self.reload()
+            except (OSError, ValueError):
+                # Modelo inválido o borrado: se sigue usando el anterior
+                pass
+
+    async def serve(self, ready=None):
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        watcher = asyncio.create_task(self.watch_model())
+        if ready is not None:
+            ready.set()
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            watcher.cancel()
+
+
+async def request(reader, writer, method, target, payload=None):
+    # Una request HTTP sobre una conexión persistente; retorna (código, JSON)
+    body = b'' if payload is None else json.dumps(payload).encode()
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n"
+                 .encode('latin-1') + body)
+    await writer.drain()
+    header = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1')
+    status = int(header.split(' ', 2)[1])
+    length = next(int(line.split(':', 1)[1]) for line in header.split('\r\n')
+                  if line.lower().startswith('content-length'))
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def generate_load(host='127.0.0.1', port=DEFAULT_PORT, clients=8, batch=16, seconds=10.0, seed=0):
+    """
+    Generador de carga local: `clients` conexiones envían lotes de `batch` estados al
+    azar durante `seconds` segundos, cada una esperando su respuesta antes de la
+    siguiente. Retorna las latencias medidas desde el cliente y las /stats del servidor.
+    """
+    rng = np.random.default_rng(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    await request(reader, writer, 'POST', '/stats/reset')
+    writer.close()
+
+    stats = LatencyStats(window=None)
+    deadline = time.perf_counter() + seconds
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while time.perf_counter() < deadline:
+                states = np.column_stack([rng.integers(radix, size=batch) for radix in STATE_RADIX]).tolist()
+                start = time.perf_counter()
+                status, _ = await request(reader, writer, 'POST', '/actions', {'states': states})
+                if status != 200:
+                    raise RuntimeError(f"El servidor respondió {status}")
+                stats.record(time.perf_counter() - start, batch)
+        finally:
+            writer.close()
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+    reader, writer = await asyncio.open_connection(host, port)
+    _, server_stats = await request(reader, writer, 'GET', '/stats')
+    writer.close()
+    return stats.summary(), server_stats
+
+
+def format_stats(name, stats):
+    return (f"{name:>10} | requests: {stats['requests']} | p50: {stats['p50_ms']:.3f} ms | "
+            f"p99: {stats['p99_ms']:.3f} ms | requests/s: {stats['requests_per_second']:.0f} | "
+            f"estados/s: {stats['states_per_second']:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de inferencia de la política")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    serve_parser = subparsers.add_parser('serve', help="servir un modelo")
+    serve_parser.add_argument('model', help="policy.npy, directorio de checkpoints, checkpoint .npz o pickle")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument('--reload-interval', type=float, default=1.0)
+    load_parser = subparsers.add_parser('load', help="generar carga contra un servidor")
+    load_parser.add_argument('--host', default='127.0.0.1')
+    load_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    load_parser.add_argument('--clients', type=int, default=8)
+    load_parser.add_argument('--batch', type=int, default=16)
+    load_parser.add_argument('--seconds', type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        server = PolicyServer(args.model, args.host, args.port, args.reload_interval)
+        print(f"Sirviendo {args.model} en http://{args.host}:{args.port}")
+        try:
+            asyncio.run(server.serve())
+        except KeyboardInterrupt:
+            pass
+    else:
+        client_stats, server_stats = asyncio.run(
+            generate_load(args.host, args.port, args.clients, args.batch, args.seconds))
+        print(format_stats('cliente', client_stats))
+        print(format_stats('servidor', server_stats))
+
+
+if __name__ == "__main__":
+    main()
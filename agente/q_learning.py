@@ -16,19 +16,24 @@ class QLearning:
     - 1: Cambiar fase
     """
 
-    def __init__(self, alpha=0.1, gamma=0.95, epsilon=1.0, epsilon_decay=0.995, epsilon_min=0.01):
+    # Métodos cronometrados al activar la instrumentación (ver backend/profiler.py)
+    PROFILED_METHODS = ('get_action', 'update', 'decay_epsilon')
+
+    def __init__(self, alpha=0.1, gamma=0.95, epsilon=1.0, epsilon_decay=0.995, epsilon_min=0.01, rng=None):
         """
             alpha: Tasa de aprendizaje (learning rate)
             gamma: Factor de descuento
             epsilon: Probabilidad inicial de exploración
             epsilon_decay: Decaimiento de epsilon por episodio
             epsilon_min: Epsilon mínimo
+            rng: numpy.random.Generator o semilla para los sorteos (None: np.random global)
         """
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
         self.epsilon_decay = epsilon_decay
         self.epsilon_min = epsilon_min
+        self.rng = None if rng is None else np.random.default_rng(rng)
 
         # Tabla Q: diccionario de (estado, acción)
         self.q_table = {}
@@ -37,17 +42,34 @@ class QLearning:
         self.total_steps = 0
         self.episodes_completed = 0
 
+    # Clave con que la tabla guarda el estado de Intersection.get_state(): la tupla misma
+    def state_key(self, state):
+        return state
+
     def get_q_value(self, state, action):
         return self.q_table.get((state, action), 0.0)
 
     def set_q_value(self, state, action, value):
         self.q_table[(state, action)] = value
 
+    # Número al azar en [0, 1), del generador del agente o de np.random
+    def random_uniform(self, size=None):
+        if self.rng is None:
+            return np.random.random(size)
+        return self.rng.random(size)
+
+    # Acción al azar (0 o 1), del generador del agente o de np.random
+    def random_action(self, size=None):
+        if self.rng is None:
+            return np.random.randint(0, 2, size=size)
+        actions = self.rng.integers(0, 2, size=size)
+        return int(actions) if size is None else actions
+
     # Selecciona una acción usando política epsilon-greedy.
     def get_action(self, state, training=True):
         # Durante entrenamiento, exploración con epsilon-greedy
-        if training and np.random.random() < self.epsilon:
-            return np.random.randint(0, 2)  # Exploración: acción aleatoria
+        if training and self.random_uniform() < self.epsilon:
+            return self.random_action()  # Exploración: acción aleatoria
 
         # Explotación: elegir mejor acción
         q0 = self.get_q_value(state, 0)
@@ -58,7 +80,7 @@ class QLearning:
         elif q1 > q0:
             return 1
         else:
-            return np.random.randint(0, 2)  # Empate: elegir al azar
+            return self.random_action()  # Empate: elegir al azar
 
     # Actualiza la tabla Q usando la ecuación de Q-Learning.
     def update(self, state, action, reward, next_state, done=False):
@@ -98,7 +120,7 @@ class QLearning:
     def save(self, filepath="models/q_table.pkl"):
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
         data = {
-            'q_table': self.q_table,
+            'q_table': self.export_q_table(),
             'epsilon': self.epsilon,
             'total_steps': self.total_steps,
             'episodes_completed': self.episodes_completed,
@@ -120,7 +142,7 @@ class QLearning:
         with open(filepath, 'rb') as f:
             data = pickle.load(f)
 
-        self.q_table = data['q_table']
+        self.import_q_table(data['q_table'])
         self.epsilon = data['epsilon']
         self.total_steps = data['total_steps']
         self.episodes_completed = data['episodes_completed']
@@ -128,23 +150,34 @@ class QLearning:
         self.gamma = data['gamma']
 
         print(f"Tabla Q cargada desde {filepath}")
-        print(f"Estados en tabla: {len(self.q_table) // 2}")
+        print(f"Estados en tabla: {self.count_states()}")
         print(f"Episodios completados: {self.episodes_completed}")
 
         return True
 
+    # Tabla Q en el formato del archivo pickle: {(estado, acción): valor}
+    def export_q_table(self):
+        return self.q_table
+
+    def import_q_table(self, q_table):
+        self.q_table = q_table
+
+    # Cantidad aproximada de estados visitados
+    def count_states(self):
+        return len(self.q_table) // 2
+
     def get_stats(self):
         return {
             'total_steps': self.total_steps,
             'episodes': self.episodes_completed,
             'epsilon': self.epsilon,
-            'q_table_size': len(self.q_table) // 2,
+            'q_table_size': self.count_states(),
             'alpha': self.alpha,
             'gamma': self.gamma
         }
 
     # Para DEBUG
     def __repr__(self):
-        return (f"QLearning(states={len(self.q_table) // 2}, "
+        return (f"{type(self).__name__}(states={self.count_states()}, "
                 f"episodes={self.episodes_completed}, "
                 f"epsilon={self.epsilon:.3f})")
\ No newline at end of file
@@ -0,0 +1,178 @@
+import numpy as np
+from q_learning import QLearning
+
+# Cantidad de valores de cada componente del estado de Intersection.get_state():
+# (norte, sur, este, oeste, fase, categoría de tiempo)
+STATE_RADIX = (3, 3, 3, 3, 2, 3)
+NUM_STATES = int(np.prod(STATE_RADIX))  # 486
+NUM_ACTIONS = 2
+
+# Peso de cada componente en el índice (base mixta)
+STATE_STRIDES = np.array([int(np.prod(STATE_RADIX[i + 1:])) for i in range(len(STATE_RADIX))], dtype=np.int64)
+
+
+# Convierte la tupla de estado en un índice entre 0 y NUM_STATES - 1
+def encode_state(state):
+    norte, sur, este, oeste, phase, time_category = state
+    return ((((norte * 3 + sur) * 3 + este) * 3 + oeste) * 2 + phase) * 3 + time_category
+
+
+# Versión vectorizada de encode_state para un arreglo de estados de forma (B, 6)
+def encode_states(states):
+    return np.asarray(states, dtype=np.int64) @ STATE_STRIDES
+
+
+# Convierte un índice de vuelta a la tupla de estado
+def decode_state(index):
+    state = []
+    for radix in reversed(STATE_RADIX):
+        index, value = divmod(index, radix)
+        state.append(value)
+    return tuple(reversed(state))
+
+
+class NumpyQLearning(QLearning):
+    """
+    Variante de QLearning con la tabla Q en un arreglo denso (486, 2) de float64.
+
+    Los estados son índices de encode_state (ver state_key); también se aceptan
+    las tuplas de Intersection.get_state(), que se convierten en cada llamada.
+    Las acciones y actualizaciones individuales consumen el generador (rng o
+    np.random) igual que QLearning, así que con la misma semilla ambas tablas
+    aprenden lo mismo.
+
+    save/load usan el mismo formato pickle que QLearning ({(estado, acción): valor}).
+    """
+
+    PROFILED_METHODS = QLearning.PROFILED_METHODS + ('get_actions', 'update_batch')
+
+    def __init__(self, alpha=0.1, gamma=0.95, epsilon=1.0, epsilon_decay=0.995, epsilon_min=0.01, rng=None):
+        super().__init__(alpha, gamma, epsilon, epsilon_decay, epsilon_min, rng)
+
+        self.q_table = np.zeros((NUM_STATES, NUM_ACTIONS), dtype=np.float64)
+
+        # Pares (estado, acción) que han sido escritos, para exportar sólo esos al pickle
+        self.visited = np.zeros((NUM_STATES, NUM_ACTIONS), dtype=bool)
+
+    # El entrenamiento convierte cada estado a su índice una sola vez por step
+    def state_key(self, state):
+        return encode_state(state)
+
+    def get_q_value(self, state, action):
+        if state.__class__ is tuple:
+            state = encode_state(state)
+        return self.q_table.item(state, action)
+
+    def set_q_value(self, state, action, value):
+        if state.__class__ is tuple:
+            state = encode_state(state)
+        self.q_table[state, action] = value
+        self.visited[state, action] = True
+
+    # Selecciona una acción usando política epsilon-greedy.
+    def get_action(self, state, training=True):
+        if training and self.random_uniform() < self.epsilon:
+            return self.random_action()
+
+        if state.__class__ is tuple:
+            state = encode_state(state)
+        q0, q1 = self.q_table[state].tolist()
+        if q0 > q1:
+            return 0
+        elif q1 > q0:
+            return 1
+        else:
+            return self.random_action()
+
+    # Actualiza la tabla Q usando la ecuación de Q-Learning.
+    def update(self, state, action, reward, next_state, done=False):
+        if state.__class__ is tuple:
+            state = encode_state(state)
+            next_state = encode_state(next_state)
+        q_table = self.q_table
+        current_q = q_table.item(state, action)
+
+        if done:
+            target = reward
+        else:
+            next_q0, next_q1 = q_table[next_state].tolist()
+            target = reward + self.gamma * max(next_q0, next_q1)
+
+        q_table[state, action] = current_q + self.alpha * (target - current_q)
+        self.visited[state, action] = True
+
+        self.total_steps += 1
+
+    # Política epsilon-greedy vectorizada para un arreglo de índices de estado
+    def get_actions(self, state_indices, training=True):
+        state_indices = np.asarray(state_indices, dtype=np.int64)
+        q = self.q_table[state_indices]
+        actions = np.argmax(q, axis=1)
+
+        # Empates y exploración: acción al azar
+        random_mask = q[:, 0] == q[:, 1]
+        if training:
+            random_mask |= self.random_uniform(len(state_indices)) < self.epsilon
+        count = int(np.count_nonzero(random_mask))
+        if count:
+            actions[random_mask] = self.random_action(count)
+        return actions
+
+    def update_batch(self, states, actions, rewards, next_states, dones):
+        """
+        Aplica un lote de actualizaciones de Q-Learning con operaciones vectorizadas.
+
+            states, next_states: índices de estado (ver encode_state)
+            actions, rewards, dones: arreglos del mismo largo
+
+        Los objetivos se calculan con la tabla previa al lote. Si un par
+        (estado, acción) se repite, sus actualizaciones se componen en orden
+        de llegada, igual que aplicarlas una por una:
+            q <- (1 - alpha)^k q + sum_i alpha (1 - alpha)^(k - i) target_i
+
+        Retorna el error TD de cada transición respecto a la tabla previa al lote.
+        """
+        states = np.asarray(states, dtype=np.int64)
+        actions = np.asarray(actions, dtype=np.int64)
+        rewards = np.asarray(rewards, dtype=np.float64)
+        next_states = np.asarray(next_states, dtype=np.int64)
+        dones = np.asarray(dones, dtype=bool)
+        if len(states) == 0:
+            return np.zeros(0, dtype=np.float64)
+
+        targets = rewards + self.gamma * np.where(dones, 0.0, np.max(self.q_table[next_states], axis=1))
+        td_errors = targets - self.q_table[states, actions]
+
+        # Agrupar por par (estado, acción) manteniendo el orden de llegada
+        pairs = states * NUM_ACTIONS + actions
+        order = np.argsort(pairs, kind='stable')
+        sorted_pairs = pairs[order]
+        unique_pairs, starts, counts = np.unique(sorted_pairs, return_index=True, return_counts=True)
+
+        # Cuántas actualizaciones del mismo par vienen después de cada una
+        later = np.repeat(starts + counts, counts) - np.arange(len(pairs)) - 1
+        decay = 1.0 - self.alpha
+        contributions = np.add.reduceat(self.alpha * decay ** later * targets[order], starts)
+
+        q_flat = self.q_table.reshape(-1)
+        q_flat[unique_pairs] = decay ** counts * q_flat[unique_pairs] + contributions
+        self.visited.reshape(-1)[unique_pairs] = True
+
+        self.total_steps += len(states)
+        return td_errors
+
+    # Convierte la tabla al formato pickle de QLearning
+    def export_q_table(self):
+        q_table = {}
+        for index, action in zip(*np.nonzero(self.visited)):
+            q_table[(decode_state(int(index)), int(action))] = float(self.q_table[index, action])
+        return q_table
+
+    def import_q_table(self, q_table):
+        self.q_table.fill(0.0)
+        self.visited.fill(False)
+        for (state, action), value in q_table.items():
+            self.set_q_value(state, action, value)
+
+    def count_states(self):
+        return int(np.count_nonzero(self.visited)) // 2
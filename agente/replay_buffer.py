@@ -0,0 +1,95 @@
+import numpy as np
+
+# Formato de cada transición guardada (los estados como índice, ver encode_state)
+TRANSITION_DTYPE = np.dtype([
+    ('state', np.int32),
+    ('action', np.int8),
+    ('reward', np.float64),
+    ('next_state', np.int32),
+    ('done', np.bool_)
+])
+
+
+class ReplayBuffer:
+    """
+    Memoria de experiencia circular con capacidad fija y arreglos preasignados.
+
+    Cuando se llena, las transiciones nuevas reemplazan a las más antiguas.
+    Con prioritized=True el muestreo es proporcional a |error TD|^priority_alpha;
+    las transiciones nuevas entran con la prioridad máxima vista.
+
+    El muestreo usa `rng` (numpy.random.Generator o semilla) o, sin él, np.random global.
+    """
+
+    def __init__(self, capacity=100000, prioritized=False, priority_alpha=0.6, priority_eps=1e-3, rng=None):
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=TRANSITION_DTYPE)
+        self.position = 0  # Próxima posición a escribir
+        self.size = 0
+
+        self.prioritized = prioritized
+        self.priority_alpha = priority_alpha
+        self.priority_eps = priority_eps
+        self.priorities = np.zeros(capacity, dtype=np.float64) if prioritized else None
+        self.max_priority = 1.0
+
+        self.rng = None if rng is None else np.random.default_rng(rng)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done):
+        self.data[self.position] = (state, action, reward, next_state, done)
+        if self.prioritized:
+            self.priorities[self.position] = self.max_priority
+
+        self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        count = len(states)
+        indices = (self.position + np.arange(count)) % self.capacity
+        self.data['state'][indices] = states
+        self.data['action'][indices] = actions
+        self.data['reward'][indices] = rewards
+        self.data['next_state'][indices] = next_states
+        self.data['done'][indices] = dones
+        if self.prioritized:
+            self.priorities[indices] = self.max_priority
+
+        self.position = (self.position + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+
+    # Índices de las últimas `count` transiciones, de la más antigua a la más nueva
+    def last_indices(self, count):
+        count = min(count, self.size)
+        return (self.position - count + np.arange(count)) % self.capacity
+
+    # Muestra `batch_size` índices al azar (con reemplazo)
+    def sample_indices(self, batch_size):
+        if self.prioritized:
+            weights = self.priorities[:self.size]
+            if self.rng is None:
+                return np.random.choice(self.size, size=batch_size, p=weights / weights.sum())
+            return self.rng.choice(self.size, size=batch_size, p=weights / weights.sum())
+        if self.rng is None:
+            return np.random.randint(0, self.size, size=batch_size)
+        return self.rng.integers(0, self.size, size=batch_size)
+
+    def update_priorities(self, indices, td_errors):
+        if not self.prioritized:
+            return
+        priorities = (np.abs(td_errors) + self.priority_eps) ** self.priority_alpha
+        self.priorities[indices] = priorities
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+
+    # Aplica al agente las transiciones de los índices dados con NumpyQLearning.update_batch
+    def replay(self, agent, indices):
+        batch = self.data[indices]
+        td_errors = agent.update_batch(batch['state'], batch['action'], batch['reward'],
+                                       batch['next_state'], batch['done'])
+        self.update_priorities(indices, td_errors)
+        return td_errors
+
+    def __repr__(self):
+        return f"ReplayBuffer(size={self.size}/{self.capacity}, prioritized={self.prioritized})"
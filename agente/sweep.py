@@ -0,0 +1,310 @@
+"""
+Barrido de hiperparámetros del agente y del entorno en un pool de procesos.
+
+Uso:
+    python sweep.py [--search random] [--trials 64] [--episodes 200] [--max-steps 1000]
+                    [--workers N] [--output ../runs/barrido.csv] [--resume]
+"""
+import argparse
+import csv
+import itertools
+import math
+import multiprocessing
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from backend.interseccion import REWARD_WEIGHTS
+from train_agent import TrafficSimulator, TABLES, EPISODE_METRICS
+
+# Parámetros que se pueden barrer: del agente (QLearning) y del entorno (Intersection)
+AGENT_PARAMS = ('alpha', 'gamma', 'epsilon', 'epsilon_decay', 'epsilon_min')
+ENV_PARAMS = ('grid_size', 'min_state_duration') + REWARD_WEIGHTS._fields
+
+# Métricas de EPISODE_METRICS en que un valor mayor es mejor
+HIGHER_IS_BETTER = {'rewards': True, 'wait_times': False, 'throughput': True,
+                    'phase_changes': False, 'total_vehicles': False}
+
+# Espacios de búsqueda de la línea de comandos
+RANDOM_SPACE = {
+    'alpha': (0.02, 0.5, 'log'),
+    'gamma': (0.8, 0.99),
+    'epsilon_decay': [0.99, 0.995, 0.998],
+    'min_state_duration': (8, 30),
+}
+GRID_SPACE = {
+    'alpha': [0.05, 0.1, 0.2],
+    'gamma': [0.9, 0.95, 0.99],
+    'epsilon_decay': [0.99, 0.995],
+    'min_state_duration': [10, 15, 20],
+}
+
+# Puntajes de cada prueba en cada punto de control (ver Sweep), compartidos entre procesos
+_scores = None
+
+
+# Todas las combinaciones de los valores de cada parámetro ({nombre: [valores]})
+def grid_search(space):
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_search(space, num_trials, seed=0):
+    """
+    `num_trials` combinaciones al azar. Cada parámetro del espacio es una lista de valores
+    (se elige uno), un par (mínimo, máximo) uniforme (entero si ambos son enteros) o
+    (mínimo, máximo, 'log') log-uniforme.
+    """
+    rng = random.Random(seed)
+    trials = []
+    for _ in range(num_trials):
+        params = {}
+        for name, values in space.items():
+            if isinstance(values, list):
+                params[name] = rng.choice(values)
+            elif len(values) == 3 and values[2] == 'log':
+                params[name] = math.exp(rng.uniform(math.log(values[0]), math.log(values[1])))
+            elif isinstance(values[0], int) and isinstance(values[1], int):
+                params[name] = rng.randint(values[0], values[1])
+            else:
+                params[name] = rng.uniform(values[0], values[1])
+        trials.append(params)
+    return trials
+
+
+class Sweep:
+    """
+    Entrena una prueba (TrafficSimulator con train) por cada combinación de parámetros
+    de `trials` (diccionarios con nombres de AGENT_PARAMS y ENV_PARAMS; lo que falte
+    queda con su valor por defecto) y escribe una fila por prueba en la tabla CSV `path`.
+
+    Las pruebas se reparten en un ProcessPoolExecutor y cada una corre completa en un
+    worker. Todas usan la misma semilla, así que ven el mismo tráfico y sus diferencias
+    se deben a los parámetros. El puntaje es el promedio móvil de `metric` (una métrica
+    de EPISODE_METRICS) en los últimos `window` episodios.
+
+    Detención temprana: desde `min_episodes`, cada `report_every` episodios la prueba
+    publica su puntaje en una tabla compartida y se detiene si es peor que el cuantil
+    `quantile` de los puntajes que ya publicaron las otras pruebas en el mismo punto (se
+    necesitan al menos `min_trials`), así que cuáles pruebas se detienen depende del orden
+    en que avanzan: con un worker las pruebas corren en orden y cada una se compara sólo
+    con las anteriores; con varios depende de los tiempos. Con early_stopping=False el
+    resultado no depende de los workers. Los puntajes publicados quedan en la columna
+    `scores` de la tabla, y con resume=True se vuelven a cargar en la tabla compartida.
+    """
+
+    def __init__(self, trials, path, episodes=200, max_steps=1000, engine='python', table='dict', seed=0,
+                 fast_forward=False, demand=None, metric='rewards', window=20, early_stopping=True,
+                 min_episodes=50, report_every=10, quantile=0.25, min_trials=4):
+        for params in trials:
+            unknown = set(params) - set(AGENT_PARAMS) - set(ENV_PARAMS)
+            if unknown:
+                raise ValueError(f"Parámetros desconocidos: {sorted(unknown)}")
+            if metric == 'rewards' and set(params) & set(REWARD_WEIGHTS._fields):
+                raise ValueError("Con pesos de la recompensa distintos las recompensas no son comparables: "
+                                 "usar otra métrica (por ejemplo metric='wait_times')")
+        if metric not in HIGHER_IS_BETTER:
+            raise ValueError(f"Métrica desconocida: {metric!r}")
+
+        self.trials = list(trials)
+        self.path = path
+        self.metric = metric
+        self.settings = {
+            'episodes': episodes, 'max_steps': max_steps, 'engine': engine, 'table': table, 'seed': seed,
+            'fast_forward': fast_forward, 'demand': demand, 'metric': metric, 'window': window,
+            'early_stopping': early_stopping, 'min_episodes': min_episodes, 'report_every': report_every,
+            'quantile': quantile, 'min_trials': min_trials,
+            'milestones': len(range(min_episodes, episodes, report_every)), 'num_trials': len(self.trials)
+        }
+
+        # Columnas de la tabla: la prueba, sus parámetros, el promedio móvil de cada métrica
+        # y los puntajes publicados en los puntos de control (separados por espacios)
+        names = []
+        for params in self.trials:
+            names.extend(name for name in params if name not in names)
+        self.params = names
+        self.columns = ['trial', 'status', 'episodes', 'seconds'] + names + list(EPISODE_METRICS) + ['scores']
+
+    # Filas ya escritas en la tabla (para continuar un barrido con resume=True)
+    def completed_rows(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, newline='') as f:
+            reader = csv.DictReader(f)
+            if reader.fieldnames != self.columns:
+                raise ValueError(f"Las columnas de {self.path} no coinciden con el barrido")
+            return list(reader)
+
+    def run(self, max_workers=None, resume=False, verbose=True):
+        """
+        Corre las pruebas en `max_workers` procesos (por defecto os.cpu_count(); con 1 corre
+        en este proceso) y retorna las filas de la tabla, de la mejor a la peor.
+        Con resume=True se saltan las pruebas que ya están en la tabla y sus puntajes
+        vuelven a la tabla compartida, para que las que faltan se comparen con ellos.
+        """
+        global _scores
+        done = self.completed_rows() if resume else []
+        skip = {int(row['trial']) for row in done}
+        pending = [(index, params, self.settings) for index, params in enumerate(self.trials) if index not in skip]
+
+        settings = self.settings
+        context = multiprocessing.get_context()
+        scores = context.Array('d', max(1, settings['num_trials'] * settings['milestones']))
+        table = np.frombuffer(scores.get_obj())
+        table[:] = np.nan
+        for row in done:
+            published = [float(value) for value in row['scores'].split()]
+            start = int(row['trial']) * settings['milestones']
+            table[start:start + len(published)] = published
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        rows = [self.parse_row(row) for row in done]
+        max_workers = max_workers or os.cpu_count() or 1
+        with open(self.path, 'a' if done else 'w', newline='') as f:
+            writer = csv.DictWriter(f, self.columns)
+            if not done:
+                writer.writeheader()
+
+            # Cada fila queda en disco apenas termina su prueba
+            def record(row):
+                writer.writerow(row)
+                f.flush()
+                rows.append(row)
+                if verbose:
+                    print(f"Prueba {row['trial']} ({len(rows)}/{len(self.trials)}): {row['status']} "
+                          f"en {row['episodes']} episodios, {self.metric} = {row[self.metric]:.2f} "
+                          f"({row['seconds']:.1f} s)")
+
+            if max_workers == 1:
+                _scores = scores
+                for task in pending:
+                    record(run_trial(task))
+            else:
+                with ProcessPoolExecutor(max_workers, mp_context=context, initializer=_init_worker,
+                                         initargs=(scores,)) as executor:
+                    for future in as_completed([executor.submit(run_trial, task) for task in pending]):
+                        record(future.result())
+        return self.ranked(rows)
+
+    # Fila leída del CSV con sus tipos
+    def parse_row(self, row):
+        parsed = {}
+        for column, value in row.items():
+            if column in ('status', 'scores'):
+                parsed[column] = value
+            elif column in ('trial', 'episodes'):
+                parsed[column] = int(value)
+            elif value != '':
+                parsed[column] = float(value)
+        return parsed
+
+    # Filas de la mejor a la peor según la métrica
+    def ranked(self, rows):
+        sign = -1 if HIGHER_IS_BETTER[self.metric] else 1
+        return sorted(rows, key=lambda row: sign * row[self.metric])
+
+    # Tabla de texto con las `top` mejores filas
+    def format_results(self, rows, top=10):
+        params = self.params
+        lines = [" ".join([f"{'prueba':>6}", f"{'estado':>10}", f"{'episodios':>9}"] +
+                          [f"{name:>18}" for name in params] + [f"{name:>14}" for name in EPISODE_METRICS])]
+        for row in rows[:top]:
+            values = [f"{row[name]:>18.4g}" if name in row else f"{'-':>18}" for name in params]
+            lines.append(" ".join([f"{row['trial']:>6}", f"{row['status']:>10}", f"{row['episodes']:>9}"] + values +
+                                  [f"{row[name]:>14.2f}" for name in EPISODE_METRICS]))
+        return "\n".join(lines)
+
+
+def _init_worker(scores):
+    global _scores
+    _scores = scores
+
+
+# Punto de control que se alcanza tras `episode` episodios (None si no es uno)
+def _milestone(episode, settings):
+    if not settings['early_stopping'] or episode < settings['min_episodes']:
+        return None
+    milestone, offset = divmod(episode - settings['min_episodes'], settings['report_every'])
+    if offset or milestone >= settings['milestones']:
+        return None
+    return milestone
+
+
+# Publica el puntaje de la prueba en el punto de control y retorna si se debe detener
+def _should_stop(index, milestone, score, settings):
+    table = np.frombuffer(_scores.get_obj()).reshape(settings['num_trials'], settings['milestones'])
+    table[index, milestone] = score
+    others = np.delete(table[:, milestone], index)
+    others = others[~np.isnan(others)]
+    return len(others) >= settings['min_trials'] and score < np.quantile(others, settings['quantile'])
+
+
+def run_trial(task):
+    # Entrena una prueba y retorna su fila de la tabla de resultados
+    index, params, settings = task
+    start = time.perf_counter()
+
+    simulator = TrafficSimulator(grid_size=int(params.get('grid_size', 40)), engine=settings['engine'],
+                                 table=settings['table'], seed=settings['seed'])
+    simulator.agent = TABLES[settings['table']](rng=simulator.agent_rng,
+                                                **{name: params[name] for name in AGENT_PARAMS if name in params})
+    simulator.set_demand(settings['demand'])
+    weights = {name: params[name] for name in REWARD_WEIGHTS._fields if name in params}
+    simulator.set_env_params(params.get('min_state_duration'), weights or None)
+
+    # Promedio móvil de cada métrica; el puntaje usa el signo en que mayor es mejor
+    recent = {name: deque(maxlen=settings['window']) for name in EPISODE_METRICS}
+    sign = 1 if HIGHER_IS_BETTER[settings['metric']] else -1
+    status = 'completado'
+    published = []
+    episode = 0
+    while episode < settings['episodes']:
+        result = simulator.run_episode(settings['max_steps'], settings['fast_forward'])
+        episode += 1
+        for name, value in zip(EPISODE_METRICS, result):
+            recent[name].append(value)
+        milestone = _milestone(episode, settings)
+        if milestone is None:
+            continue
+        score = sign * np.mean(recent[settings['metric']])
+        published.append(repr(float(score)))
+        if _should_stop(index, milestone, score, settings):
+            status = 'detenido'
+            break
+
+    row = {'trial': index, 'status': status, 'episodes': episode,
+           'seconds': round(time.perf_counter() - start, 3)}
+    row.update(params)
+    row.update({name: float(np.mean(values)) for name, values in recent.items()})
+    row['scores'] = ' '.join(published)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Barrido de hiperparámetros")
+    parser.add_argument('--search', choices=('random', 'grid'), default='random')
+    parser.add_argument('--trials', type=int, default=64, help="pruebas de la búsqueda al azar")
+    parser.add_argument('--episodes', type=int, default=200)
+    parser.add_argument('--max-steps', type=int, default=1000)
+    parser.add_argument('--workers', type=int, help="procesos (por defecto uno por núcleo)")
+    parser.add_argument('--engine', default='python')
+    parser.add_argument('--metric', default='rewards', choices=sorted(HIGHER_IS_BETTER))
+    parser.add_argument('--no-early-stopping', action='store_true')
+    parser.add_argument('--output', default='../runs/barrido.csv')
+    parser.add_argument('--resume', action='store_true', help="continuar la tabla de --output")
+    args = parser.parse_args()
+
+    trials = random_search(RANDOM_SPACE, args.trials) if args.search == 'random' else grid_search(GRID_SPACE)
+    sweep = Sweep(trials, args.output, episodes=args.episodes, max_steps=args.max_steps, engine=args.engine,
+                  metric=args.metric, early_stopping=not args.no_early_stopping)
+    rows = sweep.run(args.workers, resume=args.resume)
+    print()
+    print(sweep.format_results(rows))
+
+
+if __name__ == "__main__":
+    main()
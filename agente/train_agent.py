@@ -1,193 +1,820 @@
+import multiprocessing
+import os
+import random
+from collections import deque
 import numpy as np
 import matplotlib.pyplot as plt
-from backend.interseccion import Intersection
+from backend.horario import Horario, SECONDS_PER_DAY
+from backend.interseccion import Intersection, REWARD_WEIGHTS
+from backend.interseccion_numpy import NumpyIntersection
+from backend.interseccion_eventos import EventIntersection
+from backend.interseccion_vector import VectorIntersection
+from backend.profiler import Profiler
+from backend.trace import TraceRecorder
 from q_learning import QLearning
+from policies import FixedCyclePolicy
+from q_learning_numpy import NumpyQLearning, encode_states
+from replay_buffer import ReplayBuffer
+from metrics_log import MetricsWriter, MetricsLog
+from checkpoint import CheckpointManager, q_table_arrays, restore_q_table, latest_checkpoint, load_checkpoint
+from evaluation import EVALUATION_METRICS, evaluate_policies, baseline_policies, format_report, run_policy_episode
+
+
+# Motores de simulación disponibles para el entorno
+ENGINES = {
+    'python': Intersection,
+    'numpy': NumpyIntersection,
+    'events': EventIntersection
+}
+
+# Implementaciones de la tabla Q
+TABLES = {
+    'dict': QLearning,
+    'numpy': NumpyQLearning
+}
+
+# Métricas registradas por episodio de entrenamiento
+EPISODE_METRICS = ('rewards', 'wait_times', 'throughput', 'phase_changes', 'total_vehicles')
+
+# Columnas del registro en disco (ver enable_metrics_log): una fila por episodio y, opcionalmente, por step
+METRICS_TABLES = {
+    'episodes': tuple((key, np.float64) for key in EPISODE_METRICS),
+    'steps': (('episode', np.int64), ('step', np.int32), ('waiting', np.int32),
+              ('vehicles', np.int32), ('moved', np.int32), ('reward', np.float64))
+}
+
+# Episodios recientes que promedia print_progress
+PROGRESS_WINDOW = 10
+
+# Por defecto enable_trace graba uno de cada tantos episodios
+TRACE_EVERY = 10
 
 
 class TrafficSimulator:
     # Simulador para entrenar y evaluar el agente Q-Learning.
 
-    def __init__(self, grid_size=40):
+    # Métodos cronometrados al activar la instrumentación (ver enable_profiling)
+    PROFILED_METHODS = ('learn_from_replay',)
+
+    def __init__(self, grid_size=40, engine='python', table='dict', seed=None):
         self.grid_size = grid_size
-        self.agent = QLearning(
+        self.engine_name = engine
+        self.engine = ENGINES[engine]
+        self.table_name = table
+
+        # Con semilla (entero o lista de enteros), el entorno, el agente y la memoria usan generadores
+        # independientes derivados de ella; sin semilla, los módulos random y np.random globales
+        self.seed = seed
+        if seed is None:
+            self.env_rng = self.agent_rng = self.replay_rng = None
+        else:
+            self.env_rng, self.agent_rng, self.replay_rng = [
+                np.random.default_rng(child) for child in np.random.SeedSequence(seed).spawn(3)]
+
+        self.agent = TABLES[table](
             alpha=0.1,
             gamma=0.95,
             epsilon=1.0,
             epsilon_decay=0.995,
-            epsilon_min=0.01
+            epsilon_min=0.01,
+            rng=self.agent_rng
         )
 
-    def reset_environment(self):
-        # Reinicia el entorno para un nuevo episodio.
-        env = Intersection(grid_size=self.grid_size)
-        return env
+        # Memoria de experiencia (desactivada por defecto, ver enable_replay)
+        self.replay = None
+        self.replay_batch_size = 256
+        self.replay_samples = 0
+
+        # Instrumentación (desactivada por defecto, ver enable_profiling)
+        self.profiler = None
+
+        # Registro de métricas en disco (desactivado por defecto, ver enable_metrics_log)
+        self.metrics_writer = None
+        self.step_metrics = False
+
+        # Checkpoints (desactivados por defecto: se guarda sólo el pickle, ver enable_checkpoints)
+        self.checkpoints = None
+
+        # Traza de los episodios (desactivada por defecto, ver enable_trace)
+        self.trace = None
+        self.trace_every = TRACE_EVERY
+
+        # Perfil de demanda y parámetros de los entornos (por defecto los de Intersection,
+        # ver set_demand y set_env_params)
+        self.schedule = None
+        self.env_params = {}
+
+        # Fotos precalentadas desde las que parten los episodios (vacío: calle vacía a las 7:00,
+        # ver enable_warm_starts)
+        self.warm_states = []
+
+        # Entorno de los episodios de train, reutilizado entre episodios (ver reset_environment);
+        # None lo vuelve a crear, por ejemplo al cambiar la demanda o los parámetros
+        self.env = None
+
+    def set_demand(self, demand):
+        """
+        Usa un perfil de demanda en los entornos de los episodios siguientes: un Horario
+        o la ruta de un CSV con autos por hora y dirección (ver Horario.from_csv).
+        Con None se vuelve al horario por defecto de SpawnVehicle.
+        """
+        self.schedule = Horario.from_csv(demand) if isinstance(demand, (str, os.PathLike)) else demand
+        self.env = None
+        return self.schedule
+
+    def set_env_params(self, min_state_duration=None, reward_weights=None):
+        """
+        Parámetros de los entornos de los episodios siguientes; None deja el valor por
+        defecto. min_state_duration: steps mínimos por fase del semáforo. reward_weights:
+        RewardWeights o un diccionario con algunos de sus campos (ver Intersection.step_reward).
+        """
+        self.env_params = {}
+        self.env = None
+        if min_state_duration is not None:
+            self.env_params['min_state_duration'] = float(min_state_duration)
+        if reward_weights is not None:
+            if isinstance(reward_weights, dict):
+                reward_weights = REWARD_WEIGHTS._replace(**reward_weights)
+            self.env_params['reward_weights'] = reward_weights
+
+    # Aplica el perfil de demanda y los parámetros de set_env_params a un entorno nuevo
+    def configure_environment(self, env):
+        return env.configure(self.schedule, **self.env_params)
+
+    def enable_warm_starts(self, num_states=32, warmup_steps=1800, hours=range(24)):
+        """
+        Parte cada episodio desde una foto del entorno con tráfico ya formado, en vez de la
+        calle vacía a las 7:00 (ver Intersection.snapshot). Arma `num_states` fotos: cada
+        una corre `warmup_steps` steps con un ciclo fijo de 30 steps hasta llegar a una hora
+        al azar de `hours` y pone las métricas en cero. Cada episodio restaura una foto al
+        azar sin sus sorteos, así que dos episodios desde la misma foto tienen tráfico
+        distinto. Se arman con el perfil de demanda y los parámetros actuales; train_vectorized
+        no las usa. Con num_states=0 se desactivan. Retorna las fotos.
+        """
+        pick = np.random.randint if self.env_rng is None else self.env_rng.integers
+        self.warm_states = []
+        for _ in range(num_states):
+            env = self.configure_environment(self.engine(grid_size=self.grid_size, rng=self.env_rng))
+            second = hours[int(pick(0, len(hours)))] * 3600 + int(pick(0, 3600))
+            env.time_of_day = (second - warmup_steps) % SECONDS_PER_DAY
+            run_policy_episode(env, FixedCyclePolicy(30), warmup_steps)
+            env.reset_metrics()
+            self.warm_states.append(env.snapshot())
+        return self.warm_states
+
+    def enable_replay(self, capacity=100000, batch_size=256, samples=1, prioritized=False):
+        """
+        Aprende desde una memoria de experiencia en vez de una actualización por step.
+
+        Las transiciones se guardan en un ReplayBuffer y cada `batch_size` steps se
+        aplican juntas con update_batch, seguidas de `samples` lotes muestreados de
+        toda la memoria para reutilizar experiencia. Requiere la tabla 'numpy'.
+        """
+        if not isinstance(self.agent, NumpyQLearning):
+            raise ValueError("La memoria de experiencia requiere table='numpy'")
+        self.replay = ReplayBuffer(capacity, prioritized=prioritized, rng=self.replay_rng)
+        self.replay_batch_size = batch_size
+        self.replay_samples = samples
+
+    def enable_profiling(self, path=None):
+        """
+        Activa la instrumentación: tiempo y llamadas de los métodos de Intersection,
+        del agente y del simulador, más contadores (autos vivos, spawns bloqueados,
+        cambios de fase rechazados, autos que salieron) resumidos por episodio.
+
+        Los resúmenes quedan en self.profiler.episodes y, si se da `path`, se agregan
+        a ese archivo JSON lines para comparar corridas (ver Profiler.load).
+        Sólo aplica a los episodios que corren en este proceso (no a train_parallel).
+        """
+        self.profiler = Profiler(path)
+        self.env = None
+        self.profiler.instrument(self.agent, prefix='agent')
+        self.profiler.instrument(self, prefix='simulator')
+        return self.profiler
+
+    def enable_metrics_log(self, path, step_metrics=False, resume=False, chunk_size=4096):
+        """
+        Escribe las métricas de entrenamiento en el directorio `path` (ver MetricsWriter)
+        en vez de acumularlas en listas: una fila por episodio y, con step_metrics, una
+        fila por step (espera, vehículos, autos movidos y recompensa). Cada episodio
+        queda en disco al terminar, así que el entrenamiento se puede seguir con
+        MetricsLog(path) mientras corre. Con resume=True se continúa un registro
+        existente; se descartan los steps de un episodio que no alcanzó a terminar.
+
+        Con el registro activo, train, train_vectorized y train_parallel retornan un
+        MetricsLog. En train_parallel sólo se registran las filas por episodio.
+        """
+        self.close_metrics_log()
+        self.metrics_writer = MetricsWriter(path, METRICS_TABLES, chunk_size=chunk_size, resume=resume)
+        self.step_metrics = step_metrics
+        self.trim_metrics_log(self.metrics_writer.rows('episodes'))
+        return self.metrics_writer
+
+    # Deja en el registro sólo los primeros `episodes` episodios y sus steps
+    def trim_metrics_log(self, episodes):
+        writer = self.metrics_writer
+        writer.flush()
+        writer.truncate('episodes', episodes)
+        steps = MetricsLog(writer.path).table('steps')['episode']
+        if len(steps) and steps[-1] >= episodes:
+            writer.truncate('steps', int(np.searchsorted(steps >= episodes, True)))
+
+    def close_metrics_log(self):
+        if self.metrics_writer is not None:
+            self.metrics_writer.close()
+            self.metrics_writer = None
+
+    # Contenedor de métricas para un entrenamiento: listas completas o, con registro en disco,
+    # sólo los últimos episodios que usa print_progress
+    def new_metrics(self):
+        if self.metrics_writer is None:
+            return {key: [] for key in EPISODE_METRICS}
+        return {key: deque(maxlen=PROGRESS_WINDOW) for key in EPISODE_METRICS}
+
+    def record_episode(self, metrics, result):
+        for key, value in zip(EPISODE_METRICS, result):
+            metrics[key].append(value)
+        if self.metrics_writer is not None:
+            self.metrics_writer.append('episodes', result)
+            self.metrics_writer.flush()
+
+    def enable_checkpoints(self, directory='models/checkpoints', keep=3, background=True):
+        """
+        Reemplaza el pickle periódico de train por checkpoints en `directory` (ver
+        CheckpointManager): tabla Q, epsilon y contadores del agente, estado de los
+        generadores (o de random y np.random sin semilla), memoria de experiencia y
+        métricas de los episodios. Se escriben en un hilo aparte y de forma atómica.
+        Con train(..., resume_from=directory) el entrenamiento continúa exactamente
+        desde el último checkpoint. Al final del entrenamiento también se guarda el pickle.
+        """
+        self.checkpoints = CheckpointManager(directory, keep=keep, background=background)
+        return self.checkpoints
+
+    # Copia del estado del entrenamiento tras `episode` episodios: (arreglos, estado JSON)
+    def checkpoint_state(self, episode, metrics):
+        values, visited = q_table_arrays(self.agent)
+        arrays = {'q_values': values, 'q_visited': visited}
+        state = {
+            'episode': episode,
+            'grid_size': self.grid_size,
+            'engine': self.engine_name,
+            'table': self.table_name,
+            'seed': self.seed,
+            'agent': {key: getattr(self.agent, key) for key in
+                      ('alpha', 'gamma', 'epsilon', 'epsilon_decay', 'epsilon_min', 'total_steps', 'episodes_completed')},
+            'rng': {name: generator.bit_generator.state for name, generator in
+                    (('env', self.env_rng), ('agent', self.agent_rng), ('replay', self.replay_rng))
+                    if generator is not None}
+        }
 
-    def train(self, num_episodes=500, max_steps_per_episode=86400, save_interval=50, verbose=True):
+        # Sin semilla se usan los módulos random y np.random globales
+        if self.seed is None:
+            version, keys, gauss = random.getstate()
+            arrays['random_state'] = np.array(keys, dtype=np.uint32)
+            state['random'] = {'version': version, 'gauss': gauss}
+            _, np_keys, position, has_gauss, cached_gaussian = np.random.get_state()
+            arrays['np_random_state'] = np_keys
+            state['np_random'] = {'position': position, 'has_gauss': has_gauss, 'cached_gaussian': cached_gaussian}
+
+        if self.replay is not None:
+            arrays['replay_data'] = self.replay.data.copy()
+            if self.replay.prioritized:
+                arrays['replay_priorities'] = self.replay.priorities.copy()
+            state['replay'] = {'capacity': self.replay.capacity, 'prioritized': self.replay.prioritized,
+                               'position': self.replay.position, 'size': self.replay.size,
+                               'max_priority': self.replay.max_priority,
+                               'batch_size': self.replay_batch_size, 'samples': self.replay_samples}
+
+        if self.metrics_writer is not None:
+            self.metrics_writer.flush()
+            state['metrics_rows'] = self.metrics_writer.rows('episodes')
+        else:
+            for key in EPISODE_METRICS:
+                arrays[f"metrics_{key}"] = np.array(metrics[key])
+        return arrays, state
+
+    def restore_checkpoint(self, path):
+        """
+        Restaura el estado de un checkpoint (archivo o directorio de enable_checkpoints, del
+        que se toma el más reciente). Retorna (episodios completados, métricas).
+        """
+        checkpoint = latest_checkpoint(path)
+        if checkpoint is None:
+            raise FileNotFoundError(f"No hay checkpoints en {path}")
+        arrays, state = load_checkpoint(checkpoint)
+
+        for key, value in (('grid_size', self.grid_size), ('engine', self.engine_name), ('table', self.table_name)):
+            if state[key] != value:
+                raise ValueError(f"El checkpoint usa {key}={state[key]!r}, el simulador {value!r}")
+        if (state['seed'] is None) != (self.seed is None):
+            raise ValueError("El checkpoint y el simulador deben usar ambos semilla o ambos generadores globales")
+
+        for key, value in state['agent'].items():
+            setattr(self.agent, key, value)
+        restore_q_table(self.agent, arrays['q_values'], arrays['q_visited'])
+
+        for name, generator_state in state['rng'].items():
+            getattr(self, f"{name}_rng").bit_generator.state = generator_state
+        if 'random' in state:
+            random.setstate((state['random']['version'], tuple(arrays['random_state'].tolist()),
+                             state['random']['gauss']))
+            np_random = state['np_random']
+            np.random.set_state(('MT19937', arrays['np_random_state'], np_random['position'],
+                                 np_random['has_gauss'], np_random['cached_gaussian']))
+
+        if 'replay' in state:
+            replay = state['replay']
+            self.enable_replay(replay['capacity'], replay['batch_size'], replay['samples'], replay['prioritized'])
+            self.replay.data[:] = arrays['replay_data']
+            if replay['prioritized']:
+                self.replay.priorities[:] = arrays['replay_priorities']
+            self.replay.position = replay['position']
+            self.replay.size = replay['size']
+            self.replay.max_priority = replay['max_priority']
+
+        metrics = self.new_metrics()
+        if self.metrics_writer is not None and 'metrics_rows' in state:
+            self.trim_metrics_log(state['metrics_rows'])
+            log = MetricsLog(self.metrics_writer.path)
+            for key in EPISODE_METRICS:
+                metrics[key].extend(log[key][-PROGRESS_WINDOW:].tolist())
+        elif 'metrics_rewards' in arrays:
+            for key in EPISODE_METRICS:
+                metrics[key].extend(arrays[f"metrics_{key}"].tolist())
+        return state['episode'], metrics
+
+    # Guardado periódico: checkpoint en segundo plano si están activos, si no el pickle del agente
+    def save_progress(self, episode, metrics, final=False):
+        if self.checkpoints is not None:
+            self.checkpoints.save(episode, *self.checkpoint_state(episode, metrics))
+            if not final:
+                return
+            self.checkpoints.wait()
+        self.agent.save()
 
-        # Entrena el agente durante múltiples episodios.
+    def finish_metrics(self, metrics):
+        if self.metrics_writer is None:
+            return metrics
+        self.metrics_writer.flush()
+        return MetricsLog(self.metrics_writer.path)
+
+    def enable_trace(self, path, every=TRACE_EVERY, chunk_size=1024):
+        """
+        Graba los episodios de train en una traza (ver backend/trace.py): vehículos, semáforo
+        y hora de cada step, para verlos después con frontend/main.py --replay o exportarlos
+        a PNG sin volver a simular. Se graba uno de cada `every` episodios: un episodio
+        grabado tarda entre 5% y 16% más (ver benchmarks/bench_trace.py).
+        Sólo aplica a los episodios que corren en este proceso (no a train_parallel ni
+        train_vectorized). Con fast_forward los tramos saltados no quedan en la traza.
+        """
+        self.close_trace()
+        self.trace = TraceRecorder(path, self.grid_size, chunk_size,
+                                   metadata={'engine': self.engine_name, 'seed': self.seed})
+        self.trace_every = every
+        return self.trace
+
+    def close_trace(self):
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+
+    # Aprende de las últimas `pending` transiciones y de lotes muestreados de la memoria
+    def learn_from_replay(self, pending):
+        if pending:
+            self.replay.replay(self.agent, self.replay.last_indices(pending))
+        for _ in range(self.replay_samples):
+            self.replay.replay(self.agent, self.replay.sample_indices(self.replay_batch_size))
+
+    # Aprende de una transición: con update o, con memoria de experiencia, guardándola y aplicando
+    # las `pending` transiciones guardadas por lotes. Retorna las que quedan sin aplicar
+    def learn(self, state, action, reward, next_state, done, pending):
+        if self.replay is None:
+            self.agent.update(state, action, reward, next_state, done)
+            return pending
+        self.replay.add(state, action, reward, next_state, done)
+        pending += 1
+        if pending == self.replay_batch_size or done:
+            self.learn_from_replay(pending)
+            pending = 0
+        return pending
 
-        episode_rewards = []
-        episode_wait_times = []
-        episode_throughput = []
-        episode_phase_changes = []
-        episode_total_vehicles = []
+    def reset_environment(self):
+        # Reinicia el entorno para un nuevo episodio. El entorno se crea (e instrumenta) en el
+        # primer episodio y después se reutiliza con reset: calle vacía o una foto precalentada
+        if self.env is None:
+            self.env = self.configure_environment(self.engine(grid_size=self.grid_size, rng=self.env_rng))
+            if self.profiler is not None:
+                self.profiler.instrument(self.env, prefix='env')
+        elif self.trace is not None:
+            self.trace.release(self.env)
+        snapshot = None
+        if self.warm_states:
+            pick = np.random.randint if self.env_rng is None else self.env_rng.integers
+            snapshot = self.warm_states[int(pick(0, len(self.warm_states)))]
+        self.env.reset(snapshot)
+        return self.env
+
+    def run_episode(self, max_steps, fast_forward=False, trace_episode=None):
+        # Corre un episodio de entrenamiento y retorna sus métricas (en el orden de EPISODE_METRICS).
+        # Con fast_forward el entorno salta en bloque los tramos en que el semáforo no puede cambiar
+        # (ver Intersection.skip_ahead_limit); el agente igual decide y aprende en cada step del
+        # tramo, así que el resultado es el mismo que sin fast_forward.
+        # trace_episode: número del episodio en la traza (ver enable_trace)
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start_episode()
+
+        env = self.reset_environment()
+        # El estado se pasa al agente ya convertido a la clave de su tabla (ver QLearning.state_key)
+        state_key = self.agent.state_key
+        state = state_key(env.get_state())
+
+        # Traza del episodio: el estado inicial es el step 0 (ver enable_trace)
+        trace = None
+        if self.trace is not None and trace_episode is not None and trace_episode % self.trace_every == 0:
+            trace = self.trace
+            trace.new_episode(trace_episode)
+            trace.record(env, 0)
+
+        # Registro por step en disco (ver enable_metrics_log)
+        step_log = self.metrics_writer if self.step_metrics else None
+        if step_log is not None:
+            episode = step_log.rows('episodes')
+
+        total_reward = 0
+        total_wait_time = 0
+        total_moved = 0
+        total_vehicles_sum = 0
+        pending = 0
+
+        step = 0
+        while step < max_steps:
+            if fast_forward:
+                # El último step siempre se corre normal para cerrar el episodio
+                steps = min(env.skip_ahead_limit(phase_locked=True), max_steps - 1 - step)
+                if steps > 1:
+                    # En el salto no cambian los autos esperando ni la cantidad de autos, sólo la
+                    # categoría de tiempo del estado, y el semáforo rechaza cualquier cambio de fase
+                    waiting = env.get_waiting_vehicles_count()
+                    vehicles = env.get_vehicle_count()
+                    next_states = list(map(state_key, env.skip_states(steps)))
+                    refused = 0
+                    for offset, moved in enumerate(env.skip_ahead(steps)):
+                        action = self.agent.get_action(state, training=True)
+                        refused += action
+                        reward = env.step_reward(action, moved, waiting)
+                        next_state = next_states[offset]
+                        pending = self.learn(state, action, reward, next_state, False, pending)
+                        state = next_state
+                        total_moved += moved
+                        total_reward += reward
+                        if step_log is not None:
+                            step_log.append('steps', (episode, step + offset, waiting, vehicles, moved, reward))
+                    env.refuse_phase_changes(refused)
+                    total_wait_time += waiting * steps
+                    total_vehicles_sum += vehicles * steps
+                    if profiler is not None:
+                        profiler.sample('vehicles_alive', vehicles, steps)
+                        profiler.count('skipped_steps', steps)
+
+                    step += steps
+                    if trace is not None:
+                        # Los autos avanzaron varias casillas: la traza sigue desde un keyframe
+                        trace.record(env, step, keyframe=True)
+                    continue
+
+            # Seleccionar acción
+            action = self.agent.get_action(state, training=True)
+
+            # Aplicar acción
+            env.apply_action(action)
+
+            # Avanzar entorno
+            moved = env.step()
+            total_moved += moved
+            if trace is not None:
+                trace.record(env, step + 1)
+
+            # Obtener nuevo estado y recompensa
+            next_state = state_key(env.get_state())
+            reward = env.calculate_reward(action, moved)
+
+            # Actualizar agente
+            pending = self.learn(state, action, reward, next_state, step == max_steps - 1, pending)
+
+            # Acumular métricas
+            total_reward += reward
+            waiting = env.get_waiting_vehicles_count()
+            total_wait_time += waiting
+            vehicles = env.get_vehicle_count()
+            total_vehicles_sum += vehicles
+            if profiler is not None:
+                profiler.sample('vehicles_alive', vehicles)
+            if step_log is not None:
+                step_log.append('steps', (episode, step, waiting, vehicles, moved, reward))
+
+            state = next_state
+            step += 1
+
+        # Reducir epsilon
+        self.agent.decay_epsilon()
+
+        if profiler is not None:
+            profiler.end_episode(steps=max_steps,
+                                 phase_changes=env.phase_changes,
+                                 refused_phase_changes=env.refused_phase_changes,
+                                 blocked_spawns=env.blocked_spawns,
+                                 exited_vehicles=env.exited_vehicles)
+
+        avg_wait_time = total_wait_time / max_steps
+        avg_throughput = total_moved / max_steps
+        avg_vehicles = total_vehicles_sum / max_steps
+        return total_reward, avg_wait_time, avg_throughput, env.phase_changes, avg_vehicles
+
+    def run_vector_episode(self, num_envs, max_steps):
+        """
+        Corre un episodio en `num_envs` intersecciones a la vez (VectorIntersection) y
+        retorna las métricas de cada una (tuplas en el orden de EPISODE_METRICS).
+
+        En cada step el agente elige las acciones de todo el lote con get_actions y
+        aprende de sus transiciones con update_batch (o la memoria de experiencia).
+        Epsilon se mantiene durante el episodio y se reduce una vez por intersección
+        al final. Requiere la tabla 'numpy'.
+        """
+        if not isinstance(self.agent, NumpyQLearning):
+            raise ValueError("El entorno vectorizado requiere table='numpy'")
+
+        profiler = self.profiler
+        env = self.configure_environment(VectorIntersection(num_envs, self.grid_size, rng=self.env_rng))
+        if profiler is not None:
+            profiler.start_episode()
+            profiler.instrument(env, prefix='env')
+
+        # Registro por step en disco: cada intersección del lote es un episodio
+        step_log = self.metrics_writer if self.step_metrics else None
+        if step_log is not None:
+            episodes = step_log.rows('episodes') + np.arange(num_envs)
+
+        states = encode_states(env.get_state())
+        total_reward = np.zeros(num_envs)
+        total_wait_time = np.zeros(num_envs)
+        total_moved = np.zeros(num_envs)
+        total_vehicles_sum = np.zeros(num_envs)
+        dones = np.zeros(num_envs, dtype=bool)
+
+        for step in range(max_steps):
+            actions = self.agent.get_actions(states, training=True)
+            moved = env.step(actions)
+            next_states = encode_states(env.get_state())
+            rewards = env.calculate_reward(actions, moved)
+
+            dones[:] = (step == max_steps - 1)
+            if self.replay is None:
+                self.agent.update_batch(states, actions, rewards, next_states, dones)
+            else:
+                self.replay.add_batch(states, actions, rewards, next_states, dones)
+                self.learn_from_replay(num_envs)
+
+            total_reward += rewards
+            waiting = env.get_waiting_vehicles_count()
+            total_wait_time += waiting
+            total_moved += moved
+            vehicles = env.get_vehicle_count()
+            total_vehicles_sum += vehicles
+            if profiler is not None:
+                profiler.sample('vehicles_alive', int(vehicles.max()))
+            if step_log is not None:
+                step_log.extend('steps', {'episode': episodes, 'step': np.full(num_envs, step),
+                                          'waiting': waiting, 'vehicles': vehicles,
+                                          'moved': moved, 'reward': rewards})
+            states = next_states
+
+        for _ in range(num_envs):
+            self.agent.decay_epsilon()
 
-        for episode in range(num_episodes):
-            env = self.reset_environment()
-            state = env.get_state()
+        if profiler is not None:
+            profiler.end_episode(steps=max_steps * num_envs,
+                                 phase_changes=int(env.phase_changes.sum()),
+                                 refused_phase_changes=int(env.refused_phase_changes.sum()),
+                                 blocked_spawns=int(env.blocked_spawns.sum()),
+                                 exited_vehicles=int(env.exited_vehicles.sum()))
+
+        return list(zip(total_reward.tolist(), (total_wait_time / max_steps).tolist(),
+                        (total_moved / max_steps).tolist(), env.phase_changes.tolist(),
+                        (total_vehicles_sum / max_steps).tolist()))
+
+    def print_progress(self, metrics, episode, num_episodes):
+        recent_rewards = np.mean(list(metrics['rewards'])[-PROGRESS_WINDOW:])
+        recent_wait = np.mean(list(metrics['wait_times'])[-PROGRESS_WINDOW:])
+        recent_throughput = np.mean(list(metrics['throughput'])[-PROGRESS_WINDOW:])
+        recent_changes = np.mean(list(metrics['phase_changes'])[-PROGRESS_WINDOW:])
+
+        print(f"Episodio {episode}/{num_episodes} | "
+              f"Reward: {recent_rewards:.2f} | "
+              f"Espera: {recent_wait:.2f} | "
+              f"Throughput: {recent_throughput:.2f} | "
+              f"Cambios: {recent_changes:.1f} | "
+              f"ε: {self.agent.epsilon:.3f}")
+
+    def train(self, num_episodes=500, max_steps_per_episode=86400, save_interval=50, verbose=True,
+              fast_forward=False, resume_from=None):
 
-            total_reward = 0
-            total_wait_time = 0
-            total_moved = 0
-            total_vehicles_sum = 0
+        # Entrena el agente durante múltiples episodios.
+        # Con resume_from (checkpoint o directorio, ver enable_checkpoints) continúa desde ese
+        # checkpoint hasta completar `num_episodes` episodios en total.
 
-            for step in range(max_steps_per_episode):
-                # Seleccionar acción
-                action = self.agent.get_action(state, training=True)
+        metrics = self.new_metrics()
+        start_episode = 0
+        if resume_from is not None:
+            start_episode, metrics = self.restore_checkpoint(resume_from)
 
-                # Aplicar acción
-                env.apply_action(action)
+        for episode in range(start_episode, num_episodes):
+            result = self.run_episode(max_steps_per_episode, fast_forward, trace_episode=episode)
 
-                # Avanzar entorno
-                moved = env.step()
-                total_moved += moved
+            # Guardar métricas
+            self.record_episode(metrics, result)
 
-                # Obtener nuevo estado y recompensa
-                next_state = env.get_state()
-                reward = env.calculate_reward(action, moved)
+            # Mostrar progreso con más info
+            if verbose and (episode + 1) % 10 == 0:
+                self.print_progress(metrics, episode + 1, num_episodes)
+                if self.profiler is not None:
+                    print(Profiler.format_summary(self.profiler.episodes[-1]))
 
-                # Actualizar agente
-                done = (step == max_steps_per_episode - 1)
-                self.agent.update(state, action, reward, next_state, done)
+            # Guardar modelo periódicamente
+            if (episode + 1) % save_interval == 0:
+                self.save_progress(episode + 1, metrics)
 
-                # Acumular métricas
-                total_reward += reward
-                total_wait_time += env.get_waiting_vehicles_count()
-                total_vehicles_sum += len(env.vehicles)
+        # Guardar modelo final
+        self.save_progress(num_episodes, metrics, final=True)
 
-                state = next_state
+        # Escribir el último bloque de la traza
+        if self.trace is not None:
+            self.trace.close()
 
-            # Reducir epsilon
-            self.agent.decay_epsilon()
+        return self.finish_metrics(metrics)
 
-            # Guardar métricas
-            avg_wait_time = total_wait_time / max_steps_per_episode
-            avg_throughput = total_moved / max_steps_per_episode
-            avg_vehicles = total_vehicles_sum / max_steps_per_episode
+    def train_vectorized(self, num_episodes=500, max_steps_per_episode=86400, num_envs=64,
+                         save_interval=50, verbose=True):
+        # Entrena corriendo los episodios de a `num_envs` en un entorno vectorizado (ver run_vector_episode).
+        metrics = self.new_metrics()
 
-            episode_rewards.append(total_reward)
-            episode_wait_times.append(avg_wait_time)
-            episode_throughput.append(avg_throughput)
-            episode_phase_changes.append(env.phase_changes)
-            episode_total_vehicles.append(avg_vehicles)
+        episode = 0
+        while episode < num_episodes:
+            batch = min(num_envs, num_episodes - episode)
+            for result in self.run_vector_episode(batch, max_steps_per_episode):
+                self.record_episode(metrics, result)
 
-            # Mostrar progreso con más info
-            if verbose and (episode + 1) % 10 == 0:
-                recent_rewards = np.mean(episode_rewards[-10:])
-                recent_wait = np.mean(episode_wait_times[-10:])
-                recent_throughput = np.mean(episode_throughput[-10:])
-                recent_changes = np.mean(episode_phase_changes[-10:])
-
-                print(f"Episodio {episode + 1}/{num_episodes} | "
-                      f"Reward: {recent_rewards:.2f} | "
-                      f"Espera: {recent_wait:.2f} | "
-                      f"Throughput: {recent_throughput:.2f} | "
-                      f"Cambios: {recent_changes:.1f} | "
-                      f"ε: {self.agent.epsilon:.3f}")
+            last_episode = episode
+            episode += batch
+            if verbose:
+                self.print_progress(metrics, episode, num_episodes)
+                if self.profiler is not None:
+                    print(Profiler.format_summary(self.profiler.episodes[-1]))
 
             # Guardar modelo periódicamente
-            if (episode + 1) % save_interval == 0:
+            if episode // save_interval > last_episode // save_interval:
                 self.agent.save()
 
         # Guardar modelo final
         self.agent.save()
 
-        return {
-            'rewards': episode_rewards,
-            'wait_times': episode_wait_times,
-            'throughput': episode_throughput,
-            'phase_changes': episode_phase_changes,
-            'total_vehicles': episode_total_vehicles
+        return self.finish_metrics(metrics)
+
+    def train_parallel(self, num_episodes=500, max_steps_per_episode=86400, num_workers=None,
+                       sync_interval=5, seed=0, save_interval=50, verbose=True, fast_forward=False):
+        """
+        Entrena con varios entornos Intersection independientes en un pool de procesos.
+
+        En cada ronda cada worker recibe una copia de la tabla Q, corre `sync_interval`
+        episodios y devuelve los cambios (deltas) de su tabla. Los deltas se promedian
+        sobre la tabla compartida (promedio de parámetros) antes de la siguiente ronda.
+
+        Cada worker usa una semilla derivada de (seed, ronda, worker), por lo que el
+        resultado es reproducible para un mismo número de workers.
+        """
+        num_workers = num_workers or os.cpu_count()
+        agent_params = {
+            'alpha': self.agent.alpha,
+            'gamma': self.agent.gamma,
+            'epsilon_decay': self.agent.epsilon_decay,
+            'epsilon_min': self.agent.epsilon_min
         }
 
-    def evaluate(self, num_episodes=10, max_steps=1000):
-        # Evalúa el agente entrenado sin exploración.
-        episode_wait_times = []
-        episode_vehicle_counts = []
-        episode_throughput = []
-
-        for episode in range(num_episodes):
-            env = self.reset_environment()
-            state = env.get_state()
-
-            total_wait_time = 0
-            total_vehicles = 0
-            total_moved = 0
-
-            for step in range(max_steps):
-                action = self.agent.get_action(state, training=False)
-                env.apply_action(action)
-                moved = env.step()
-
-                total_moved += moved
-                total_wait_time += env.get_waiting_vehicles_count()
-                total_vehicles += len(env.vehicles)
-
-                state = env.get_state()
-
-            avg_wait_time = total_wait_time / max_steps
-            avg_vehicles = total_vehicles / max_steps
-            avg_throughput = total_moved / max_steps
-
-            episode_wait_times.append(avg_wait_time)
-            episode_vehicle_counts.append(avg_vehicles)
-            episode_throughput.append(avg_throughput)
-
-        results = {
-            'avg_wait_time': np.mean(episode_wait_times),
-            'std_wait_time': np.std(episode_wait_times),
-            'avg_vehicles': np.mean(episode_vehicle_counts),
-            'std_vehicles': np.std(episode_vehicle_counts),
-            'avg_throughput': np.mean(episode_throughput),
-            'std_throughput': np.std(episode_throughput)
+        metrics = self.new_metrics()
+        episode = 0
+        round_index = 0
+
+        with multiprocessing.Pool(num_workers) as pool:
+            while episode < num_episodes:
+                q_table = self.agent.export_q_table()
+
+                # Repartir los episodios de la ronda entre los workers
+                tasks = []
+                remaining = num_episodes - episode
+                for worker in range(num_workers):
+                    worker_episodes = min(sync_interval, remaining)
+                    if worker_episodes == 0:
+                        break
+                    remaining -= worker_episodes
+                    worker_seed = [seed, round_index, worker]
+                    tasks.append((self.grid_size, self.engine_name, self.table_name, agent_params, q_table,
+                                  self.agent.epsilon, worker_seed, worker_episodes, max_steps_per_episode,
+                                  fast_forward, self.schedule, self.env_params, self.warm_states))
+
+                results = pool.map(_train_worker, tasks)
+
+                # Promedio de parámetros: sumar los deltas y dividir por la cantidad de workers
+                summed = {}
+                for delta, _, _ in results:
+                    for key, value in delta.items():
+                        summed[key] = summed.get(key, 0.0) + value
+                for key, value in summed.items():
+                    self.agent.set_q_value(key[0], key[1], self.agent.get_q_value(key[0], key[1]) + value / len(results))
+
+                # Registrar métricas en orden de worker, reduciendo epsilon por episodio completado
+                last_episode = episode
+                for _, episodes, steps in results:
+                    self.agent.total_steps += steps
+                    for result in episodes:
+                        self.record_episode(metrics, result)
+                        self.agent.decay_epsilon()
+                        episode += 1
+
+                if verbose:
+                    self.print_progress(metrics, episode, num_episodes)
+
+                # Guardar modelo periódicamente
+                if episode // save_interval > last_episode // save_interval:
+                    self.agent.save()
+
+                round_index += 1
+
+        # Guardar modelo final
+        self.agent.save()
+
+        return self.finish_metrics(metrics)
+
+    # Motor, tamaño, perfil de demanda y parámetros de los entornos de evaluación (ver agente/evaluation.py).
+    # Por defecto el motor del simulador; engine='events' da los mismos resultados que 'python', más rápido
+    def evaluation_spec(self, engine=None):
+        engine = engine or self.engine_name
+        return ENGINES[engine], self.grid_size, self.schedule, self.env_params
+
+    # Semilla de los episodios de evaluación: la del simulador (0 si no tiene)
+    def evaluation_seed(self, seed=None):
+        if seed is not None:
+            return seed
+        return 0 if self.seed is None else self.seed
+
+    # Resultados de evaluate a partir del reporte de una política en evaluate_policies
+    @staticmethod
+    def evaluation_results(report):
+        episodes = dict(zip(EVALUATION_METRICS, report['episodes'].T))
+        ci = dict(zip(EVALUATION_METRICS, report['ci']))
+        return {
+            'avg_wait_time': np.mean(episodes['wait_times']),
+            'std_wait_time': np.std(episodes['wait_times']),
+            'ci_wait_time': ci['wait_times'],
+            'avg_vehicles': np.mean(episodes['total_vehicles']),
+            'std_vehicles': np.std(episodes['total_vehicles']),
+            'ci_vehicles': ci['total_vehicles'],
+            'avg_throughput': np.mean(episodes['throughput']),
+            'std_throughput': np.std(episodes['throughput']),
+            'ci_throughput': ci['throughput'],
         }
 
+    @staticmethod
+    def print_evaluation(results):
         print(f"\nResultados Finales")
         print(f"Tiempo de espera: {results['avg_wait_time']:.2f} ± {results['std_wait_time']:.2f}")
         print(f"Vehículos promedio: {results['avg_vehicles']:.2f} ± {results['std_vehicles']:.2f}")
         print(f"Throughput: {results['avg_throughput']:.2f} ± {results['std_throughput']:.2f}")
 
+    def evaluate(self, num_episodes=10, max_steps=1000, max_workers=None, engine=None, seed=None, confidence=0.95):
+        # Evalúa el agente entrenado sin exploración. Los episodios se reparten en `max_workers`
+        # procesos (por defecto uno por núcleo); el episodio i tiene siempre el mismo tráfico
+        # (ver evaluate_policies).
+        report = evaluate_policies({'agente': self.agent}, self.evaluation_spec(engine), num_episodes, max_steps,
+                                   self.evaluation_seed(seed), max_workers, confidence)['agente']
+        results = self.evaluation_results(report)
+        self.print_evaluation(results)
         return results
 
-    def compare_with_baseline(self, num_episodes=10, max_steps=1000):
-        # Compara el agente entrenado con un semáforo de tiempo fijo.
+    def compare_with_baseline(self, num_episodes=10, max_steps=1000, max_workers=None, engine=None, seed=None,
+                              confidence=0.95):
+        # Compara el agente entrenado con un semáforo de tiempo fijo (cambio en los steps 30, 60, ...),
+        # con el mismo tráfico para ambos en cada episodio: una sola evaluación en paralelo.
+        report = evaluate_policies({'agente': self.agent, 'ciclo fijo 30': FixedCyclePolicy(30, offset=1)},
+                                   self.evaluation_spec(engine), num_episodes, max_steps, self.evaluation_seed(seed),
+                                   max_workers, confidence, reference='agente')
 
         # Evaluar agente entrenado
-        agent_results = self.evaluate(num_episodes, max_steps)
-
-        # Evaluar baseline (cambio fijo cada 30 steps)
-        baseline_wait_times = []
-        baseline_throughput = []
+        agent_results = self.evaluation_results(report['agente'])
+        self.print_evaluation(agent_results)
 
-        for episode in range(num_episodes):
-            env = self.reset_environment()
-            total_wait_time = 0
-            total_moved = 0
-
-            for step in range(max_steps):
-                if step % 30 == 0 and step > 0:
-                    env.apply_action(1)  # Cambiar
-                else:
-                    env.apply_action(0)  # Mantener
-
-                moved = env.step()
-                total_moved += moved
-                total_wait_time += env.get_waiting_vehicles_count()
-
-            avg_wait_time = total_wait_time / max_steps
-            avg_throughput = total_moved / max_steps
-            baseline_wait_times.append(avg_wait_time)
-            baseline_throughput.append(avg_throughput)
+        # Evaluar baseline
+        baseline = report['ciclo fijo 30']
+        baseline_wait_times, baseline_throughput = baseline['episodes'][:, [1, 2]].T
 
         baseline_avg_wait = np.mean(baseline_wait_times)
         baseline_std_wait = np.std(baseline_wait_times)
@@ -198,14 +825,37 @@ class TrafficSimulator:
         wait_improvement = ((baseline_avg_wait - agent_results['avg_wait_time']) / baseline_avg_wait) * 100
         throughput_improvement = ((agent_results['avg_throughput'] - baseline_avg_throughput) / baseline_avg_throughput) * 100
 
+        # Diferencia pareada episodio a episodio (agente - baseline) con su intervalo de confianza
+        wait_diff, wait_ci = -baseline['diff'][1], baseline['diff_ci'][1]
+        throughput_diff, throughput_ci = -baseline['diff'][2], baseline['diff_ci'][2]
+
         print(f"\nResultados")
-        print(f"Mejora en espera: {wait_improvement:.2f}%")
-        print(f"Mejora en throughput: {throughput_improvement:.2f}%")
+        print(f"Mejora en espera: {wait_improvement:.2f}% (diferencia pareada {wait_diff:+.2f} ± {wait_ci:.2f})")
+        print(f"Mejora en throughput: {throughput_improvement:.2f}% "
+              f"(diferencia pareada {throughput_diff:+.2f} ± {throughput_ci:.2f})")
 
         return agent_results, baseline_avg_wait, baseline_std_wait
 
+    def compare_policies(self, policies=None, num_episodes=30, max_steps=1000, max_workers=None, engine=None,
+                         seed=None, confidence=0.95, verbose=True):
+        """
+        Evalúa el agente junto a las políticas de referencia (por defecto baseline_policies())
+        en los mismos episodios y retorna el reporte de evaluate_policies con el agente como
+        referencia: 'diff' y 'diff_ci' de cada política son su diferencia pareada con el agente.
+        """
+        policies = {'agente': self.agent, **(baseline_policies() if policies is None else policies)}
+        report = evaluate_policies(policies, self.evaluation_spec(engine), num_episodes, max_steps,
+                                   self.evaluation_seed(seed), max_workers, confidence, reference='agente')
+        if verbose:
+            print(format_report(report, 'agente', confidence))
+        return report
+
     def plot_training_progress(self, metrics):
         # Grafica el progreso del entrenamiento con todas las métricas.
+        # `metrics` puede ser el dict de train, un MetricsLog o el directorio de un registro en disco;
+        # las columnas del registro se leen desde disco recién al graficarlas.
+        if isinstance(metrics, str):
+            metrics = MetricsLog(metrics)
         window = 20
 
         # Grafica 1: Recompensas y Tiempo de Espera
@@ -271,6 +921,29 @@ class TrafficSimulator:
         plt.show()
 
 
+def _train_worker(args):
+    # Corre episodios de entrenamiento en un proceso del pool con una copia de la tabla Q.
+    # Retorna los deltas de la tabla, las métricas de cada episodio y los steps de aprendizaje.
+    (grid_size, engine, table, agent_params, q_table, epsilon, seed, num_episodes, max_steps, fast_forward,
+     schedule, env_params, warm_states) = args
+
+    simulator = TrafficSimulator(grid_size=grid_size, engine=engine, table=table, seed=seed)
+    simulator.set_demand(schedule)
+    simulator.set_env_params(**env_params)
+    simulator.warm_states = warm_states
+    simulator.agent = TABLES[table](epsilon=epsilon, rng=simulator.agent_rng, **agent_params)
+    simulator.agent.import_q_table(dict(q_table))
+
+    episodes = [simulator.run_episode(max_steps, fast_forward) for _ in range(num_episodes)]
+
+    delta = {}
+    for key, value in simulator.agent.export_q_table().items():
+        previous = q_table.get(key, 0.0)
+        if value != previous:
+            delta[key] = value - previous
+    return delta, episodes, simulator.agent.total_steps
+
+
 def main():
     simulator = TrafficSimulator(grid_size=40)
     metrics = simulator.train(
@@ -0,0 +1,128 @@
+import csv
+from functools import lru_cache
+import numpy as np
+from backend.vehiculo import DIRECTIONS
+
+SECONDS_PER_DAY = 86400
+
+# Intervalo de las franjas sin demanda: el contador de spawn no lo alcanza en el día
+NO_DEMAND_INTERVAL = 10 ** 9
+
+
+class Horario:
+    """
+    Demanda de tráfico precalculada para cada segundo del día (1 step = 1 segundo), para
+    que el motor la lea indexando una tabla en vez de calcularla en cada step.
+
+    Se arma desde franjas (segundo de inicio, intervalo, pesos); cada franja dura hasta
+    el inicio de la siguiente y la última sigue hasta la primera del día siguiente.
+    - interval[t]: steps entre spawns en el segundo t (el spawn ocurre cuando el contador
+      de spawn lo alcanza, ver Intersection.step)
+    - rate[t]: vehículos por step (1 / intervalo), arreglo NumPy
+    - span[t]: segundos desde t (incluido) en que el intervalo no cambia
+    - weights[t]: probabilidades acumuladas de cada dirección (en el orden de DIRECTIONS),
+      o weights = None si las cuatro direcciones son igual de probables
+
+    Las tablas son compartidas entre entornos (ver hourly_schedule): no se modifican.
+    """
+
+    def __init__(self, segments):
+        segments = sorted(segments, key=lambda segment: segment[0])
+        if not segments:
+            raise ValueError("El horario necesita al menos una franja")
+        if len({start for start, _, _ in segments}) != len(segments):
+            raise ValueError("El horario tiene franjas que empiezan en el mismo segundo")
+        if all(interval >= NO_DEMAND_INTERVAL for _, interval, _ in segments):
+            raise ValueError("El horario no genera vehículos en ninguna franja")
+
+        # La franja que cruza la medianoche se parte en dos
+        if segments[0][0] != 0:
+            segments.insert(0, (0,) + tuple(segments[-1][1:]))
+        uniform = all(weights is None for _, _, weights in segments)
+
+        self.interval = []
+        self.span = []
+        self.weights = None if uniform else []
+        ends = [start for start, _, _ in segments[1:]] + [SECONDS_PER_DAY]
+        for (start, interval, weights), end in zip(segments, ends):
+            length = end - start
+            self.interval.extend([interval] * length)
+            self.span.extend(range(length, 0, -1))
+            if not uniform:
+                self.weights.extend([weights or (0.25, 0.5, 0.75, 1.0)] * length)
+        self.rate = 1.0 / np.array(self.interval, dtype=np.float64)
+
+    @classmethod
+    def from_hourly(cls, intervals, weights=None):
+        # Un intervalo (y opcionalmente pesos acumulados) por hora, de 0 a 23
+        if len(intervals) != 24:
+            raise ValueError("Se necesita un intervalo por cada hora del día")
+        weights = weights or [None] * 24
+        return cls([(3600 * hour, interval, weights[hour]) for hour, interval in enumerate(intervals)])
+
+    @classmethod
+    def from_csv(cls, path):
+        """
+        Lee un perfil de demanda: una fila por franja con la hora de inicio (columna
+        `hora`, como 7, 7:30 o 7:30:15) y los autos por hora que avanzan hacia cada
+        dirección (columnas norte, sur, este, oeste; las que falten cuentan como 0).
+
+        El intervalo de spawn de la franja es 3600 / total de autos por hora, redondeado
+        (al menos 1: se genera a lo más un auto por step) y la dirección de cada auto se
+        sortea en proporción a su columna. Una franja sin autos no genera vehículos.
+        """
+        segments = []
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                counts = [float(row.get(direction) or 0) for direction in DIRECTIONS]
+                if any(count < 0 for count in counts):
+                    raise ValueError(f"{path}: demanda negativa en la franja {row['hora']}")
+                total = sum(counts)
+                if total == 0:
+                    segments.append((parse_time(row['hora']), NO_DEMAND_INTERVAL, None))
+                    continue
+                interval = max(1, round(3600 / total))
+                weights = None
+                if len(set(counts)) > 1:
+                    weights = tuple((np.cumsum(counts[:3]) / total).tolist()) + (1.0,)
+                segments.append((parse_time(row['hora']), interval, weights))
+        return cls(segments)
+
+    # Steps hasta el próximo spawn (1 = en el siguiente step) desde el segundo `second`
+    # con el contador de spawn en `counter`; recorre el horario por franjas
+    def steps_until_spawn(self, second, counter):
+        steps = 0
+        second = (second + 1) % SECONDS_PER_DAY
+        while True:
+            span = self.span[second]
+            needed = max(1, self.interval[second] - counter)
+            if needed <= span:
+                return steps + needed
+            counter += span
+            steps += span
+            second = (second + span) % SECONDS_PER_DAY
+
+    # Autos por hora generados en cada hora del día (sin contar los spawns bloqueados)
+    def vehicles_per_hour(self):
+        return self.rate.reshape(24, 3600).sum(axis=1)
+
+    # Para DEBUG
+    def __repr__(self):
+        return f"Horario(vehículos/día={self.rate.sum():.0f}, ponderado={self.weights is not None})"
+
+
+# Segundo del día de una hora escrita como 7, 7:30 o 7:30:15
+def parse_time(text):
+    parts = [int(part) for part in str(text).strip().split(':')]
+    if not 1 <= len(parts) <= 3:
+        raise ValueError(f"Hora inválida: {text!r}")
+    hour, minute, second = parts + [0] * (3 - len(parts))
+    if not (0 <= hour < 24 and 0 <= minute < 60 and 0 <= second < 60):
+        raise ValueError(f"Hora inválida: {text!r}")
+    return 3600 * hour + 60 * minute + second
+
+
+# Horario con un intervalo fijo por hora; se comparte entre los entornos con los mismos intervalos
+@lru_cache(maxsize=16)
+def hourly_schedule(intervals):
+    return Horario.from_hourly(list(intervals))
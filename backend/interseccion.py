@@ -1,74 +1,212 @@
-import random
-from backend.semaforo import Semaforo
+from collections import deque, namedtuple
+from itertools import islice
+from operator import attrgetter
+import numpy as np
+from backend.horario import SECONDS_PER_DAY
+from backend.semaforo import Semaforo, GREEN_CODES
 from backend.spawn_vehiculo import SpawnVehicle
+from backend.vehiculo import NORTE, SUR, ESTE, OESTE, DIRECTIONS
+
+# Zonas de un vehículo en su pista
+ZONE_WAITING = 0  # antes de la intersección
+ZONE_BOX = 1      # dentro de la intersección
+ZONE_PASSED = 2   # después de la intersección
+
+# Campos de un vehículo que guarda una traza (ver backend/trace.py)
+VEHICLE_RECORD = attrgetter('x', 'y', 'code', 'image')
+
+# Foto del estado de una intersección (ver Intersection.snapshot):
+# vehicles: arreglo int16 (n, 4) de (x, y, código, imagen) en el orden de la lista de vehículos
+# counters: valores de SNAPSHOT_FIELDS; light: (fase, tiempo desde el último cambio)
+# draws: estado de los sorteos (ver SpawnVehicle.get_draw_state)
+# engine: estado propio del motor que no se deduce de los vehículos (None en Intersection)
+EnvSnapshot = namedtuple('EnvSnapshot', ['vehicles', 'counters', 'light', 'draws', 'engine'])
+
+# Reloj, contador de spawn y métricas que guarda una foto
+SNAPSHOT_FIELDS = ('time_of_day', 'spawn_counter', 'total_steps', 'total_wait_time', 'phase_changes',
+                   'exited_vehicles', 'blocked_spawns', 'refused_phase_changes')
+METRIC_FIELDS = SNAPSHOT_FIELDS[2:]
+
+# Pesos de la recompensa por step (ver step_reward): penalización por auto esperando,
+# premio por auto que avanza, penalización por cambiar de fase y cota del valor absoluto
+RewardWeights = namedtuple('RewardWeights', ['wait_penalty', 'pass_reward', 'change_penalty', 'reward_limit'])
+REWARD_WEIGHTS = RewardWeights(0.5, 2.0, 3.0, 20.0)
+
+# Direcciones que bloquean el cruce de cada dirección
+BLOCKERS = {
+    'norte': ('este', 'oeste'),
+    'sur': ('este', 'oeste'),
+    'este': ('norte', 'sur'),
+    'oeste': ('norte', 'sur')
+}
 
 class Intersection:
     """
     Gestiona la lógica del entorno usando una grilla.
     """
 
-    def __init__(self, grid_size=40):
+    # Métodos cronometrados al activar la instrumentación (ver backend/profiler.py)
+    PROFILED_METHODS = ('step', 'spawn_vehicle', 'move_vehicles', 'can_cross', 'update_grid',
+                        'get_state', 'calculate_reward', 'skip_ahead_limit', 'skip_ahead')
+
+    # fast_forward sólo revisa skip_ahead_limit si faltan más de estos steps para el próximo
+    # spawn: en un salto más corto la revisión cuesta más que los steps que se ahorran
+    SKIP_MIN_STEPS = 2
+
+    def __init__(self, grid_size=40, rng=None):
         self.grid_size = grid_size
         self.center_cell = grid_size // 2  # Casilla central de la intersección
 
-        # Crear grilla
-        self.grid = [[0 for _ in range(self.grid_size)]for _ in range(self.grid_size)]
+        # Límites de la intersección, los autos se detienen justo antes
+        self.border_offset = grid_size // 4 + 6
+        self._min_c = self.border_offset
+        self._max_c = grid_size - self.border_offset - 1
 
+        # Crear grilla de ocupación (1 = casilla ocupada por un vehículo)
+        self.grid = np.zeros((self.grid_size, self.grid_size), dtype=np.uint8)
+
+        # Casillas liberadas y ocupadas durante el step, se aplican en update_grid
+        self._vacated_cells = []
+        self._occupied_cells = []
+        # Lista que recibe las casillas liberadas en cada step, en el orden de los vehículos (ver backend/trace.py)
+        self.trace_cells = None
+        # Lista que recibe (x, y, código, imagen) de cada vehículo al entrar, antes de moverse
+        self.trace_new = None
 
         self.semaforo = Semaforo()
         self.vehicles = []
 
+        # Índice por pista: vehículos ordenados del primero al último,
+        # y contadores por zona y dirección actualizados al crear, mover y eliminar
+        self.lanes = {direction: deque() for direction in BLOCKERS}
+        self.zone_counts = [dict.fromkeys(BLOCKERS, 0) for _ in range(3)]
+
         # Configuración de generación de tráfico
         self.base_spawn_interval = 3  # Spawn cada N steps
-        self.current_hour = 7  # Hora inicial simulada (6:00 AM)
-        self.current_minute = 0
-        self.current_second = 0
+        self.time_of_day = 7 * 3600  # Segundo del día simulado, inicia a las 7:00 AM
 
         # Métricas
         self.total_wait_time = 0
         self.phase_changes = 0
         self.total_steps = 0
         self.spawn_counter = 0
-
-        # Spawn de vehículos, lógica a parte
-        self.spawn = SpawnVehicle()
+        self.exited_vehicles = 0  # Autos que salieron de la grilla
+        self.blocked_spawns = 0  # Spawns descartados por tener la casilla de entrada ocupada
+        self.refused_phase_changes = 0  # Cambios de fase pedidos antes del tiempo mínimo
+
+        # Pesos de la recompensa, se pueden reemplazar (por ejemplo en agente/sweep.py)
+        self.reward_weights = REWARD_WEIGHTS
+
+        # Enlaces con otras intersecciones (ver backend/red_vial.py): direcciones cuya entrada
+        # no genera autos propios, y lista que recibe (dirección, imagen) de cada auto que sale
+        self.linked_entries = frozenset()
+        self.exit_queue = None
+
+        # Spawn de vehículos, lógica a parte. `rng` (numpy.random.Generator o semilla)
+        # reemplaza al módulo random global en los sorteos (ver SpawnVehicle)
+        self.spawn = SpawnVehicle(rng=rng)
+
+    # Cambia el perfil de demanda (Horario, ver backend/horario.py), la duración mínima de
+    # fase del semáforo y los pesos de la recompensa; con None se deja el valor actual
+    def configure(self, schedule=None, min_state_duration=None, reward_weights=None):
+        if schedule is not None:
+            self.spawn.schedule = schedule
+        if min_state_duration is not None:
+            self.semaforo.min_state_duration = min_state_duration
+        if reward_weights is not None:
+            self.reward_weights = reward_weights
+        return self
+
+    # Hora, minuto y segundo del reloj simulado (se guarda sólo el segundo del día)
+    @property
+    def current_hour(self):
+        return self.time_of_day // 3600
+
+    @current_hour.setter
+    def current_hour(self, hour):
+        self.set_clock(hour, self.current_minute, self.current_second)
+
+    @property
+    def current_minute(self):
+        return self.time_of_day // 60 % 60
+
+    @current_minute.setter
+    def current_minute(self, minute):
+        self.set_clock(self.current_hour, minute, self.current_second)
+
+    @property
+    def current_second(self):
+        return self.time_of_day % 60
+
+    @current_second.setter
+    def current_second(self, second):
+        self.set_clock(self.current_hour, self.current_minute, second)
+
+    # Pone el reloj simulado en hora:minuto:segundo
+    def set_clock(self, hour, minute=0, second=0):
+        self.time_of_day = (hour * 3600 + minute * 60 + second) % SECONDS_PER_DAY
 
     # Genera un nuevo vehículo en una dirección aleatoria.
     def spawn_vehicle(self):
-        direction = random.choice(['norte', 'sur', 'este', 'oeste'])
+        direction = self.spawn.draw_direction(self.time_of_day)
+        # Entrada alimentada por otra intersección (ver RoadNetwork): no recibe tráfico propio
+        if direction in self.linked_entries:
+            return
+        if not self.add_vehicle(direction):
+            self.blocked_spawns += 1
+
+    # Agrega un vehículo en la entrada de `direction` si la casilla está libre (sin imagen
+    # dada, se sortea). Retorna si pudo entrar.
+    def add_vehicle(self, direction, image=None):
         spawn_pos = self.spawn.get_spawn_position(direction, self.center_cell, self.grid_size)
         x = spawn_pos[0]
         y = spawn_pos[1]
+        if self.grid[y, x] == 1:
+            return False
 
-        if self.grid[y][x] != 1:
-            vehicle = self.spawn.spawn_vehicle(spawn_pos, direction)
-            self.vehicles.append(vehicle)
-            self.grid[y][x] = 1
-        else:
-            pass
-
-    # Cuenta vehículos esperando en cada dirección y los categoriza.
-    def get_traffic_levels(self):
-        counts = {'norte': 0, 'sur': 0, 'este': 0, 'oeste': 0}
-
-        border_offset = self.grid_size // 4 + 6
-        min_c = border_offset
-        max_c = self.grid_size - border_offset - 1
+        vehicle = self.spawn.spawn_vehicle(spawn_pos, direction, image)
+        if self.trace_new is not None:
+            self.trace_new.append(VEHICLE_RECORD(vehicle))
+        self.vehicles.append(vehicle)
+        self.lanes[direction].append(vehicle)
+        self.zone_counts[self.get_zone(direction, x, y)][direction] += 1
+        self.grid[y, x] = 1
+        return True
 
-        # Contar vehículos esperando ANTES de la intersección
-        for auto in self.vehicles:
-            x, y = auto.get_position()
+    # Zona de una posición para un vehículo que avanza en la dirección dada
+    def get_zone(self, direction, x, y):
+        min_c = self._min_c
+        max_c = self._max_c
+        if ((direction == 'este' and x < min_c) or (direction == 'oeste' and x > max_c) or
+                (direction == 'norte' and y > max_c) or (direction == 'sur' and y < min_c)):
+            return ZONE_WAITING
+        if min_c <= x <= max_c and min_c <= y <= max_c:
+            return ZONE_BOX
+        return ZONE_PASSED
+
+    # Reconstruye el índice por pista desde la lista de vehículos
+    def rebuild_lanes(self):
+        for lane in self.lanes.values():
+            lane.clear()
+        self.zone_counts = [dict.fromkeys(BLOCKERS, 0) for _ in range(3)]
+
+        # Los vehículos más avanzados van primero en su pista
+        progress = {
+            'norte': lambda pos: pos[1],
+            'sur': lambda pos: -pos[1],
+            'este': lambda pos: -pos[0],
+            'oeste': lambda pos: pos[0]
+        }
+        for auto in sorted(self.vehicles, key=lambda v: progress[v.get_direction()](v.get_position())):
             direction = auto.get_direction()
+            x, y = auto.get_position()
+            self.lanes[direction].append(auto)
+            self.zone_counts[self.get_zone(direction, x, y)][direction] += 1
 
-            # Verificar si el vehículo está esperando en el borde
-            if direction == 'este' and x < min_c:
-                counts['este'] += 1
-            elif direction == 'oeste' and x > max_c:
-                counts['oeste'] += 1
-            elif direction == 'norte' and y > max_c:
-                counts['norte'] += 1
-            elif direction == 'sur' and y < min_c:
-                counts['sur'] += 1
+    # Cuenta vehículos esperando en cada dirección y los categoriza.
+    def get_traffic_levels(self):
+        # Vehículos esperando ANTES de la intersección, según el índice por pista
+        counts = self.zone_counts[ZONE_WAITING]
 
         levels = {}
         for direction, count in counts.items():
@@ -90,27 +228,33 @@ class Intersection:
     def get_size(self):
         return self.grid_size
 
+    # Retorna la cantidad de vehículos en la grilla
+    def get_vehicle_count(self):
+        return len(self.vehicles)
+
+    # (x, y, código de dirección, imagen) de los vehículos desde la posición `start` de self.vehicles
+    def get_vehicle_records(self, start=0):
+        return list(map(VEHICLE_RECORD, self.vehicles[start:] if start else self.vehicles))
+
     # Retorna el valor de la posicion señalada de la grilla
     def get_position(self, x, y):
-        return self.grid[y][x]
+        return int(self.grid[y, x])
 
     # Obtener lista de vehículos que están en la intersección
     def get_vehicles_in_intersection(self):
         vehicles = []
-        border_offset = self.grid_size // 4 + 6
-        min_c = border_offset
-        max_c = self.grid_size - border_offset - 1
-
-        for auto in self.vehicles:
-            x, y = auto.get_position()
-            if min_c <= x <= max_c and min_c <= y <= max_c:
-                vehicles.append(auto)
+        for direction, lane in self.lanes.items():
+            # En cada pista: primero los que ya pasaron, luego los que están en el cruce
+            in_box = self.zone_counts[ZONE_BOX][direction]
+            if in_box:
+                passed = self.zone_counts[ZONE_PASSED][direction]
+                vehicles.extend(islice(lane, passed, passed + in_box))
         return vehicles
 
     def can_cross(self, vehiculo):
         direction = vehiculo.get_direction()
         x,y = vehiculo.get_position()
-        border_offset = self.grid_size//4 + 6
+        border_offset = self.border_offset
 
         # Verificar sólo si el auto está a punto de cruzar
         if direction == 'norte' and y != self.grid_size - border_offset:
@@ -122,160 +266,394 @@ class Intersection:
         if direction == 'oeste' and x != self.grid_size - border_offset:
             return True
 
-        blockers = {
-            'norte': ['este','oeste'],
-            'sur': ['este', 'oeste'],
-            'este': ['norte', 'sur'],
-            'oeste': ['norte', 'sur']
-        }
-        interseccion_autos = self.get_vehicles_in_intersection()
-
-        for auto in interseccion_autos:
-            if auto is vehiculo:
-                continue
-
-            if auto.get_direction() in blockers[direction]:
+        # El auto en la línea de detención no está en el cruce,
+        # basta revisar si hay autos de las direcciones que lo bloquean
+        in_box = self.zone_counts[ZONE_BOX]
+        for blocker in BLOCKERS[direction]:
+            if in_box[blocker] > 0:
                 return False
         return True
 
     def get_waiting_vehicles_count(self):
-        waiting_count = 0
-        border_offset = self.grid_size // 4 + 6
-        min_c = border_offset
-        max_c = self.grid_size - border_offset - 1
-
-        for auto in self.vehicles:
-            x, y = auto.get_position()
-            if auto.get_direction() == 'este' and x < min_c:
-                waiting_count +=1
-                continue
-            elif auto.get_direction() == 'oeste' and x > max_c:
-                waiting_count +=1
-                continue
-            elif auto.get_direction() == 'norte' and y > max_c:
-                waiting_count +=1
-                continue
-            elif auto.get_direction() == 'sur' and y < min_c:
-                waiting_count +=1
-                continue
-        return waiting_count
+        waiting = self.zone_counts[ZONE_WAITING]
+        return waiting['norte'] + waiting['sur'] + waiting['este'] + waiting['oeste']
 
 
     def calculate_reward(self, accion_tomada, moved_this_step):
-        waiting_vehicles = self.get_waiting_vehicles_count()
-        wait_penalty = -0.5 * waiting_vehicles
+        return self.step_reward(accion_tomada, moved_this_step, self.get_waiting_vehicles_count())
+
+    # Recompensa de un step según la acción, los autos que avanzaron y los que quedaron esperando
+    def step_reward(self, accion_tomada, moved_this_step, waiting_vehicles):
+        weights = self.reward_weights
+        wait_penalty = -weights.wait_penalty * waiting_vehicles
 
         # Premio al pasar autos
-        pass_reward = moved_this_step * 2.0
+        pass_reward = moved_this_step * weights.pass_reward
 
         # Penalización por cambiar de fase
-        change_penalty = -3.0 if accion_tomada == 1 else 0.0
+        change_penalty = -weights.change_penalty if accion_tomada == 1 else 0.0
 
         raw_reward = wait_penalty + pass_reward + change_penalty
 
         # acotar recompensa por step para estabilidad
-        reward = max(-20.0, min(20.0, raw_reward))
+        limit = weights.reward_limit
+        reward = max(-limit, min(limit, raw_reward))
 
         return reward
 
-    # Calcular steps
-    def step(self):
-        # Avanzar el tiempo simulado
-        # 1 step = 1 minuto
-        self.current_second += 1
-        if self.current_second >= 60:
-            self.current_minute += 1
-            self.current_second = 0
+    # Avanzar el tiempo simulado
+    # 1 step = 1 segundo
+    def advance_clock(self, steps=1):
+        # Al pasar la medianoche se reinicia el día
+        self.time_of_day = (self.time_of_day + steps) % SECONDS_PER_DAY
 
-        if self.current_minute >= 60:
-            self.current_hour += 1
-            self.current_minute = 0
+    # Steps hasta el próximo spawn (1 = en el siguiente step)
+    def steps_until_spawn(self):
+        return self.spawn.schedule.steps_until_spawn(self.time_of_day, self.spawn_counter)
 
-        if self.current_hour >= 24:
-            # Reiniciar día
-            self.current_hour = 0
+    # Calcular steps
+    def step(self):
+        self.advance_clock()
 
         # Spawn de vehículos
         self.spawn_counter += 1
-        spawn_interval = self.spawn.get_spawn_interval(self.current_hour)
+        spawn_interval = self.spawn.schedule.interval[self.time_of_day]
 
         if self.spawn_counter >= spawn_interval:
             self.spawn_vehicle()
             self.spawn_counter = 0
 
         # Mover vehículos
+        moved_this_step = self.move_vehicles()
+
+        # Actualizar grilla
+        self.update_grid()
+
+        # Actualizar semáforo
+        self.semaforo.update()
+        return moved_this_step
+
+    # Mueve cada vehículo una casilla si puede, retorna cuántos se movieron
+    def move_vehicles(self):
         moved_this_step = 0
+        # Autos que siguen en la grilla; los que salen se descartan al final en una sola pasada
+        remaining = []
+        # Luz verde por código de dirección en la fase actual
+        green = GREEN_CODES[self.semaforo.state]
 
         for vehiculo in self.vehicles:
             # Guardar posición antigua
             old_x, old_y = vehiculo.get_position()
 
             # Tomar x e y del vehículo actual
-            x,y = vehiculo.get_position()
+            x,y = old_x, old_y
+            code = vehiculo.code
             # Posición en la que los autos se detendrán
-            border_offset = self.grid_size//4 + 6
+            border_offset = self.border_offset
 
             # Verificar que no hay un vehículo en la casilla donde se está avanzando
-            if vehiculo.get_direction() == 'norte' and y != 0:
+            if code == NORTE and y != 0:
                 # Verificar en su casilla correspondiente si el semáforo está detenido o no
-                if self.semaforo.is_green('norte') or  y != self.grid_size - border_offset:
+                if green[NORTE] or  y != self.grid_size - border_offset:
                     # Si hay un vehículo atravezando el cruce, no pasar hasta que hayan pasado los vehículos
                     if self.can_cross(vehiculo):
                         y -= 1
                         # En este caso el vehículo no está en una orilla, por lo que comparamos y avanzamos
-                        if self.grid[y][x] != 1:
+                        if self.grid[y, x] != 1:
                             vehiculo.move(self.grid_size)
-            elif vehiculo.get_direction() == 'sur' and y != self.grid_size - 1:
-                if self.semaforo.is_green('sur') or y != border_offset - 1:
+            elif code == SUR and y != self.grid_size - 1:
+                if green[SUR] or y != border_offset - 1:
                     if self.can_cross(vehiculo):
                         y += 1
-                        if self.grid[y][x] != 1:
+                        if self.grid[y, x] != 1:
                             vehiculo.move(self.grid_size)
-            elif vehiculo.get_direction() == 'este' and x != self.grid_size - 1:
-                if self.semaforo.is_green('este') or x != border_offset - 1:
+            elif code == ESTE and x != self.grid_size - 1:
+                if green[ESTE] or x != border_offset - 1:
                     if self.can_cross(vehiculo):
                         x += 1
-                        if self.grid[y][x] != 1:
+                        if self.grid[y, x] != 1:
                             vehiculo.move(self.grid_size)
-            elif vehiculo.get_direction() == 'oeste' and x != 0:
-                if self.semaforo.is_green('oeste') or x != self.grid_size - border_offset:
+            elif code == OESTE and x != 0:
+                if green[OESTE] or x != self.grid_size - border_offset:
                     if self.can_cross(vehiculo):
                         x -= 1
-                        if self.grid[y][x] != 1:
+                        if self.grid[y, x] != 1:
                             vehiculo.move(self.grid_size)
             else:
                 # Caso en el que el vehículo esté en una orilla de la grilla, donde no podemos comparar para x o y +-1
                 if not vehiculo.move(self.grid_size):
-                    self.vehicles.remove(vehiculo)
-
+                    self._vacated_cells.append((old_x, old_y))
+
+                    # El auto que sale es siempre el primero de su pista
+                    direction = vehiculo.get_direction()
+                    self.lanes[direction].popleft()
+                    self.zone_counts[self.get_zone(direction, old_x, old_y)][direction] -= 1
+                    if self.exit_queue is not None:
+                        self.exit_queue.append((direction, vehiculo.image))
+                    self.spawn.release_vehicle(vehiculo)
+                    self.exited_vehicles += 1
+                    continue
+
+            remaining.append(vehiculo)
             new_x, new_y = vehiculo.get_position()
             if (new_x, new_y) != (old_x, old_y):
                 moved_this_step += 1
-
-
-
-
-        # Actualizar grilla
-        self.update_grid()
-
-        # Actualizar semáforo
-        self.semaforo.update()
+                self._vacated_cells.append((old_x, old_y))
+                self._occupied_cells.append((new_x, new_y))
+
+                # Actualizar contadores al momento, can_cross los usa durante este mismo recorrido
+                direction = vehiculo.get_direction()
+                old_zone = self.get_zone(direction, old_x, old_y)
+                new_zone = self.get_zone(direction, new_x, new_y)
+                if old_zone != new_zone:
+                    self.zone_counts[old_zone][direction] -= 1
+                    self.zone_counts[new_zone][direction] += 1
+
+        if len(remaining) != len(self.vehicles):
+            self.vehicles[:] = remaining
         return moved_this_step
 
+    # Distancias de un vehículo en su pista: al borde por donde sale y a la línea de detención
+    # (negativa si ya la pasó)
+    def get_distances(self, direction, x, y):
+        last = self.grid_size - 1
+        if direction == 'norte':
+            return y, y - (self.grid_size - self.border_offset)
+        elif direction == 'sur':
+            return last - y, (self.border_offset - 1) - y
+        elif direction == 'este':
+            return last - x, (self.border_offset - 1) - x
+        else:
+            return x, x - (self.grid_size - self.border_offset)
+
+    def skip_ahead_limit(self, phase_locked=False):
+        """
+        Cantidad de steps que se pueden avanzar con skip_ahead sin perder equivalencia
+        con llamar step() uno por uno (sin acciones entre medio).
+
+        Se puede saltar mientras no haya spawn, ningún auto salga de la grilla y
+        ningún auto llegue a cruzar una línea de detención:
+        - los autos con luz verde o que ya pasaron la línea avanzan una casilla por
+          step, deben tener libre la casilla siguiente y no alcanzar la línea ni el borde
+        - en las pistas con luz roja cada auto avanza hasta la línea o hasta quedar
+          detrás del auto detenido de adelante, así que no limitan el salto
+
+        Con phase_locked=True además se limita a los steps en que el semáforo no
+        puede cambiar, así cualquier acción del agente en ese tramo no tiene efecto.
+        """
+        limit = self.steps_until_spawn() - 1
+        if phase_locked:
+            limit = min(limit, self.semaforo.locked_steps())
+
+        grid = self.grid
+        for direction, lane in self.lanes.items():
+            red = not self.semaforo.is_green(direction)
+            queue = 0  # Autos detenidos en la cola de la luz roja
+            for auto in lane:
+                if limit <= 1:
+                    return 0
+                x, y = auto.get_position()
+                to_edge, to_stop = self.get_distances(direction, x, y)
+
+                # La casilla siguiente debe estar libre, salvo en la cola detenida
+                if direction == 'norte':
+                    blocked = grid[y - 1, x] if y > 0 else 0
+                elif direction == 'sur':
+                    blocked = grid[y + 1, x] if y < self.grid_size - 1 else 0
+                elif direction == 'este':
+                    blocked = grid[y, x + 1] if x < self.grid_size - 1 else 0
+                else:
+                    blocked = grid[y, x - 1] if x > 0 else 0
+
+                if red and to_stop >= 0:
+                    # Detenido sólo si está en la línea o pegado al auto detenido de adelante
+                    if to_stop == queue:
+                        queue += 1
+                    elif blocked:
+                        return 0
+                else:
+                    if blocked:
+                        return 0
+                    limit = min(limit, to_edge)
+                    if to_stop >= 0:
+                        limit = min(limit, to_stop)
+        return limit if limit > 1 else 0
+
+    # Estados (get_state) después de cada uno de los próximos `steps` steps, para un salto dentro
+    # de skip_ahead_limit(phase_locked=True): en él sólo cambia la categoría de tiempo del semáforo.
+    # Se llama antes de skip_ahead
+    def skip_states(self, steps):
+        norte, sur, este, oeste, phase, _ = self.get_state()
+        return [(norte, sur, este, oeste, phase, category) for category in self.semaforo.upcoming_time_categories(steps)]
+
+    # Avanza `steps` steps de una vez; sólo es válido con steps <= skip_ahead_limit().
+    # Retorna la lista de movimientos de cada step, lo que habría retornado cada step().
+    def skip_ahead(self, steps):
+        self.advance_clock(steps)
+        self.spawn_counter += steps
+
+        grid = self.grid
+        # Cantidad de autos que avanzan exactamente m casillas (se mueven en los primeros m steps)
+        moves_count = [0] * (steps + 1)
+        new_cells = []
+        for direction, lane in self.lanes.items():
+            red = not self.semaforo.is_green(direction)
+            wall = -1  # Distancia a la línea del último auto de la cola con luz roja
+            for auto in lane:
+                x, y = auto.get_position()
+                to_edge, to_stop = self.get_distances(direction, x, y)
+                if red and to_stop >= 0:
+                    # Avanza hasta la línea o hasta quedar detrás del auto de adelante
+                    wall = max(to_stop - steps, wall + 1)
+                    moves = to_stop - wall
+                else:
+                    moves = steps
+                moves_count[moves] += 1
+                if moves == 0:
+                    continue
+
+                grid[y, x] = 0
+                auto.move(self.grid_size, moves)
+                new_x, new_y = auto.get_position()
+                new_cells.append((new_x, new_y))
+
+                old_zone = self.get_zone(direction, x, y)
+                new_zone = self.get_zone(direction, new_x, new_y)
+                if old_zone != new_zone:
+                    self.zone_counts[old_zone][direction] -= 1
+                    self.zone_counts[new_zone][direction] += 1
+
+        for x, y in new_cells:
+            grid[y, x] = 1
+
+        self.semaforo.update(steps)
+
+        # En el step t se mueven los autos que avanzan al menos t casillas
+        moved = []
+        moving = 0
+        for t in range(steps, 0, -1):
+            moving += moves_count[t]
+            moved.append(moving)
+        moved.reverse()
+        return moved
+
+    # Modo rápido sin interfaz: avanza num_steps steps sin acciones del agente,
+    # saltando en bloque los tramos en que es exacto. Retorna el total de movimientos.
+    # Si no se puede saltar, se espera cada vez más steps antes de volver a revisar
+    # para no pagar la revisión en cada step con tráfico denso. Cerca de un spawn no se
+    # revisa (ver SKIP_MIN_STEPS).
+    def fast_forward(self, num_steps):
+        moved = 0
+        remaining = num_steps
+        check_in = 0
+        backoff = 1
+        while remaining > 0:
+            steps = 0
+            if check_in == 0 and self.steps_until_spawn() > self.SKIP_MIN_STEPS:
+                steps = min(self.skip_ahead_limit(), remaining)
+                if steps > 1:
+                    backoff = 1
+                else:
+                    check_in = backoff
+                    backoff = min(2 * backoff, 32)
+
+            if steps > 1:
+                moved += sum(self.skip_ahead(steps))
+                remaining -= steps
+            else:
+                moved += self.step()
+                remaining -= 1
+                check_in = max(0, check_in - 1)
+        return moved
+
+    # Aplica a la grilla sólo las casillas que cambiaron en este step.
+    # Durante el movimiento la grilla se lee como estaba al inicio del step,
+    # por eso los cambios se acumulan y se aplican aquí.
     def update_grid(self):
-        for i in range(self.grid_size):
-            for j in range(self.grid_size):
-                self.grid[i][j] = 0
+        grid = self.grid
+        for x, y in self._vacated_cells:
+            grid[y, x] = 0
+        for x, y in self._occupied_cells:
+            grid[y, x] = 1
+        if self.trace_cells is not None:
+            # La traza se queda con la lista de este step
+            self.trace_cells.append(self._vacated_cells)
+            self._vacated_cells = []
+        else:
+            self._vacated_cells.clear()
+        self._occupied_cells.clear()
+
+    # Reconstruye la grilla completa desde las posiciones de los vehículos
+    def rebuild_grid(self):
+        self.grid.fill(0)
         for auto in self.vehicles:
-            x,y = auto.get_position()
-            self.grid[y][x] = 1
+            x, y = auto.get_position()
+            self.grid[y, x] = 1
+        self._vacated_cells.clear()
+        self._occupied_cells.clear()
+
     # Para animación visual
     def update(self, dt):
         pass
 
-    def reset(self):
-        # reiniciar el entorno (?
-        return 0
+    def snapshot(self):
+        """
+        Foto del estado (EnvSnapshot): vehículos, semáforo, reloj, contador de spawn, métricas
+        y estado de los sorteos. No guarda la configuración (horario, duración mínima de fase,
+        pesos de la recompensa, enlaces) ni referencias a los vehículos, que se reutilizan:
+        restore la puede cargar muchas veces, en esta intersección o en otra igual.
+        """
+        vehicles = np.array(self.get_vehicle_records(), dtype=np.int16).reshape(-1, 4)
+        counters = tuple(getattr(self, name) for name in SNAPSHOT_FIELDS)
+        light = (self.semaforo.state, self.semaforo.time_since_change)
+        return EnvSnapshot(vehicles, counters, light, self.spawn.get_draw_state(), self.engine_state())
+
+    def restore(self, snapshot, draws=True):
+        """
+        Vuelve al estado de una foto de snapshot. Con draws=True también los sorteos, así
+        que desde la foto se repite el mismo tráfico (para comparar ramas con distintas
+        acciones); con draws=False los sorteos siguen, para partir episodios distintos desde
+        la misma foto. Sin generador propio los sorteos son los del módulo random global.
+        Retorna la intersección.
+        """
+        self.load_state(snapshot.vehicles, snapshot.engine)
+        for name, value in zip(SNAPSHOT_FIELDS, snapshot.counters):
+            setattr(self, name, value)
+        self.semaforo.state, self.semaforo.time_since_change = snapshot.light
+        if draws:
+            self.spawn.set_draw_state(snapshot.draws)
+        return self
+
+    # Estado del motor que no se deduce de las posiciones de los vehículos (ver EnvSnapshot)
+    def engine_state(self):
+        return None
+
+    # Carga los vehículos de una foto; los actuales vuelven al spawner para reutilizarlos
+    def load_state(self, vehicles, engine=None):
+        for auto in self.vehicles:
+            self.spawn.release_vehicle(auto)
+        self.vehicles = [self.spawn.spawn_vehicle((x, y), DIRECTIONS[code], image)
+                         for x, y, code, image in vehicles.tolist()]
+        self.rebuild_lanes()
+        self.rebuild_grid()
+
+    # Pone en cero las métricas (autos que salieron, cambios de fase, ...), por ejemplo tras
+    # precalentar el tráfico de una foto
+    def reset_metrics(self):
+        for name in METRIC_FIELDS:
+            setattr(self, name, 0)
+
+    # Reinicia el entorno sin crear uno nuevo: con foto, la restaura sin sus sorteos (ver
+    # restore); sin foto, calle vacía a la hora dada con el semáforo en verde norte-sur.
+    # Los sorteos siguen como en una intersección nueva con el mismo generador.
+    # Retorna el estado inicial.
+    def reset(self, snapshot=None, hour=7):
+        if snapshot is None:
+            counters = (hour * 3600 % SECONDS_PER_DAY,) + (0,) * (len(SNAPSHOT_FIELDS) - 1)
+            snapshot = EnvSnapshot(np.zeros((0, 4), dtype=np.int16), counters, (0, 0.0), None, None)
+        self.restore(snapshot, draws=False)
+        self.spawn.discard_draws()
+        return self.get_state()
 
     def apply_action(self, action):
         # action: 0 = mantener fase actual, 1 = cambiar fase
@@ -284,11 +662,18 @@ class Intersection:
             changed = self.semaforo.change_state()
             if changed:
                 self.phase_changes += 1
+            else:
+                self.refused_phase_changes += 1
             return changed
         else:
             # Mantener fase actual (no hacer nada)
             return False
 
+    # Registra `count` pedidos de cambio rechazados con el semáforo bloqueado, como apply_action(1),
+    # por ejemplo los de un salto con skip_ahead_limit(phase_locked=True)
+    def refuse_phase_changes(self, count):
+        self.refused_phase_changes += count
+
     # Para DEBUG
     def __repr__(self):
         waiting = self.get_waiting_vehicles_count()
@@ -0,0 +1,556 @@
+import heapq
+from collections import deque
+from itertools import islice
+import numpy as np
+from backend.interseccion import Intersection, BLOCKERS, ZONE_WAITING, ZONE_BOX, ZONE_PASSED
+from backend.interseccion_numpy import VehicleView
+from backend.vehiculo import DIRECTIONS, DIRECTION_CODES, DELTAS
+
+# Eventos de un auto en la cola de prioridad
+STOP = 0   # deja de avanzar: quedó pegado al auto detenido de adelante
+START = 1  # vuelve a avanzar: el auto de adelante avanzó en el step anterior
+CROSS = 2  # está en la línea de detención: cruza si tiene verde y el cruce está libre
+EXIT = 3   # sale de la grilla
+
+
+class LaneVehicle:
+    """
+    Auto del motor por eventos. En vez de su casilla guarda su avance en la pista
+    (casillas desde la entrada) en un step de referencia: detenido se queda ahí y en
+    movimiento avanza una casilla por step, así que su posición en cualquier step se
+    calcula sin recorrerlo. Cada auto tiene a lo más un evento pendiente.
+    """
+
+    __slots__ = ('seq', 'direction', 'code', 'image', 'p', 't', 'moving', 'crossed', 'ahead', 'behind',
+                 'version', 'kind', 'when', 'resume')
+
+    def __init__(self, seq, direction, image, t):
+        self.seq = seq  # Orden en la lista de vehículos del motor original
+        self.direction = direction
+        self.code = DIRECTION_CODES[direction]
+        self.image = image
+        self.p = 0
+        self.t = t
+        self.moving = False
+        self.crossed = False  # Ya pasó la línea de detención (no vuelve a detenerse)
+        # Autos de adelante y de atrás en la pista
+        self.ahead = None
+        self.behind = None
+        # Evento pendiente; los que quedan en la cola con otra versión se descartan
+        self.version = 0
+        self.kind = None
+        self.when = None
+        # Step en que vuelve a avanzar tras el STOP pendiente
+        self.resume = None
+
+    # Avance en la pista al terminar el step t
+    def position(self, t):
+        return self.p + t - self.t if self.moving else self.p
+
+    def __repr__(self):
+        state = 'avanza' if self.moving else 'detenido'
+        return f"LaneVehicle(seq={self.seq}, dir={self.direction}, p={self.p}, t={self.t}, {state})"
+
+
+# Copia de los autos por seq con sus enlaces ahead/behind apuntando a las copias
+def copy_cars(cars):
+    copies = {}
+    for seq, auto in cars.items():
+        clone = copies[seq] = LaneVehicle.__new__(LaneVehicle)
+        for name in LaneVehicle.__slots__:
+            setattr(clone, name, getattr(auto, name))
+    for clone in copies.values():
+        if clone.ahead is not None:
+            clone.ahead = copies[clone.ahead.seq]
+        if clone.behind is not None:
+            clone.behind = copies[clone.behind.seq]
+    return copies
+
+
+class EventIntersection(Intersection):
+    """
+    Motor de simulación por eventos discretos. En vez de mover cada auto en cada step,
+    agenda en una cola de prioridad los únicos momentos en que algo cambia:
+    - spawns (según el horario de SpawnVehicle, ver steps_until_spawn)
+    - llegadas a la línea de detención, donde el auto cruza o se detiene según el
+      semáforo y los autos que siguen en el cruce
+    - detenciones detrás de una cola y partidas cuando avanza el auto de adelante
+    - salidas de la grilla
+    Entre dos eventos todos los autos en movimiento avanzan una casilla por step, así que
+    el motor salta directo al siguiente: el costo depende de la cantidad de eventos y no
+    de los steps ni de los autos en la grilla.
+
+    Reproduce exactamente las trayectorias, métricas y sorteos de Intersection con la
+    misma semilla. Se apoya en que las pistas sólo interactúan en la línea de detención:
+    - un auto avanza si la casilla siguiente estaba libre al inicio del step, así que en
+      una cola detenida cada auto parte un step después que el de adelante
+    - pasada la línea nunca se detiene (va separado del de adelante) y sale del cruce y
+      de la grilla en steps conocidos
+    - un auto en la línea ve al cruce después de mover a los autos anteriores en la
+      lista, por eso el orden `seq` decide el empate cuando un auto que lo bloquea sale
+      del cruce en el mismo step
+    Los cambios del semáforo (apply_action) reagendan a los autos detenidos en la línea.
+
+    step(), fast_forward() y skip_ahead() funcionan como en Intersection; advance() avanza
+    hasta el siguiente punto de decisión del agente (cuando cambia get_state).
+    """
+
+    # Métodos cronometrados al activar la instrumentación (ver backend/profiler.py)
+    PROFILED_METHODS = ('step', 'spawn_vehicle', 'get_state', 'calculate_reward', 'skip_ahead_limit',
+                        'skip_ahead', 'fast_forward', 'advance')
+
+    def __init__(self, grid_size=40, rng=None):
+        self._events = []
+        self._time = 0  # Steps simulados
+        self._moving = 0  # Autos que avanzan en el step en curso
+        self._waiting = 0  # Autos antes de la línea de detención
+        self._next_seq = 0
+        # Autos en la grilla por seq, en el orden de la lista de vehículos del motor original
+        self._cars = {}
+        self._exited_cells = None
+
+        super().__init__(grid_size, rng)
+
+        # Geometría de las pistas en avance desde la entrada
+        self._stop = self.border_offset - 1  # Línea de detención (igual en las cuatro pistas)
+        self._origins = {}
+        for direction in BLOCKERS:
+            self._origins[direction] = self.spawn.get_spawn_position(direction, self.center_cell, grid_size)
+        # Steps desde que un auto cruza la línea hasta que sale del cruce y hasta que sale de la grilla
+        code = DIRECTION_CODES['norte']
+        x, y = self._origins['norte']
+        dx, dy = DELTAS[code]
+        passed = self._stop + 1
+        while passed < grid_size - 1 and self.get_zone('norte', x + passed * dx, y + passed * dy) != ZONE_PASSED:
+            passed += 1
+        self._box_steps = passed - self._stop - 1
+        self._exit_steps = grid_size - 1 - self._stop
+
+        # Por pista: último auto, primer auto antes de la línea y (step en que sale del cruce, seq)
+        # de los que ya cruzaron, del primero al último
+        self._last = dict.fromkeys(BLOCKERS)
+        self._head = dict.fromkeys(BLOCKERS)
+        self._crossed = {direction: deque() for direction in BLOCKERS}
+
+    # Lista de vehículos como vistas, para el frontend y código que itera vehículos
+    @property
+    def vehicles(self):
+        return [VehicleView(x, y, DIRECTIONS[code], image) for x, y, code, image in self.get_vehicle_records()]
+
+    # Intersection.__init__ parte con la lista vacía; el motor no carga vehículos
+    # con posiciones dadas porque su estado incluye en qué step parte cada auto
+    @vehicles.setter
+    def vehicles(self, vehicles):
+        if vehicles:
+            raise ValueError("EventIntersection no carga vehículos existentes")
+
+    # La grilla de ocupación se arma desde las posiciones al leerla
+    @property
+    def grid(self):
+        grid = np.zeros((self.grid_size, self.grid_size), dtype=np.uint8)
+        for x, y, _, _ in self.get_vehicle_records():
+            grid[y, x] = 1
+        return grid
+
+    @grid.setter
+    def grid(self, grid):
+        if grid.any():
+            raise ValueError("EventIntersection no carga una grilla ocupada")
+
+    # Estado del motor para una foto (ver Intersection.snapshot): copia de los autos con su
+    # evento pendiente, primer y último auto de cada pista por seq, los que cruzaron y los contadores
+    def engine_state(self):
+        return (self._time, self._moving, self._waiting, self._next_seq, copy_cars(self._cars),
+                {direction: auto and auto.seq for direction, auto in self._last.items()},
+                {direction: auto and auto.seq for direction, auto in self._head.items()},
+                {direction: tuple(crossed) for direction, crossed in self._crossed.items()},
+                [dict(counts) for counts in self.zone_counts])
+
+    # Carga una foto de este motor; las posiciones solas no bastan (como en el setter de vehicles),
+    # salvo con la calle vacía. La cola de eventos se arma con el evento pendiente de cada auto.
+    def load_state(self, vehicles, engine=None):
+        if engine is None:
+            if len(vehicles):
+                raise ValueError("EventIntersection sólo carga fotos tomadas con EventIntersection")
+            engine = (0, 0, 0, 0, {}, dict.fromkeys(BLOCKERS), dict.fromkeys(BLOCKERS),
+                      dict.fromkeys(BLOCKERS, ()), [dict.fromkeys(BLOCKERS, 0) for _ in range(3)])
+        self._time, self._moving, self._waiting, self._next_seq, cars, last, head, crossed, zone_counts = engine
+        self._cars = copy_cars(cars)
+        self._last = {direction: self._cars.get(seq) for direction, seq in last.items()}
+        self._head = {direction: self._cars.get(seq) for direction, seq in head.items()}
+        self._crossed = {direction: deque(entries) for direction, entries in crossed.items()}
+        self.zone_counts = [dict(counts) for counts in zone_counts]
+        self._events = [(auto.when, auto.seq, auto.version, auto) for auto in self._cars.values() if auto.kind is not None]
+        heapq.heapify(self._events)
+
+    def get_vehicle_count(self):
+        return len(self._cars)
+
+    def get_vehicle_records(self, start=0):
+        t = self._time
+        records = []
+        for auto in islice(self._cars.values(), start, None):
+            p = auto.position(t)
+            x, y = self._origins[auto.direction]
+            dx, dy = DELTAS[auto.code]
+            records.append((x + p * dx, y + p * dy, auto.code, auto.image))
+        return records
+
+    def get_position(self, x, y):
+        return int(self.grid[y, x])
+
+    def get_waiting_vehicles_count(self):
+        return self._waiting
+
+    # Actualiza los contadores del cruce y de los que ya pasaron (sólo se llevan al día al pedirlos)
+    def _sync_zones(self):
+        for direction, crossed in self._crossed.items():
+            in_box = 0
+            for box_exit, _ in reversed(crossed):
+                if box_exit <= self._time:
+                    break
+                in_box += 1
+            self.zone_counts[ZONE_BOX][direction] = in_box
+            self.zone_counts[ZONE_PASSED][direction] = len(crossed) - in_box
+
+    def get_vehicles_in_intersection(self):
+        self._sync_zones()
+        vehicles = []
+        records = {}
+        for (x, y, code, image), auto in zip(self.get_vehicle_records(), self._cars.values()):
+            records[auto.seq] = VehicleView(x, y, DIRECTIONS[code], image)
+        for direction in BLOCKERS:
+            in_box = self.zone_counts[ZONE_BOX][direction]
+            if in_box:
+                passed = self.zone_counts[ZONE_PASSED][direction]
+                vehicles.extend(records[seq] for _, seq in islice(self._crossed[direction], passed, passed + in_box))
+        return vehicles
+
+    def can_cross(self, vehiculo):
+        self._sync_zones()
+        return super().can_cross(vehiculo)
+
+    # Agrega un vehículo en la entrada de `direction` entre dos steps (o durante el spawn,
+    # que lee la grilla del step anterior). Retorna si pudo entrar.
+    def add_vehicle(self, direction, image=None):
+        t = self._time
+        last = self._last[direction]
+        gap = last.position(t) if last is not None else None
+        if gap == 0:
+            return False
+
+        auto = LaneVehicle(self._next_seq, direction, self.spawn.draw_image() if image is None else image, t)
+        self._next_seq += 1
+        self._cars[auto.seq] = auto
+        if self.trace_new is not None:
+            self.trace_new.append((*self._origins[direction], auto.code, auto.image))
+        auto.ahead = last
+        if last is not None:
+            last.behind = auto
+        self._last[direction] = auto
+        if self._head[direction] is None:
+            self._head[direction] = auto
+        self.zone_counts[ZONE_WAITING][direction] += 1
+        self._waiting += 1
+
+        if gap == 1:
+            # Pegado al de adelante: avanza en el step siguiente al que avance ese auto
+            if last.moving:
+                self._schedule(auto, START, t + 2)
+        else:
+            auto.moving = True
+            self._moving += 1
+            self._plan(auto)
+        return True
+
+    def _schedule(self, auto, kind, when):
+        auto.version += 1
+        auto.kind = kind
+        auto.when = when
+        heapq.heappush(self._events, (when, auto.seq, auto.version, auto))
+
+    def _cancel(self, auto):
+        auto.version += 1
+        auto.kind = auto.when = None
+
+    # Próximo evento de un auto en movimiento que no ha cruzado: se detiene al quedar pegado
+    # al auto detenido de adelante, o llega a la línea de detención
+    def _plan(self, auto):
+        auto.resume = None
+        ahead = auto.ahead
+        if ahead is not None and not ahead.moving:
+            self._schedule(auto, STOP, auto.t + ahead.p - auto.p)
+        else:
+            self._schedule(auto, CROSS, auto.t + self._stop - auto.p + 1)
+
+    # `auto` avanzó en el step `step` después de estar detenido: el de atrás lo sigue
+    def _started(self, auto, step):
+        follower = auto.behind
+        if follower is None:
+            return
+        if not follower.moving:
+            if follower.kind is None:
+                self._schedule(follower, START, step + 1)
+        elif follower.kind == STOP:
+            if follower.when <= step:
+                # Alcanza a quedar pegado antes de que avance: se detiene y parte un step después
+                follower.resume = step + 1
+            else:
+                self._plan(follower)
+
+    # `auto` no avanzó en el step `step` y quedó detenido: el de atrás se detendrá detrás
+    def _stopped(self, auto, step):
+        follower = auto.behind
+        if follower is None:
+            return
+        if follower.moving:
+            self._plan(follower)
+        elif follower.kind == START and follower.when == step + 1:
+            # Esa partida suponía que `auto` avanzaba en este step
+            self._cancel(follower)
+
+    # Step desde el que `auto`, en la línea de detención, no tiene autos que lo bloqueen en
+    # el cruce. Los bloqueadores ya están adentro (tienen luz roja): el último de cada pista
+    # sale al final; si sale en el step mismo, `auto` lo ve afuera sólo si va antes en la lista.
+    def _box_clear_step(self, auto, step):
+        clear = step
+        for blocker in BLOCKERS[auto.direction]:
+            crossed = self._crossed[blocker]
+            if crossed:
+                box_exit, seq = crossed[-1]
+                if seq > auto.seq:
+                    box_exit += 1
+                clear = max(clear, box_exit)
+        return clear
+
+    def _on_stop(self, auto, step):
+        auto.p += step - 1 - auto.t
+        auto.t = step - 1
+        auto.moving = False
+        self._moving -= 1
+        self._cancel(auto)
+        if auto.resume is not None:
+            self._schedule(auto, START, auto.resume)
+            auto.resume = None
+        self._stopped(auto, step)
+
+    def _on_start(self, auto, step):
+        auto.t = step - 1
+        auto.moving = True
+        self._moving += 1
+        self._plan(auto)
+        self._started(auto, step)
+
+    def _on_cross(self, auto, step):
+        clear = self._box_clear_step(auto, step) if self.semaforo.is_green(auto.direction) else None
+        if clear is None or clear > step:
+            # Espera en la línea: si tiene verde vuelve a intentar cuando se libere el cruce,
+            # si no, cuando cambie el semáforo (ver apply_action)
+            self._cancel(auto)
+            if auto.moving:
+                auto.p = self._stop
+                auto.t = step - 1
+                auto.moving = False
+                self._moving -= 1
+                self._stopped(auto, step)
+            if clear is not None:
+                self._schedule(auto, CROSS, clear)
+            return
+
+        started = not auto.moving
+        if started:
+            auto.p = self._stop
+            auto.t = step - 1
+            auto.moving = True
+            self._moving += 1
+        direction = auto.direction
+        auto.crossed = True
+        self._head[direction] = auto.behind
+        self.zone_counts[ZONE_WAITING][direction] -= 1
+        self._waiting -= 1
+        self._crossed[direction].append((step + self._box_steps, auto.seq))
+        self._schedule(auto, EXIT, step + self._exit_steps)
+        if started:
+            self._started(auto, step)
+
+    def _on_exit(self, auto, step):
+        direction = auto.direction
+        self._moving -= 1
+        self._crossed[direction].popleft()
+        follower = auto.behind
+        if follower is not None:
+            follower.ahead = None
+        if self._last[direction] is auto:
+            self._last[direction] = None
+        del self._cars[auto.seq]
+        if self._exited_cells is not None:
+            x, y = self._origins[direction]
+            dx, dy = DELTAS[auto.code]
+            edge = self.grid_size - 1
+            self._exited_cells.append((x + edge * dx, y + edge * dy))
+        if self.exit_queue is not None:
+            self.exit_queue.append((direction, auto.image))
+        self.exited_vehicles += 1
+
+    # Casillas que se liberan en el step `step` (para la traza): las de los autos que avanzan
+    def _vacated(self, step):
+        cells = self._exited_cells
+        for auto in self._cars.values():
+            if auto.moving:
+                p = auto.position(step - 1)
+                x, y = self._origins[auto.direction]
+                dx, dy = DELTAS[auto.code]
+                cells.append((x + p * dx, y + p * dy))
+        return cells
+
+    def _run(self, steps, runs, levels=None):
+        """
+        Avanza hasta `steps` steps procesando los eventos en orden de step (y, dentro del
+        step, en el orden de la lista de vehículos). Agrega a `runs` tramos
+        (steps, movidos, esperando, vehículos) con valores iguales en todos sus steps.
+        Con `levels` (de get_traffic_levels) se detiene tras el primer step en que cambian.
+        Retorna la cantidad de steps avanzados.
+        """
+        events = self._events
+        start = synced = self._time
+        end = start + steps
+        next_spawn = start + self.steps_until_spawn()
+        tracing = self.trace_cells is not None
+        handlers = (self._on_stop, self._on_start, self._on_cross, self._on_exit)
+        while self._time < end:
+            step = self._time + 1
+            upcoming = min(next_spawn, events[0][0]) if events else next_spawn
+            if upcoming > step and not tracing:
+                # Ningún evento: todos los autos en movimiento avanzan, nada más cambia
+                quiet = min(upcoming, end + 1) - step
+                self._time += quiet
+                runs.append((quiet, self._moving, self._waiting, len(self._cars)))
+                continue
+
+            if tracing:
+                self._exited_cells = []
+            while events and events[0][0] == step:
+                _, _, version, auto = heapq.heappop(events)
+                if version == auto.version:
+                    handlers[auto.kind](auto, step)
+            if step == next_spawn:
+                # El spawn ocurre antes de mover, pero sólo lee las posiciones del step anterior
+                # y depende de si el último auto de la pista avanza en este step.
+                # El reloj y el contador de spawn se ponen al día sólo aquí y al terminar
+                self.advance_clock(step - synced)
+                synced = step
+                self.spawn_vehicle()
+                self.spawn_counter = 0
+                next_spawn = step + self.steps_until_spawn()
+            if tracing:
+                self.trace_cells.append(self._vacated(step))
+                self._exited_cells = None
+
+            self._time = step
+            runs.append((1, self._moving, self._waiting, len(self._cars)))
+            if levels is not None and self.get_traffic_levels() != levels:
+                break
+
+        self.advance_clock(self._time - synced)
+        self.spawn_counter += self._time - synced
+        self.semaforo.update(self._time - start)
+        return self._time - start
+
+    def step(self):
+        runs = []
+        self._run(1, runs)
+        return runs[0][1]
+
+    def fast_forward(self, num_steps):
+        runs = []
+        self._run(num_steps, runs)
+        return sum(steps * moved for steps, moved, _, _ in runs)
+
+    # Steps hasta el próximo spawn, cruce de la línea o salida de la grilla (ver
+    # Intersection.skip_ahead_limit): en ellos no cambian los autos esperando ni los autos
+    # en la grilla. Sólo revisa el primer auto de cada pista antes y después de la línea.
+    # El primero antes de la línea que va a partir llega a la línea stop - p steps después
+    # de partir (ver _plan: adelante sólo tiene autos que ya cruzaron, que no se detienen).
+    def skip_ahead_limit(self, phase_locked=False):
+        limit = self.steps_until_spawn() - 1
+        if phase_locked:
+            limit = min(limit, self.semaforo.locked_steps())
+        for direction in BLOCKERS:
+            head = self._head[direction]
+            if head is not None and head.kind == START:
+                limit = min(limit, head.when + self._stop - head.p - self._time - 1)
+            for auto in (head, self._crossed[direction] and self._cars[self._crossed[direction][0][1]]):
+                if auto and auto.kind in (CROSS, EXIT):
+                    limit = min(limit, auto.when - self._time - 1)
+        return limit if limit > 1 else 0
+
+    def skip_ahead(self, steps):
+        runs = []
+        # Como en los otros motores, los steps saltados no dejan casillas en la traza (el
+        # registro toma un keyframe después del salto)
+        cells, self.trace_cells = self.trace_cells, None
+        self._run(steps, runs)
+        self.trace_cells = cells
+        moved = []
+        for count, moving, _, _ in runs:
+            moved.extend([moving] * count)
+        return moved
+
+    def apply_action(self, action):
+        changed = super().apply_action(action)
+        if changed:
+            # Los autos detenidos en la línea con luz verde intentan cruzar en el step siguiente
+            for direction in self.semaforo.get_green_directions():
+                auto = self._head[direction]
+                if auto is not None and not auto.moving and auto.p == self._stop and auto.kind is None:
+                    self._schedule(auto, CROSS, self._time + 1)
+        return changed
+
+    # Steps hasta que cambie la categoría de tiempo del semáforo en get_state
+    def _steps_until_time_category(self):
+        elapsed = self.semaforo.time_since_change
+        for limit in (10, 20):
+            if elapsed <= limit:
+                return int(limit - elapsed) + 1
+        return None
+
+    def advance(self, action, max_steps):
+        """
+        Repite apply_action(action) y step() hasta que cambie el estado que ve el agente
+        (get_state) o se completen `max_steps` steps, saltando entre eventos. Equivale a
+        consultar en cada step a una política que decide sólo según el estado (como
+        QLearning sin exploración y sin empates): el agente decide de nuevo sólo en los
+        puntos en que su estado cambió.
+
+        Retorna tramos (steps, movidos, esperando, vehículos) con los valores de cada step
+        del tramo, lo que habrían dado step(), get_waiting_vehicles_count() y
+        get_vehicle_count(); la recompensa de cada step es
+        step_reward(action, movidos, esperando).
+        """
+        runs = []
+        remaining = max_steps
+        state = self.get_state()
+        while remaining > 0:
+            if action == 1 and self.semaforo.can_change_state():
+                # El cambio de fase cambia el estado
+                self.apply_action(1)
+                self._run(1, runs)
+                return runs
+            steps = remaining
+            category = self._steps_until_time_category()
+            if category is not None:
+                steps = min(steps, category)
+            if action == 1:
+                # apply_action(1) se rechaza en cada step hasta que se libera el semáforo
+                steps = min(steps, self.semaforo.locked_steps())
+            done = self._run(steps, runs, self.get_traffic_levels())
+            if action == 1:
+                self.refused_phase_changes += done
+            remaining -= done
+            if self.get_state() != state:
+                break
+        return runs
+
+    def __repr__(self):
+        return (f"EventIntersection(grid={self.grid_size}x{self.grid_size}, vehicles={len(self._cars)}, "
+                f"waiting={self._waiting}, events={len(self._events)})")
@@ -0,0 +1,356 @@
+import numpy as np
+from backend.interseccion import Intersection
+from backend.vehiculo import DIRECTIONS, DIRECTION_CODES, DELTAS
+
+# Desplazamiento (dx, dy) por código de dirección (ver backend/vehiculo.py)
+DX = np.array([dx for dx, _ in DELTAS], dtype=np.int64)
+DY = np.array([dy for _, dy in DELTAS], dtype=np.int64)
+
+
+class VehicleView:
+    """
+    Vista de sólo lectura de un vehículo guardado en los arreglos del motor NumPy.
+    Expone la misma interfaz que Vehiculo para el frontend y las métricas.
+    """
+
+    __slots__ = ('_position', '_direction', 'image')
+
+    def __init__(self, x, y, direction, image):
+        self._position = (x, y)
+        self._direction = direction
+        self.image = image
+
+    def get_position(self):
+        return self._position
+
+    def get_direction(self):
+        return self._direction
+
+    def __repr__(self):
+        return f"VehicleView(pos={self._position}, dir={self._direction}, image={self.image})"
+
+
+class NumpyIntersection(Intersection):
+    """
+    Motor alternativo de Intersection que guarda el estado de los vehículos en
+    arreglos NumPy (posición, código de dirección e imagen) y mueve todas las
+    pistas con operaciones vectorizadas.
+
+    Reproduce exactamente las trayectorias del motor original con la misma semilla:
+    - la grilla se lee como estaba al inicio del movimiento (más el auto recién creado)
+    - los autos en la línea de detención se resuelven en el orden de la lista,
+      viendo las posiciones ya actualizadas de los autos anteriores
+    """
+
+    # Con arreglos una revisión que falla cuesta más que un step: sólo se intenta saltar
+    # con spawns espaciados, como en la madrugada
+    SKIP_MIN_STEPS = 6
+
+    def __init__(self, grid_size=40, rng=None):
+        self._count = 0
+        self._x = np.zeros(0, dtype=np.int64)
+        self._y = np.zeros(0, dtype=np.int64)
+        self._dir = np.zeros(0, dtype=np.int64)
+        self._image = np.zeros(0, dtype=np.int64)
+
+        # Casillas que cambiaron en el step, se aplican en update_grid
+        self._vacated_x = self._vacated_y = np.zeros(0, dtype=np.int64)
+        self._occupied_x = self._occupied_y = np.zeros(0, dtype=np.int64)
+
+        super().__init__(grid_size, rng)
+
+        # Líneas de detención por dirección
+        border_offset = self.border_offset
+        self._stop_line = np.array([self.grid_size - border_offset, border_offset - 1,
+                                    border_offset - 1, self.grid_size - border_offset], dtype=np.int64)
+
+    # Lista de vehículos como vistas, para el frontend y código que itera vehículos
+    @property
+    def vehicles(self):
+        n = self._count
+        return [VehicleView(x, y, DIRECTIONS[d], image) for x, y, d, image in
+                zip(self._x[:n].tolist(), self._y[:n].tolist(), self._dir[:n].tolist(), self._image[:n].tolist())]
+
+    # Permite cargar vehículos (Vehiculo o VehicleView) a los arreglos
+    @vehicles.setter
+    def vehicles(self, vehicles):
+        self._count = 0
+        for auto in vehicles:
+            x, y = auto.get_position()
+            self._append(x, y, DIRECTION_CODES[auto.get_direction()], auto.image)
+        self.rebuild_grid()
+
+    # Carga los vehículos de una foto (ver Intersection.snapshot) directo a los arreglos
+    def load_state(self, vehicles, engine=None):
+        n = len(vehicles)
+        if n > len(self._x):
+            for name in ('_x', '_y', '_dir', '_image'):
+                setattr(self, name, np.zeros(max(16, 2 * n), dtype=np.int64))
+        for column, name in enumerate(('_x', '_y', '_dir', '_image')):
+            getattr(self, name)[:n] = vehicles[:, column]
+        self._count = n
+        self.rebuild_grid()
+
+    def get_vehicle_count(self):
+        return self._count
+
+    def get_vehicle_records(self, start=0):
+        n = self._count
+        return np.column_stack((self._x[start:n], self._y[start:n], self._dir[start:n], self._image[start:n]))
+
+    def _append(self, x, y, code, image):
+        n = self._count
+        if n == len(self._x):
+            capacity = max(16, 2 * n)
+            for name in ('_x', '_y', '_dir', '_image'):
+                grown = np.zeros(capacity, dtype=np.int64)
+                grown[:n] = getattr(self, name)[:n]
+                setattr(self, name, grown)
+        self._x[n] = x
+        self._y[n] = y
+        self._dir[n] = code
+        self._image[n] = image
+        self._count = n + 1
+
+    # Consume los sorteos del spawner en el mismo orden que el motor original.
+    def add_vehicle(self, direction, image=None):
+        x, y = self.spawn.get_spawn_position(direction, self.center_cell, self.grid_size)
+        if self.grid[y, x] == 1:
+            return False
+
+        code = DIRECTION_CODES[direction]
+        image = self.spawn.draw_image() if image is None else image
+        self._append(x, y, code, image)
+        if self.trace_new is not None:
+            self.trace_new.append((x, y, code, image))
+        self.grid[y, x] = 1
+        return True
+
+    # Máscara de vehículos esperando antes de la intersección
+    def _waiting_mask(self):
+        n = self._count
+        x = self._x[:n]
+        y = self._y[:n]
+        d = self._dir[:n]
+        return (((d == 0) & (y > self._max_c)) | ((d == 1) & (y < self._min_c)) |
+                ((d == 2) & (x < self._min_c)) | ((d == 3) & (x > self._max_c)))
+
+    def _box_mask(self, x, y):
+        return (x >= self._min_c) & (x <= self._max_c) & (y >= self._min_c) & (y <= self._max_c)
+
+    def get_traffic_levels(self):
+        waiting = self._waiting_mask()
+        counts = np.bincount(self._dir[:self._count][waiting], minlength=4)
+
+        levels = {}
+        for direction, count in zip(DIRECTIONS, counts.tolist()):
+            if count <= 5:
+                levels[direction] = 0  # bajo
+            elif count <= 10:
+                levels[direction] = 1  # medio
+            else:
+                levels[direction] = 2  # alto
+        return levels
+
+    def get_waiting_vehicles_count(self):
+        return int(np.count_nonzero(self._waiting_mask()))
+
+    def can_cross(self, vehiculo):
+        x, y = vehiculo.get_position()
+        code = DIRECTION_CODES[vehiculo.get_direction()]
+
+        # Verificar sólo si el auto está a punto de cruzar
+        if (y if code < 2 else x) != self._stop_line[code]:
+            return True
+
+        n = self._count
+        in_box = self._box_mask(self._x[:n], self._y[:n])
+        return not np.any(in_box & ((self._dir[:n] < 2) != (code < 2)))
+
+    def get_vehicles_in_intersection(self):
+        n = self._count
+        inside = self._box_mask(self._x[:n], self._y[:n])
+        return [VehicleView(int(self._x[i]), int(self._y[i]), DIRECTIONS[self._dir[i]], int(self._image[i]))
+                for i in np.flatnonzero(inside)]
+
+    def move_vehicles(self):
+        n = self._count
+        if n == 0:
+            return 0
+
+        x = self._x[:n]
+        y = self._y[:n]
+        d = self._dir[:n]
+        dx = DX[d]
+        dy = DY[d]
+        target_x = x + dx
+        target_y = y + dy
+
+        # Autos en el borde lejano: salen de la grilla
+        at_edge = (target_x < 0) | (target_x >= self.grid_size) | (target_y < 0) | (target_y >= self.grid_size)
+
+        removed = at_edge
+        active = ~at_edge
+        np.clip(target_x, 0, self.grid_size - 1, out=target_x)
+        np.clip(target_y, 0, self.grid_size - 1, out=target_y)
+        free = self.grid[target_y, target_x] != 1
+
+        is_ns = d < 2
+        at_stop = np.where(is_ns, y, x) == self._stop_line[d]
+
+        # Autos fuera de la línea de detención sólo dependen de la grilla
+        moved = active & free & ~at_stop
+
+        # Autos en la línea de detención: semáforo y cruce libre, en orden de la lista
+        green = is_ns if self.semaforo.state == 0 else ~is_ns
+        candidates = np.flatnonzero(active & free & at_stop & green).tolist()
+        if candidates:
+            index = np.arange(n)
+            in_box_old = self._box_mask(x, y)
+            in_box_new = self._box_mask(x + dx * moved, y + dy * moved)
+            for i in candidates:
+                in_box = np.where(index < i, in_box_new, in_box_old)
+                if not np.any(in_box & (is_ns != is_ns[i])):
+                    moved[i] = True
+                    in_box_new[i] = self._box_mask(target_x[i], target_y[i])
+
+        # Casillas a actualizar en la grilla: origen de los que se mueven o salen, destino de los que se mueven
+        leaving = moved | removed
+        self._vacated_x = x[leaving]
+        self._vacated_y = y[leaving]
+        self._occupied_x = target_x[moved]
+        self._occupied_y = target_y[moved]
+
+        x += dx * moved
+        y += dy * moved
+
+        if removed.any():
+            if self.exit_queue is not None:
+                self.exit_queue.extend(zip([DIRECTIONS[code] for code in d[removed].tolist()],
+                                           self._image[:n][removed].tolist()))
+            keep = np.flatnonzero(~removed)
+            count = len(keep)
+            for name in ('_x', '_y', '_dir', '_image'):
+                array = getattr(self, name)
+                array[:count] = array[keep]
+            self._count = count
+            self.exited_vehicles += n - count
+
+        return int(np.count_nonzero(moved))
+
+    # Geometría de cada auto para skip_ahead: si avanza hacia coordenadas mayores, su posición
+    # en el eje de avance, la distancia a la línea (negativa si ya la pasó) y si avanza libre
+    # (luz verde o ya pasó la línea) en vez de estar en la cola de una luz roja
+    def _skip_geometry(self):
+        n = self._count
+        d = self._dir[:n]
+        is_ns = d < 2
+        forward = (d == 1) | (d == 2)  # sur y este avanzan hacia coordenadas mayores
+        position = np.where(is_ns, self._y[:n], self._x[:n])
+        to_stop = np.where(forward, self._stop_line[d] - position, position - self._stop_line[d])
+        green = is_ns if self.semaforo.state == 0 else ~is_ns
+        return forward, position, to_stop, green | (to_stop < 0)
+
+    # Autos de la cola con luz roja por pista (fila = dirección) y distancia a la línea
+    # (columna), y cuántos tiene cada casilla delante hasta la línea
+    def _queue_cells(self, d, to_stop):
+        cells = np.bincount(d * self.grid_size + to_stop, minlength=4 * self.grid_size).reshape(4, self.grid_size)
+        return cells, np.cumsum(cells, axis=1) - cells
+
+    # Mismas condiciones que Intersection.skip_ahead_limit, revisadas de la más barata a la
+    # más cara para descartar pronto: spawn, autos libres bloqueados, autos libres que llegan
+    # a la línea o al borde y, sólo si hay autos bloqueados en la cola, que estén detenidos
+    def skip_ahead_limit(self, phase_locked=False):
+        limit = self.steps_until_spawn() - 1
+        if phase_locked:
+            limit = min(limit, self.semaforo.locked_steps())
+        n = self._count
+        if limit <= 1 or n == 0:
+            return limit if limit > 1 else 0
+
+        x = self._x[:n]
+        y = self._y[:n]
+        d = self._dir[:n]
+        forward, position, to_stop, free = self._skip_geometry()
+
+        # Casilla siguiente ocupada (en el borde la casilla siguiente es la misma y no cuenta)
+        target_x = np.clip(x + DX[d], 0, self.grid_size - 1)
+        target_y = np.clip(y + DY[d], 0, self.grid_size - 1)
+        blocked = (self.grid[target_y, target_x] != 0) & ((target_x != x) | (target_y != y))
+        if np.any(blocked & free):
+            return 0
+
+        # Autos que avanzan libres: sin llegar al borde ni a la línea
+        if free.any():
+            to_edge = np.where(forward, self.grid_size - 1 - position, position)
+            limit = min(limit, int(to_edge[free].min()))
+            approaching = to_stop[free & (to_stop >= 0)]
+            if len(approaching):
+                limit = min(limit, int(approaching.min()))
+            if limit <= 1:
+                return 0
+
+        # En la cola con luz roja sólo pueden estar bloqueados los autos ya detenidos: los que
+        # tienen ocupadas todas las casillas de delante hasta la línea
+        stuck = blocked & ~free
+        if stuck.any():
+            queued = ~free
+            _, ahead = self._queue_cells(d[queued], to_stop[queued])
+            if np.any(ahead[d[stuck], to_stop[stuck]] != to_stop[stuck]):
+                return 0
+        return limit
+
+    def skip_ahead(self, steps):
+        self.advance_clock(steps)
+        self.spawn_counter += steps
+
+        n = self._count
+        moves = np.full(n, steps, dtype=np.int64)
+        if n:
+            x = self._x[:n]
+            y = self._y[:n]
+            d = self._dir[:n]
+            _, _, to_stop, free = self._skip_geometry()
+
+            # Cola con luz roja: cada auto avanza hasta la línea o detrás del auto de adelante.
+            # Con j = autos delante en la pista: final_j = j + max(0, max_{i<=j}(to_stop_i - steps - i)),
+            # el máximo acumulado a lo largo de la fila de su pista
+            queued = ~free
+            if queued.any():
+                lane = d[queued]
+                queue_stop = to_stop[queued]
+                cells, ahead = self._queue_cells(lane, queue_stop)
+                rank = ahead[lane, queue_stop]
+                slack = np.full(cells.shape, -steps - n, dtype=np.int64)
+                slack[lane, queue_stop] = queue_stop - steps - rank
+                reach = np.maximum.accumulate(slack, axis=1)[lane, queue_stop]
+                moves[queued] = queue_stop - rank - np.maximum(0, reach)
+
+            self.grid[y, x] = 0
+            x += DX[d] * moves
+            y += DY[d] * moves
+            self.grid[y, x] = 1
+
+        self.semaforo.update(steps)
+
+        # En el step t se mueven los autos que avanzan al menos t casillas
+        moved = np.cumsum(np.bincount(moves, minlength=steps + 1)[::-1])[::-1]
+        return moved[1:].tolist()
+
+    def update_grid(self):
+        if self.trace_cells is not None:
+            self.trace_cells.append(self._vacated_y * self.grid_size + self._vacated_x)
+        self.grid[self._vacated_y, self._vacated_x] = 0
+        self.grid[self._occupied_y, self._occupied_x] = 1
+        self._vacated_x = self._vacated_y = self._occupied_x = self._occupied_y = np.zeros(0, dtype=np.int64)
+
+    def rebuild_grid(self):
+        n = self._count
+        self.grid.fill(0)
+        self.grid[self._y[:n], self._x[:n]] = 1
+        self._vacated_x = self._vacated_y = self._occupied_x = self._occupied_y = np.zeros(0, dtype=np.int64)
+
+    # Para DEBUG
+    def __repr__(self):
+        waiting = self.get_waiting_vehicles_count()
+        return f"NumpyIntersection(grid={self.grid_size}x{self.grid_size}, vehicles={self._count}, waiting={waiting})"
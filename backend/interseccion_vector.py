@@ -0,0 +1,318 @@
+import random
+import numpy as np
+from backend.horario import SECONDS_PER_DAY
+from backend.interseccion import Intersection, REWARD_WEIGHTS
+from backend.interseccion_numpy import VehicleView, DX, DY
+from backend.semaforo import Semaforo
+from backend.spawn_vehiculo import SpawnVehicle, DRAW_BLOCK_SIZE
+from backend.vehiculo import DIRECTIONS
+
+
+class VectorIntersection:
+    """
+    Lote de `num_envs` intersecciones independientes guardadas como arreglos NumPy:
+    grilla (B, G, G), vehículos (B, capacidad), fase y tiempo del semáforo (B,).
+
+    step(actions), get_state() y calculate_reward() operan sobre todo el lote y
+    siguen la misma lógica que Intersection. Cada intersección b del lote reproduce
+    exactamente a Intersection(grid_size, rng=rngs[b]):
+    - rng=None: todas sortean con el módulo random global, en orden de b, igual
+      que B intersecciones avanzadas una tras otra
+    - rng=semilla o Generator: se derivan B generadores hijos (SeedSequence.spawn /
+      Generator.spawn); también se puede dar una lista con el rng de cada una
+
+    El reloj y el contador de spawn son comunes: todas avanzan juntas.
+    """
+
+    # Métodos cronometrados al activar la instrumentación (ver backend/profiler.py)
+    PROFILED_METHODS = ('step', 'spawn_vehicles', 'move_vehicles', 'get_state', 'calculate_reward')
+
+    def __init__(self, num_envs, grid_size=40, rng=None):
+        self.num_envs = num_envs
+        self.grid_size = grid_size
+        self.center_cell = grid_size // 2
+
+        self.border_offset = grid_size // 4 + 6
+        self._min_c = self.border_offset
+        self._max_c = grid_size - self.border_offset - 1
+
+        self.grid = np.zeros((num_envs, grid_size, grid_size), dtype=np.uint8)
+
+        # Vehículos de cada intersección en orden de creación (los huecos son autos que salieron)
+        capacity = 64
+        self._x = np.zeros((num_envs, capacity), dtype=np.int64)
+        self._y = np.zeros((num_envs, capacity), dtype=np.int64)
+        self._dir = np.zeros((num_envs, capacity), dtype=np.int64)
+        self._image = np.zeros((num_envs, capacity), dtype=np.int64)
+        self._alive = np.zeros((num_envs, capacity), dtype=bool)
+        self._tail = np.zeros(num_envs, dtype=np.int64)  # Próxima posición libre de cada fila
+
+        # Semáforo de cada intersección
+        semaforo = Semaforo()
+        self.min_state_duration = semaforo.min_state_duration
+        self.light_state = np.full(num_envs, semaforo.state, dtype=np.int64)
+        self.time_since_change = np.full(num_envs, semaforo.time_since_change, dtype=np.float64)
+
+        # Reloj y spawn comunes
+        self.spawn = SpawnVehicle()
+        self.time_of_day = 7 * 3600
+        self.spawn_counter = 0
+
+        # Métricas por intersección
+        self.phase_changes = np.zeros(num_envs, dtype=np.int64)
+        self.refused_phase_changes = np.zeros(num_envs, dtype=np.int64)
+        self.reward_weights = REWARD_WEIGHTS
+        self.blocked_spawns = np.zeros(num_envs, dtype=np.int64)
+        self.exited_vehicles = np.zeros(num_envs, dtype=np.int64)
+
+        # Generadores de cada intersección y sus bloques de sorteos (ver SpawnVehicle)
+        if rng is None:
+            self.rngs = None
+        elif isinstance(rng, (list, tuple)):
+            self.rngs = [np.random.default_rng(r) for r in rng]
+        elif isinstance(rng, np.random.Generator):
+            self.rngs = rng.spawn(num_envs)
+        else:
+            self.rngs = [np.random.default_rng(seed) for seed in np.random.SeedSequence(rng).spawn(num_envs)]
+        self._direction_block = np.zeros((num_envs, DRAW_BLOCK_SIZE), dtype=np.int64)
+        self._uniform_block = np.zeros((num_envs, DRAW_BLOCK_SIZE), dtype=np.float64)
+        self._uniforms_left = np.zeros(num_envs, dtype=np.int64)
+        self._image_block = np.zeros((num_envs, DRAW_BLOCK_SIZE), dtype=np.int64)
+        self._directions_left = np.zeros(num_envs, dtype=np.int64)
+        self._images_left = np.zeros(num_envs, dtype=np.int64)
+
+        # Geometría por código de dirección
+        spawn_positions = [self.spawn.get_spawn_position(direction, self.center_cell, grid_size)
+                           for direction in DIRECTIONS]
+        self._spawn_x = np.array([x for x, _ in spawn_positions], dtype=np.int64)
+        self._spawn_y = np.array([y for _, y in spawn_positions], dtype=np.int64)
+        self._stop_line = np.array([grid_size - self.border_offset, self.border_offset - 1,
+                                    self.border_offset - 1, grid_size - self.border_offset], dtype=np.int64)
+
+    # Reloj simulado común, igual que en Intersection
+    current_hour = Intersection.current_hour
+    current_minute = Intersection.current_minute
+    current_second = Intersection.current_second
+    set_clock = Intersection.set_clock
+
+    # Como Intersection.configure; la duración mínima de fase es común al lote
+    def configure(self, schedule=None, min_state_duration=None, reward_weights=None):
+        if schedule is not None:
+            self.spawn.schedule = schedule
+        if min_state_duration is not None:
+            self.min_state_duration = min_state_duration
+        if reward_weights is not None:
+            self.reward_weights = reward_weights
+        return self
+
+    # Vehículos de la intersección b, en el orden de la lista de Intersection
+    def get_vehicles(self, b):
+        slots = np.flatnonzero(self._alive[b])
+        return [VehicleView(x, y, DIRECTIONS[d], image) for x, y, d, image in
+                zip(self._x[b, slots].tolist(), self._y[b, slots].tolist(),
+                    self._dir[b, slots].tolist(), self._image[b, slots].tolist())]
+
+    def get_vehicle_count(self):
+        return np.count_nonzero(self._alive, axis=1)
+
+    # Sorteos con el módulo random global, intersección por intersección como en Intersection:
+    # dirección y, si la casilla de entrada está libre, imagen
+    def _draw_global(self):
+        codes = np.zeros(self.num_envs, dtype=np.int64)
+        free = np.zeros(self.num_envs, dtype=bool)
+        images = []
+        weights = self.spawn.schedule.weights
+        for b in range(self.num_envs):
+            if weights is None:
+                code = DIRECTIONS.index(random.choice(['norte', 'sur', 'este', 'oeste']))
+            else:
+                code = DIRECTIONS.index(random.choices(DIRECTIONS, cum_weights=weights[self.time_of_day])[0])
+            codes[b] = code
+            if self.grid[b, self._spawn_y[code], self._spawn_x[code]] != 1:
+                free[b] = True
+                images.append(random.randint(1, 5))
+        return codes, free, np.array(images, dtype=np.int64)
+
+    # Sortea una dirección para cada intersección de `envs` con su generador
+    def _draw_directions(self, envs):
+        weights = self.spawn.schedule.weights
+        if weights is not None:
+            # Con los pesos del horario, como SpawnVehicle.draw_weighted_direction
+            for b in envs[self._uniforms_left[envs] == 0].tolist():
+                self._uniform_block[b] = self.rngs[b].random(DRAW_BLOCK_SIZE)
+                self._uniforms_left[b] = DRAW_BLOCK_SIZE
+            self._uniforms_left[envs] -= 1
+            uniforms = self._uniform_block[envs, self._uniforms_left[envs]]
+            return np.searchsorted(weights[self.time_of_day], uniforms, side='right')
+        for b in envs[self._directions_left[envs] == 0].tolist():
+            self._direction_block[b] = self.rngs[b].integers(0, 4, size=DRAW_BLOCK_SIZE)
+            self._directions_left[b] = DRAW_BLOCK_SIZE
+        self._directions_left[envs] -= 1
+        return self._direction_block[envs, self._directions_left[envs]]
+
+    # Sortea una imagen para cada intersección de `envs` con su generador
+    def _draw_images(self, envs):
+        for b in envs[self._images_left[envs] == 0].tolist():
+            self._image_block[b] = self.rngs[b].integers(1, 6, size=DRAW_BLOCK_SIZE)
+            self._images_left[b] = DRAW_BLOCK_SIZE
+        self._images_left[envs] -= 1
+        return self._image_block[envs, self._images_left[envs]]
+
+    # Junta los vehículos vivos al inicio de cada fila (manteniendo el orden) y agranda si hace falta
+    def _make_room(self):
+        order = np.argsort(~self._alive, axis=1, kind='stable')
+        for name in ('_x', '_y', '_dir', '_image', '_alive'):
+            setattr(self, name, np.take_along_axis(getattr(self, name), order, axis=1))
+        self._tail = np.count_nonzero(self._alive, axis=1)
+
+        capacity = self._alive.shape[1]
+        if self._tail.max() == capacity:
+            for name in ('_x', '_y', '_dir', '_image', '_alive'):
+                array = getattr(self, name)
+                grown = np.zeros((self.num_envs, 2 * capacity), dtype=array.dtype)
+                grown[:, :capacity] = array
+                setattr(self, name, grown)
+
+    # Genera un vehículo en cada intersección cuya casilla de entrada esté libre
+    def spawn_vehicles(self):
+        envs = np.arange(self.num_envs)
+        if self.rngs is None:
+            codes, free, images = self._draw_global()
+        else:
+            codes = self._draw_directions(envs)
+            free = self.grid[envs, self._spawn_y[codes], self._spawn_x[codes]] != 1
+            images = self._draw_images(envs[free]) if free.any() else None
+        x = self._spawn_x[codes]
+        y = self._spawn_y[codes]
+
+        self.blocked_spawns += ~free
+        envs = envs[free]
+        if len(envs) == 0:
+            return
+
+        if self._tail[envs].max() == self._alive.shape[1]:
+            self._make_room()
+        slots = self._tail[envs]
+        x = x[free]
+        y = y[free]
+        self._x[envs, slots] = x
+        self._y[envs, slots] = y
+        self._dir[envs, slots] = codes[free]
+        self._image[envs, slots] = images
+        self._alive[envs, slots] = True
+        self._tail[envs] += 1
+        self.grid[envs, y, x] = 1
+
+    def _box_mask(self, x, y):
+        return (x >= self._min_c) & (x <= self._max_c) & (y >= self._min_c) & (y <= self._max_c)
+
+    def _waiting_mask(self):
+        x, y, d = self._x, self._y, self._dir
+        return self._alive & (((d == 0) & (y > self._max_c)) | ((d == 1) & (y < self._min_c)) |
+                              ((d == 2) & (x < self._min_c)) | ((d == 3) & (x > self._max_c)))
+
+    def move_vehicles(self):
+        """
+        Mueve los vehículos de todas las intersecciones, con la lógica de Intersection:
+        la grilla se lee como estaba al inicio del movimiento, y un auto en la línea de
+        detención con luz verde cruza si no quedan autos de la otra fase en el cruce.
+
+        Los autos de la otra fase (con luz roja) no pueden entrar al cruce, sólo salir;
+        en el recorrido en orden de la lista, el auto i los ve ya movidos si van antes
+        que él. Por eso cruza si todos esos autos salen del cruce en este step y van
+        antes que él en la lista.
+        Retorna cuántos autos se movieron en cada intersección.
+        """
+        alive = self._alive
+        x, y, d = self._x, self._y, self._dir
+        dx = DX[d]
+        dy = DY[d]
+        target_x = x + dx
+        target_y = y + dy
+
+        at_edge = alive & ((target_x < 0) | (target_x >= self.grid_size) |
+                           (target_y < 0) | (target_y >= self.grid_size))
+        np.clip(target_x, 0, self.grid_size - 1, out=target_x)
+        np.clip(target_y, 0, self.grid_size - 1, out=target_y)
+        envs = np.arange(self.num_envs)[:, None]
+        free = alive & ~at_edge & (self.grid[envs, target_y, target_x] != 1)
+
+        is_ns = d < 2
+        at_stop = np.where(is_ns, y, x) == self._stop_line[d]
+        moved = free & ~at_stop
+
+        green = is_ns == (self.light_state == 0)[:, None]
+        candidates = free & at_stop & green
+        if candidates.any():
+            blockers = alive & ~green & self._box_mask(x, y)
+            still_inside = (blockers & self._box_mask(x + dx * moved, y + dy * moved)).any(axis=1)
+            slots = np.arange(alive.shape[1])
+            last_blocker = np.where(blockers, slots, -1).max(axis=1)
+            moved |= candidates & ~still_inside[:, None] & (slots > last_blocker[:, None])
+
+        # Grilla: liberar el origen de los que se mueven o salen, ocupar el destino de los que se mueven
+        leaving_env, leaving_slot = np.nonzero(moved | at_edge)
+        self.grid[leaving_env, y[leaving_env, leaving_slot], x[leaving_env, leaving_slot]] = 0
+        moved_env, moved_slot = np.nonzero(moved)
+        self.grid[moved_env, target_y[moved_env, moved_slot], target_x[moved_env, moved_slot]] = 1
+
+        self._x = np.where(moved, target_x, x)
+        self._y = np.where(moved, target_y, y)
+        self._alive = alive & ~at_edge
+        self.exited_vehicles += np.count_nonzero(at_edge, axis=1)
+        return np.count_nonzero(moved, axis=1)
+
+    def advance_clock(self):
+        self.time_of_day = (self.time_of_day + 1) % SECONDS_PER_DAY
+
+    # Avanza todas las intersecciones un step; `actions` (opcional) se aplica antes.
+    # Retorna cuántos autos se movieron en cada intersección.
+    def step(self, actions=None):
+        if actions is not None:
+            self.apply_action(actions)
+        self.advance_clock()
+
+        self.spawn_counter += 1
+        if self.spawn_counter >= self.spawn.schedule.interval[self.time_of_day]:
+            self.spawn_vehicles()
+            self.spawn_counter = 0
+
+        moved = self.move_vehicles()
+        self.time_since_change += 1
+        return moved
+
+    # action: 0 = mantener fase, 1 = cambiar fase (si pasó el tiempo mínimo). Retorna qué fases cambiaron.
+    def apply_action(self, actions):
+        requested = np.broadcast_to(np.asarray(actions) == 1, (self.num_envs,))
+        changed = requested & (self.time_since_change >= self.min_state_duration)
+        self.light_state = np.where(changed, 1 - self.light_state, self.light_state)
+        self.time_since_change[changed] = 0.0
+        self.phase_changes += changed
+        self.refused_phase_changes += requested & ~changed
+        return changed
+
+    # Autos esperando antes del cruce por intersección y dirección, forma (B, 4)
+    def get_waiting_counts(self):
+        waiting = self._waiting_mask()
+        return np.stack([np.count_nonzero(waiting & (self._dir == code), axis=1) for code in range(4)], axis=1)
+
+    def get_waiting_vehicles_count(self):
+        return np.count_nonzero(self._waiting_mask(), axis=1)
+
+    # Estados de todas las intersecciones como arreglo (B, 6), en el orden de Intersection.get_state
+    def get_state(self):
+        counts = self.get_waiting_counts()
+        levels = (counts > 5).astype(np.int64) + (counts > 10)
+        time_category = (self.time_since_change > 10).astype(np.int64) + (self.time_since_change > 20)
+        return np.column_stack([levels, self.light_state, time_category])
+
+    def calculate_reward(self, actions, moved):
+        weights = self.reward_weights
+        raw_reward = (-weights.wait_penalty * self.get_waiting_vehicles_count() + weights.pass_reward * np.asarray(moved)
+                      - weights.change_penalty * (np.asarray(actions) == 1))
+        return np.clip(raw_reward, -weights.reward_limit, weights.reward_limit)
+
+    # Para DEBUG
+    def __repr__(self):
+        return (f"VectorIntersection(envs={self.num_envs}, grid={self.grid_size}x{self.grid_size}, "
+                f"vehicles={int(self.get_vehicle_count().sum())})")
@@ -0,0 +1,125 @@
+import json
+import time
+
+
+class Profiler:
+    """
+    Instrumentación opcional del simulador: tiempo y cantidad de llamadas por método,
+    contadores y muestras (promedio y máximo), resumidos por episodio.
+
+    instrument() reemplaza en el objeto (no en la clase) los métodos de su lista
+    PROFILED_METHODS por versiones cronometradas, así que sin profiler no hay costo.
+    Los tiempos son inclusivos: Intersection.step incluye a move_vehicles, que
+    incluye a can_cross.
+    """
+
+    def __init__(self, path=None):
+        # Archivo JSON lines donde se agrega el resumen de cada episodio (opcional)
+        self.path = path
+
+        self.timings = {}   # nombre -> [segundos, llamadas]
+        self.counters = {}  # nombre -> valor
+        self.samples = {}   # nombre -> [suma, cantidad, máximo]
+        self.episodes = []
+        self.episode_start = time.perf_counter()
+
+    # Cronometra los métodos de `obj` (por defecto los de obj.PROFILED_METHODS)
+    def instrument(self, obj, methods=None, prefix=None):
+        prefix = prefix or type(obj).__name__
+        for name in methods if methods is not None else obj.PROFILED_METHODS:
+            method = getattr(obj, name)
+            setattr(obj, name, self.timed(f"{prefix}.{name}", method))
+        return obj
+
+    # Versión de `function` que acumula su tiempo y llamadas bajo `name`
+    def timed(self, name, function):
+        entry = self.timings.setdefault(name, [0.0, 0])
+        perf_counter = time.perf_counter
+
+        def timed_function(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                entry[0] += perf_counter() - start
+                entry[1] += 1
+
+        timed_function.__wrapped__ = function
+        return timed_function
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    # Registra un valor observado (por ejemplo, autos en la grilla) `weight` veces
+    def sample(self, name, value, weight=1):
+        entry = self.samples.get(name)
+        if entry is None:
+            self.samples[name] = [value * weight, weight, value]
+        else:
+            entry[0] += value * weight
+            entry[1] += weight
+            if value > entry[2]:
+                entry[2] = value
+
+    def start_episode(self):
+        self.episode_start = time.perf_counter()
+
+    def end_episode(self, **counters):
+        """
+        Cierra el episodio actual y retorna su resumen:
+            {'episode', 'seconds', 'timings': {nombre: {'seconds', 'calls'}},
+             'counters': {...}, 'samples': {nombre: {'mean', 'max'}}}
+        Los contadores dados se agregan a los registrados con count().
+        Los acumuladores se reinician para el episodio siguiente.
+        """
+        for name, value in counters.items():
+            self.count(name, value)
+
+        summary = {
+            'episode': len(self.episodes),
+            'seconds': time.perf_counter() - self.episode_start,
+            'timings': {name: {'seconds': seconds, 'calls': calls}
+                        for name, (seconds, calls) in self.timings.items() if calls},
+            'counters': dict(self.counters),
+            'samples': {name: {'mean': total / count, 'max': maximum}
+                        for name, (total, count, maximum) in self.samples.items()}
+        }
+        self.episodes.append(summary)
+
+        if self.path is not None:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(summary) + '\n')
+
+        # Las entradas de timings las comparten las funciones cronometradas, se reinician en su lugar
+        for entry in self.timings.values():
+            entry[0] = 0.0
+            entry[1] = 0
+        self.counters.clear()
+        self.samples.clear()
+        self.start_episode()
+        return summary
+
+    # Resumen de un episodio como tabla de texto
+    @staticmethod
+    def format_summary(summary):
+        lines = [f"Episodio {summary['episode']}: {summary['seconds']:.3f} s"]
+        timings = sorted(summary['timings'].items(), key=lambda item: -item[1]['seconds'])
+        for name, timing in timings:
+            share = 100 * timing['seconds'] / summary['seconds'] if summary['seconds'] else 0.0
+            per_call = 1e6 * timing['seconds'] / timing['calls']
+            lines.append(f"  {name:<32} {timing['seconds']:>9.3f} s {share:>6.1f}% "
+                         f"{timing['calls']:>10} llamadas {per_call:>9.2f} µs/llamada")
+        for name, value in sorted(summary['counters'].items()):
+            lines.append(f"  {name:<32} {value:>10}")
+        for name, sample in sorted(summary['samples'].items()):
+            lines.append(f"  {name:<32} promedio {sample['mean']:.2f}, máximo {sample['max']}")
+        return '\n'.join(lines)
+
+    # Lee los resúmenes guardados en un archivo JSON lines, para comparar corridas
+    @staticmethod
+    def load(path):
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def __repr__(self):
+        return f"Profiler(episodes={len(self.episodes)}, path={self.path})"
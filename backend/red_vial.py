@@ -0,0 +1,252 @@
+import multiprocessing
+from collections import deque
+import numpy as np
+from backend.interseccion import Intersection
+from agente.policies import FixedCyclePolicy
+
+# Intersección vecina (fila, columna) hacia la que sale un auto según su dirección
+NEIGHBOR_OFFSETS = {
+    'norte': (-1, 0),
+    'sur': (1, 0),
+    'este': (0, 1),
+    'oeste': (0, -1)
+}
+
+# Métricas acumuladas por intersección
+JUNCTION_METRICS = ('steps', 'moved', 'waiting', 'vehicles', 'arrivals', 'delayed_arrivals',
+                    'network_exits', 'phase_changes', 'refused_phase_changes', 'blocked_spawns')
+
+
+class Region:
+    """
+    Parte de una RoadNetwork: sus intersecciones, sus políticas y los tramos de calle
+    que llegan a ellas. Avanza de forma independiente; los autos que salen hacia una
+    intersección de otra región se retornan como mensajes para entregarlos después.
+    """
+
+    def __init__(self, junctions, rows, cols, grid_size, engine_cls, seeds, policies, segment_length):
+        self.junctions = list(junctions)
+        self.rows = rows
+        self.cols = cols
+        self.segment_length = segment_length
+        self.policies = dict(zip(self.junctions, policies))
+
+        self.envs = {}
+        for junction, seed in zip(self.junctions, seeds):
+            env = engine_cls(grid_size=grid_size, rng=np.random.default_rng(seed))
+            env.linked_entries = frozenset(direction for direction in NEIGHBOR_OFFSETS
+                                           if self.neighbor(junction, self.opposite(direction)) is not None)
+            env.exit_queue = []
+            self.envs[junction] = env
+
+        # Tramo (intersección destino, dirección) -> cola de (step de llegada, imagen)
+        self.segments = {(junction, direction): deque() for junction, env in self.envs.items()
+                         for direction in env.linked_entries}
+        self.metrics = {junction: dict.fromkeys(JUNCTION_METRICS, 0) for junction in self.junctions}
+
+    @staticmethod
+    def opposite(direction):
+        return {'norte': 'sur', 'sur': 'norte', 'este': 'oeste', 'oeste': 'este'}[direction]
+
+    # Intersección a la que llega un auto que sale de `junction` hacia `direction` (None: sale de la red)
+    def neighbor(self, junction, direction):
+        row, col = divmod(junction, self.cols)
+        d_row, d_col = NEIGHBOR_OFFSETS[direction]
+        row += d_row
+        col += d_col
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row * self.cols + col
+        return None
+
+    def run(self, start_step, num_steps, inbound):
+        """
+        Avanza `num_steps` steps desde `start_step`. `inbound` son los autos que llegan
+        desde otras regiones: (intersección, dirección, step de llegada, imagen).
+        Retorna los autos que salen hacia otras regiones, en el mismo formato.
+        """
+        for junction, direction, arrival, image in inbound:
+            self.segments[(junction, direction)].append((arrival, image))
+
+        outbound = []
+        for step in range(start_step, start_step + num_steps):
+            for junction in self.junctions:
+                env = self.envs[junction]
+                metrics = self.metrics[junction]
+                env.apply_action(self.policies[junction].get_action(env.get_state(), training=False))
+                metrics['moved'] += env.step()
+                metrics['waiting'] += env.get_waiting_vehicles_count()
+                metrics['vehicles'] += env.get_vehicle_count()
+                metrics['steps'] += 1
+
+                # Los autos que salen entran al tramo hacia la intersección vecina
+                for direction, image in env.exit_queue:
+                    target = self.neighbor(junction, direction)
+                    if target is None:
+                        metrics['network_exits'] += 1
+                    elif target in self.envs:
+                        self.segments[(target, direction)].append((step + self.segment_length, image))
+                    else:
+                        outbound.append((target, direction, step + self.segment_length, image))
+                env.exit_queue.clear()
+
+            # Entregar los autos que terminaron de recorrer su tramo, si su entrada está libre
+            for (junction, direction), segment in self.segments.items():
+                while segment and segment[0][0] <= step:
+                    if not self.envs[junction].add_vehicle(direction, segment[0][1]):
+                        self.metrics[junction]['delayed_arrivals'] += 1
+                        break
+                    segment.popleft()
+                    self.metrics[junction]['arrivals'] += 1
+        return outbound
+
+    def get_metrics(self):
+        metrics = {}
+        for junction, env in self.envs.items():
+            junction_metrics = dict(self.metrics[junction])
+            junction_metrics['phase_changes'] = env.phase_changes
+            junction_metrics['refused_phase_changes'] = env.refused_phase_changes
+            junction_metrics['blocked_spawns'] = env.blocked_spawns
+            junction_metrics['in_transit'] = sum(len(self.segments[(junction, direction)])
+                                                 for direction in env.linked_entries)
+            metrics[junction] = junction_metrics
+        return metrics
+
+
+def _region_worker(connection, region_args):
+    # Proceso de una región: recibe órdenes ('run', 'metrics', 'close') por `connection`.
+    region = Region(*region_args)
+    while True:
+        command, args = connection.recv()
+        if command == 'run':
+            connection.send(region.run(*args))
+        elif command == 'metrics':
+            connection.send(region.get_metrics())
+        else:
+            break
+    connection.close()
+
+
+class RoadNetwork:
+    """
+    Red de `rows` x `cols` intersecciones unidas por tramos de calle de `segment_length`
+    steps: un auto que sale de una intersección hacia una vecina entra, tras recorrer el
+    tramo, a la cola de la entrada opuesta de ésta (si su casilla está ocupada, espera).
+    Sólo las entradas del borde de la red generan tráfico nuevo, y los autos que salen
+    por el borde dejan la red. Cada intersección tiene su semáforo y su política
+    (cualquier objeto con get_action(state, training), como QLearning o FixedCyclePolicy).
+
+    Con num_workers > 1 la red se divide en regiones contiguas que corren en procesos
+    separados. Un auto tarda `segment_length` steps en llegar a otra intersección, así que
+    cada región puede avanzar ese tramo de steps sin esperar a las demás; entre tramos se
+    intercambian los autos en camino. El resultado es el mismo con cualquier num_workers.
+    """
+
+    def __init__(self, rows=1, cols=1, grid_size=40, engine_cls=Intersection, segment_length=20,
+                 seed=None, policies=None, num_workers=1):
+        if segment_length < 1:
+            raise ValueError("segment_length debe ser al menos 1")
+        self.rows = rows
+        self.cols = cols
+        self.num_junctions = rows * cols
+        self.segment_length = segment_length
+        self.current_step = 0
+
+        if policies is None:
+            policies = [FixedCyclePolicy() for _ in range(self.num_junctions)]
+        seeds = np.random.SeedSequence(seed).spawn(self.num_junctions)
+
+        # Regiones contiguas (en orden de filas) de tamaño parecido
+        num_workers = max(1, min(num_workers, self.num_junctions))
+        self.partitions = [part.tolist() for part in np.array_split(np.arange(self.num_junctions), num_workers)]
+        self.region_of = {junction: index for index, part in enumerate(self.partitions) for junction in part}
+        self._inbound = [[] for _ in self.partitions]
+
+        region_args = [(part, rows, cols, grid_size, engine_cls, [seeds[j] for j in part],
+                        [policies[j] for j in part], segment_length) for part in self.partitions]
+        self.processes = []
+        self.connections = []
+        if num_workers == 1:
+            self.regions = [Region(*region_args[0])]
+        else:
+            self.regions = None
+            for args in region_args:
+                parent, child = multiprocessing.Pipe()
+                process = multiprocessing.Process(target=_region_worker, args=(child, args), daemon=True)
+                process.start()
+                child.close()
+                self.processes.append(process)
+                self.connections.append(parent)
+
+    # Avanza toda la red `num_steps` steps, en tramos de a lo más segment_length
+    def step(self, num_steps=1):
+        remaining = num_steps
+        while remaining > 0:
+            window = min(self.segment_length, remaining)
+            inbound, self._inbound = self._inbound, [[] for _ in self.partitions]
+
+            if self.regions is not None:
+                outbound = [region.run(self.current_step, window, messages)
+                            for region, messages in zip(self.regions, inbound)]
+            else:
+                for connection, messages in zip(self.connections, inbound):
+                    connection.send(('run', (self.current_step, window, messages)))
+                outbound = [connection.recv() for connection in self.connections]
+
+            for messages in outbound:
+                for message in messages:
+                    self._inbound[self.region_of[message[0]]].append(message)
+
+            self.current_step += window
+            remaining -= window
+
+    def get_metrics(self):
+        """
+        Métricas de cada intersección (lista en orden de fila), con totales y promedios por step:
+        moved, arrivals (autos llegados desde vecinas), delayed_arrivals (steps en que el auto
+        del tramo no pudo entrar), network_exits, phase_changes, blocked_spawns, in_transit,
+        avg_waiting, avg_vehicles y throughput (moved por step).
+        """
+        if self.regions is not None:
+            parts = [region.get_metrics() for region in self.regions]
+        else:
+            for connection in self.connections:
+                connection.send(('metrics', None))
+            parts = [connection.recv() for connection in self.connections]
+
+        merged = {}
+        for part in parts:
+            merged.update(part)
+
+        # Autos en camino desde otra región, todavía no entregados
+        for messages in self._inbound:
+            for junction, _, _, _ in messages:
+                merged[junction]['in_transit'] += 1
+
+        metrics = []
+        for junction in range(self.num_junctions):
+            junction_metrics = merged[junction]
+            steps = max(1, junction_metrics['steps'])
+            junction_metrics['avg_waiting'] = junction_metrics['waiting'] / steps
+            junction_metrics['avg_vehicles'] = junction_metrics['vehicles'] / steps
+            junction_metrics['throughput'] = junction_metrics['moved'] / steps
+            metrics.append(junction_metrics)
+        return metrics
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(('close', None))
+            connection.close()
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return (f"RoadNetwork({self.rows}x{self.cols}, segment={self.segment_length}, "
+                f"workers={len(self.partitions)}, step={self.current_step})")
@@ -1,3 +1,17 @@
+import math
+
+# Tablas por fase (0 o 1): direcciones con luz verde y luz verde por dirección,
+# por nombre y por código (en el orden de backend/vehiculo.DIRECTIONS)
+GREEN_DIRECTIONS = (('norte', 'sur'), ('este', 'oeste'))
+GREEN = tuple({direction: direction in green for direction in ('norte', 'sur', 'este', 'oeste')}
+              for green in GREEN_DIRECTIONS)
+GREEN_CODES = ((True, True, False, False), (False, False, True, True))
+
+# Categoría del tiempo desde el último cambio (0 reciente, 1 medio, 2 prolongado) hasta
+# 20 steps, indexada por el tiempo redondeado hacia arriba
+TIME_CATEGORIES = (0,) * 11 + (1,) * 10
+
+
 class Semaforo:
     """
     Controla las fases del semáforo en una intersección.
@@ -31,28 +45,32 @@ class Semaforo:
         return False
 
     # Actualiza el contador
-    def update(self):
-        self.time_since_change += 1
+    def update(self, steps=1):
+        self.time_since_change += steps
+
+    # Cantidad de próximos steps en que change_state será rechazado
+    def locked_steps(self):
+        return max(0, math.ceil(self.min_state_duration - self.time_since_change))
 
     # Retorna las direcciones que tienen luz verde
     def get_green_directions(self):
-        if self.state == 0:
-            return ['norte', 'sur']
-        else:
-            return ['este', 'oeste']
+        return GREEN_DIRECTIONS[self.state]
 
     # Verifica si una dirección específica tiene luz verde
     def is_green(self, direction):
-        return direction in self.get_green_directions()
+        return GREEN[self.state][direction]
 
     # Categoriza el tiempo transcurrido
     def get_time_category(self):
-        if self.time_since_change <= 10:
-            return 0  # reciente
-        elif self.time_since_change <= 20:
-            return 1  # medio
-        else:
-            return 2  # prolongado
+        elapsed = self.time_since_change
+        if elapsed <= 20:
+            return TIME_CATEGORIES[math.ceil(elapsed)]
+        return 2  # prolongado
+
+    # Categorías de tiempo después de cada uno de los próximos `steps` steps, sin cambiar de fase
+    def upcoming_time_categories(self, steps):
+        elapsed = self.time_since_change
+        return [TIME_CATEGORIES[math.ceil(elapsed + k)] if elapsed + k <= 20 else 2 for k in range(1, steps + 1)]
 
     # Para DEBUG
     def __repr__(self):
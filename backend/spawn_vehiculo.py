@@ -1,15 +1,51 @@
-from backend.vehiculo import Vehiculo
+import bisect
+import random
+import numpy as np
+from backend.horario import hourly_schedule
+from backend.vehiculo import Vehiculo, DIRECTIONS
+
+# Cantidad de direcciones e imágenes que se sortean de una vez con un generador propio
+DRAW_BLOCK_SIZE = 1024
+
+# Bloques de sorteos pendientes de SpawnVehicle (ver get_draw_state)
+DRAW_BLOCKS = ('_directions', '_uniforms', '_images')
 
 class SpawnVehicle:
-    def __init__(self):
-        # Configuración de generación de tráfico
+    def __init__(self, reuse_vehicles=True, rng=None):
+        # Configuración de generación de tráfico: intervalo de spawn por segundo del día
+        # (ver backend/horario.py); asignar base_spawn_interval rehace el horario por hora
+        self.schedule = None
         self.base_spawn_interval = 6  # Spawn cada N steps
 
+        # Generador de los sorteos: None usa el módulo random global (como siempre);
+        # un numpy.random.Generator o una semilla sortea direcciones e imágenes por bloques
+        self.rng = None if rng is None else np.random.default_rng(rng)
+        self._directions = []
+        self._uniforms = []
+        self._images = []
+        # Estado del generador antes de sortear cada bloque, para rehacerlo (ver set_draw_state)
+        self._block_states = {}
+
+        # Vehículos que salieron de la grilla, para reutilizarlos en vez de crear nuevos
+        self.reuse_vehicles = reuse_vehicles
+        self.free_vehicles = []
+        self.created_vehicles = 0
+        self.reused_vehicles = 0
+
         # Métricas
         self.total_wait_time = 0
         self.phase_changes = 0
         self.total_steps = 0
 
+    @property
+    def base_spawn_interval(self):
+        return self._base_spawn_interval
+
+    @base_spawn_interval.setter
+    def base_spawn_interval(self, interval):
+        self._base_spawn_interval = interval
+        self.schedule = hourly_schedule(tuple(self.get_spawn_interval(hour) for hour in range(24)))
+
     # Determina si es hora punta (7-9 AM o 5-8 PM)
     def is_rush_hour(self, current_hour):
         return (7 <= current_hour < 9) or (17 <= current_hour < 20)
@@ -39,7 +75,90 @@ class SpawnVehicle:
         else:  # oeste
             return grid_size - 1, center_cell - 1
 
-    # Genera un nuevo vehículo
-    def spawn_vehicle(self, spawn_pos, direction):
-        vehicle = Vehiculo(spawn_pos, direction)
-        return vehicle
\ No newline at end of file
+    # Sortea la dirección del próximo vehículo en el segundo del día `second`, con los
+    # pesos del horario si los tiene (si no, las cuatro direcciones son igual de probables)
+    def draw_direction(self, second=0):
+        weights = self.schedule.weights
+        if weights is not None:
+            return self.draw_weighted_direction(weights[second])
+        if self.rng is None:
+            return random.choice(['norte', 'sur', 'este', 'oeste'])
+        if not self._directions:
+            self.draw_block('_directions')
+        return self._directions.pop()
+
+    # Sortea una dirección según sus probabilidades acumuladas
+    def draw_weighted_direction(self, cumulative):
+        if self.rng is None:
+            return random.choices(DIRECTIONS, cum_weights=cumulative)[0]
+        if not self._uniforms:
+            self.draw_block('_uniforms')
+        return DIRECTIONS[bisect.bisect(cumulative, self._uniforms.pop())]
+
+    # Sortea la imagen (1 a 5) del próximo vehículo
+    def draw_image(self):
+        if self.rng is None:
+            return random.randint(1, 5)
+        if not self._images:
+            self.draw_block('_images')
+        return self._images.pop()
+
+    # Sortea un bloque nuevo de direcciones, números uniformes o imágenes con el generador propio
+    def draw_block(self, name):
+        self._block_states[name] = self.rng.bit_generator.state
+        if name == '_directions':
+            block = [DIRECTIONS[code] for code in self.rng.integers(0, 4, size=DRAW_BLOCK_SIZE).tolist()]
+        elif name == '_uniforms':
+            block = self.rng.random(DRAW_BLOCK_SIZE).tolist()
+        else:
+            block = self.rng.integers(1, 6, size=DRAW_BLOCK_SIZE).tolist()
+        setattr(self, name, block)
+
+    # Estado de los sorteos: sin generador propio, el del módulo random global; con generador,
+    # su estado y, por cada bloque, el estado antes de sortearlo y cuántos valores quedan (así
+    # no se copian los bloques: set_draw_state los vuelve a sortear)
+    def get_draw_state(self):
+        if self.rng is None:
+            return random.getstate()
+        return self.rng.bit_generator.state, tuple((self._block_states.get(name), len(getattr(self, name)))
+                                                  for name in DRAW_BLOCKS)
+
+    # Vuelve los sorteos al estado de get_draw_state
+    def set_draw_state(self, state):
+        if self.rng is None:
+            random.setstate(state)
+            return
+        generator_state, blocks = state
+        for name, (block_state, remaining) in zip(DRAW_BLOCKS, blocks):
+            if remaining:
+                self.rng.bit_generator.state = block_state
+                self.draw_block(name)
+                # Los valores se sacan del final del bloque
+                del getattr(self, name)[remaining:]
+            else:
+                setattr(self, name, [])
+        self.rng.bit_generator.state = generator_state
+
+    # Descarta los bloques ya sorteados: los sorteos siguientes salen del generador desde su
+    # estado actual, como en un SpawnVehicle nuevo que comparte el generador
+    def discard_draws(self):
+        for name in DRAW_BLOCKS:
+            setattr(self, name, [])
+
+    # Genera un nuevo vehículo (o reutiliza uno liberado); sin imagen dada, se sortea
+    def spawn_vehicle(self, spawn_pos, direction, image=None):
+        if image is None:
+            image = self.draw_image()
+        if self.free_vehicles:
+            vehicle = self.free_vehicles.pop()
+            vehicle.reset(spawn_pos, direction, image)
+            self.reused_vehicles += 1
+        else:
+            vehicle = Vehiculo(spawn_pos, direction, image)
+            self.created_vehicles += 1
+        return vehicle
+
+    # Devuelve un vehículo que salió de la grilla; no debe seguir referenciado en otra parte
+    def release_vehicle(self, vehicle):
+        if self.reuse_vehicles:
+            self.free_vehicles.append(vehicle)
\ No newline at end of file
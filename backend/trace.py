@@ -0,0 +1,331 @@
+import io
+import json
+import os
+import struct
+import threading
+import zlib
+from collections import namedtuple
+from itertools import chain
+import numpy as np
+from backend.interseccion import Intersection
+from backend.vehiculo import DIRECTIONS, DELTAS
+
+# Estado de la intersección en un step, lo único que necesita el renderer.
+# vehicles: tupla de (x, y, dirección, imagen)
+Snapshot = namedtuple('Snapshot', ['step', 'vehicles', 'light_state', 'hour', 'minute', 'second'])
+
+MAGIC = b'TRAZA2\n'
+# Encabezado de cada bloque: largo en bytes, episodio, primer step, cantidad de steps
+CHUNK_HEADER = struct.Struct('<QqqI')
+HEADER_LENGTH = struct.Struct('<Q')
+# Nivel de compresión zlib de los bloques: el más rápido, casi el mismo tamaño que el nivel 6
+COMPRESSION_LEVEL = 1
+
+DELTA_ARRAY = np.array(DELTAS, dtype=np.int16)
+
+
+def take_snapshot(env, step):
+    vehicles = tuple((*vehicle.get_position(), vehicle.get_direction(), vehicle.image) for vehicle in env.vehicles)
+    return Snapshot(step, vehicles, env.semaforo.state, env.current_hour, env.current_minute, env.current_second)
+
+
+# Vehículos que salen de la grilla en el step siguiente: los que están en la orilla de su salida
+def exiting_mask(records, grid_size):
+    x, y, code = records[:, 0], records[:, 1], records[:, 2]
+    edge = grid_size - 1
+    return (((code == 0) & (y == 0)) | ((code == 1) & (y == edge)) |
+            ((code == 2) & (x == edge)) | ((code == 3) & (x == 0)))
+
+
+# Casillas liberadas en cada step (listas de (x, y) del motor Python o arreglos de índices
+# y * grid_size + x del motor NumPy) como un arreglo de índices y la cantidad por step
+def vacated_cells(entries, grid_size):
+    counts = np.fromiter(map(len, entries), dtype=np.uint32, count=len(entries))
+    if entries and isinstance(entries[0], np.ndarray):
+        cells = np.concatenate(entries)
+    else:
+        cells = np.fromiter(chain.from_iterable(chain.from_iterable(entries)), dtype=np.int64).reshape(-1, 2)
+        cells = cells[:, 0] + grid_size * cells[:, 1]
+    return cells.astype(np.uint16), counts
+
+
+# Filas (x, y, código, imagen) de una lista de tuplas como un arreglo (n, 4)
+def record_rows(records):
+    return np.fromiter(chain.from_iterable(records), dtype=np.int16, count=4 * len(records)).reshape(-1, 4)
+
+
+# Filas (x, y, código, imagen) de una lista de listas o arreglos como un arreglo (n, 4)
+def vehicle_rows(records):
+    if not records:
+        return np.zeros((0, 4), dtype=np.int16)
+    return np.concatenate([np.asarray(rows, dtype=np.int16).reshape(-1, 4) for rows in records])
+
+
+def decode_chunk(data, grid_size):
+    """
+    Recorre los vehículos de cada step de un bloque como arreglos (n, 4) de filas
+    (x, y, código, imagen), en el orden de la lista de vehículos del motor.
+
+    El bloque trae todos los vehículos del primer step (keyframe) y, para cada step
+    siguiente, los vehículos agregados (en la casilla por la que entraron) y las casillas
+    que se liberaron. Se usa que el motor conserva el orden de los vehículos que siguen,
+    agrega los nuevos al final y que un vehículo que libera su casilla avanzó una casilla
+    o, si estaba en la orilla de su salida, salió de la grilla.
+    """
+    vehicles = data['keyframe'].astype(np.int32)
+    vacated, vacated_counts = data['vacated'], data['vacated_counts'].tolist()
+    new, new_counts = data['new'], data['new_counts'].tolist()
+    vacated_at = new_at = 0
+    yield vehicles
+    for vacated_count, new_count in zip(vacated_counts, new_counts):
+        if new_count:
+            vehicles = np.concatenate((vehicles, new[new_at:new_at + new_count]))
+            new_at += new_count
+        if vacated_count:
+            cells = vehicles[:, 0] + grid_size * vehicles[:, 1]
+            leaving = np.isin(cells, vacated[vacated_at:vacated_at + vacated_count])
+            vacated_at += vacated_count
+            removed = leaving & exiting_mask(vehicles, grid_size)
+            moved = leaving & ~removed
+            vehicles = vehicles.copy()
+            vehicles[moved, :2] += DELTA_ARRAY[vehicles[moved, 2]]
+            if removed.any():
+                vehicles = vehicles[~removed]
+        yield vehicles
+
+
+class TraceRecorder:
+    """
+    Graba una simulación en un archivo de traza compacto para verla después sin volver a
+    correr Intersection.step (ver TraceReader, frontend/main.py --replay).
+
+    record(env, step) se llama después de cada step. El primer step de cada bloque de
+    `chunk_size` steps se guarda completo (keyframe); en los siguientes sólo se guardan las
+    diferencias: el motor agrega a listas del registro las casillas que liberó en el step
+    (env.trace_cells, sin copiarlas) y cada vehículo que entra (env.trace_new), y el registro
+    anota el semáforo, la hora y cuántos vehículos entraron en arreglos del tamaño del
+    bloque, así que el costo por step no depende de la cantidad de vehículos ni consulta
+    sus posiciones. Cada bloque se comprime y se agrega al final del archivo en un hilo
+    aparte. El archivo se puede leer mientras se escribe: un bloque cortado por una
+    interrupción se ignora.
+
+    keyframe=True en record() inicia un bloque nuevo, por ejemplo tras un salto de varios
+    steps (skip_ahead) en que los vehículos avanzaron más de una casilla.
+    """
+
+    def __init__(self, path, grid_size, chunk_size=1024, metadata=None, background=True):
+        self.path = path
+        self.grid_size = grid_size
+        self.chunk_size = chunk_size
+        self.background = background
+        self.thread = None
+        self.error = None
+        self.env = None
+        self.episode = 0
+        self.chunks = 0
+        self.clear()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        header = json.dumps({'grid_size': grid_size, 'chunk_size': chunk_size,
+                             'metadata': metadata or {}}).encode()
+        with open(path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+
+    # Bloque vacío; el entorno grabado entrega sus casillas liberadas y sus vehículos nuevos
+    # a las listas nuevas
+    def clear(self):
+        self.keyframe = None
+        self.cells = []
+        self.new = []
+        self.size = 0
+        self.steps = np.empty(self.chunk_size, dtype=np.int64)
+        self.lights = np.empty(self.chunk_size, dtype=np.uint8)
+        self.clock = np.empty(self.chunk_size, dtype=np.int32)
+        # Vehículos nuevos acumulados hasta cada step (desde el keyframe)
+        self.new_totals = np.empty(self.chunk_size, dtype=np.uint32)
+        self.attach(self.env)
+
+    # Hace que `env` entregue sus casillas liberadas y sus vehículos nuevos al bloque actual
+    def attach(self, env):
+        if env is not None:
+            env.trace_cells = self.cells
+            env.trace_new = self.new
+
+    @staticmethod
+    def detach(env):
+        env.trace_cells = None
+        env.trace_new = None
+
+    # Los steps que siguen son de otro episodio: se cierra el bloque actual
+    def new_episode(self, episode):
+        self.flush()
+        self.episode = episode
+
+    def record(self, env, step, keyframe=False):
+        if env is not self.env:
+            # Entorno nuevo (por ejemplo, otro episodio): deja de grabar el anterior
+            self.flush()
+            if self.env is not None:
+                self.detach(self.env)
+            self.env = env
+            self.attach(env)
+        elif keyframe:
+            self.flush()
+
+        size = self.size
+        if size:
+            self.new_totals[size] = len(self.new)
+        else:
+            # El keyframe ya trae lo que pasó hasta este step
+            self.keyframe = env.get_vehicle_records()
+            self.cells.clear()
+            self.new.clear()
+            self.new_totals[0] = 0
+        self.steps[size] = step
+        self.lights[size] = env.semaforo.state
+        self.clock[size] = env.time_of_day
+        self.size = size + 1
+        if self.size == self.chunk_size:
+            self.flush()
+
+    # Envía el bloque actual a escribir
+    def flush(self):
+        size = self.size
+        if not size:
+            return
+        chunk = (self.episode, self.keyframe, self.cells, self.new, np.diff(self.new_totals[:size]),
+                 self.steps[:size], self.lights[:size], self.clock[:size])
+        self.clear()
+        self.wait()
+        if not self.background:
+            self.write(*chunk)
+            return
+        self.thread = threading.Thread(target=self.write, args=chunk, daemon=True)
+        self.thread.start()
+
+    def write(self, episode, keyframe, cells, new, new_counts, steps, lights, clock):
+        try:
+            if len(cells) != len(steps) - 1:
+                raise ValueError("La traza no es consistente: hubo steps sin registrar con record()")
+            vacated, vacated_counts = vacated_cells(cells, self.grid_size)
+            buffer = io.BytesIO()
+            np.savez(buffer, steps=steps, lights=lights, clock=clock, keyframe=vehicle_rows([keyframe]),
+                     vacated=vacated, vacated_counts=vacated_counts, new=record_rows(new), new_counts=new_counts)
+            payload = zlib.compress(buffer.getvalue(), COMPRESSION_LEVEL)
+            with open(self.path, 'ab') as f:
+                f.write(CHUNK_HEADER.pack(len(payload), episode, steps[0], len(steps)))
+                f.write(payload)
+            self.chunks += 1
+        except Exception as error:
+            self.error = error
+
+    # Espera a que termine la escritura en curso
+    def wait(self):
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    # Cierra el bloque actual y deja de grabar `env`, por ejemplo antes de reutilizarlo en un
+    # episodio que no se graba; el próximo record() lo vuelve a tomar
+    def release(self, env):
+        if env is self.env:
+            self.flush()
+            self.detach(env)
+            self.env = None
+
+    # Escribe el bloque pendiente y deja de grabar el entorno
+    def close(self):
+        self.flush()
+        self.wait()
+        if self.env is not None:
+            self.detach(self.env)
+            self.env = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TraceReader:
+    """
+    Lee una traza escrita por TraceRecorder. Al abrir sólo se recorren los encabezados de
+    los bloques; cada bloque se descomprime al reproducirlo. frames() entrega un Snapshot
+    por step grabado, igual al que se habría tomado del entorno en vivo (take_snapshot).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            magic = f.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(f"{path} no es un archivo de traza")
+            (length,) = HEADER_LENGTH.unpack(f.read(HEADER_LENGTH.size))
+            header = json.loads(f.read(length))
+            self.grid_size = header['grid_size']
+            self.metadata = header['metadata']
+
+            # Índice de bloques: (episodio, primer step, cantidad de steps, posición, largo)
+            self.chunks = []
+            size = os.fstat(f.fileno()).st_size
+            position = f.tell()
+            while position + CHUNK_HEADER.size <= size:
+                length, episode, first_step, steps = CHUNK_HEADER.unpack(f.read(CHUNK_HEADER.size))
+                position += CHUNK_HEADER.size
+                if position + length > size:
+                    break
+                self.chunks.append((episode, first_step, steps, position, length))
+                position += length
+                f.seek(position)
+
+    def episodes(self):
+        return sorted({chunk[0] for chunk in self.chunks})
+
+    def __len__(self):
+        return sum(chunk[2] for chunk in self.chunks)
+
+    def read_chunk(self, chunk):
+        _, _, _, position, length = chunk
+        with open(self.path, 'rb') as f:
+            f.seek(position)
+            with np.load(io.BytesIO(zlib.decompress(f.read(length)))) as data:
+                return {name: data[name] for name in data.files}
+
+    # Snapshots de un episodio (o de toda la traza), desde el step `start`
+    def frames(self, episode=None, start=0):
+        for chunk in self.chunks:
+            chunk_episode, first_step, steps, _, _ = chunk
+            if episode is not None and chunk_episode != episode:
+                continue
+            if first_step + steps <= start:
+                continue
+            data = self.read_chunk(chunk)
+            for step, light, clock, vehicles in zip(data['steps'].tolist(), data['lights'].tolist(),
+                                                     data['clock'].tolist(), decode_chunk(data, self.grid_size)):
+                if step < start:
+                    continue
+                vehicles = tuple((x, y, DIRECTIONS[code], image) for x, y, code, image in vehicles.tolist())
+                yield Snapshot(step, vehicles, light, clock // 3600, clock // 60 % 60, clock % 60)
+
+
+# Graba `num_steps` steps de una intersección (por defecto una Intersection nueva). Con `policy`
+# (get_action, como un QLearning entrenado) el agente decide el semáforo en cada step; sin
+# ella nadie cambia la fase y el semáforo se queda en la fase inicial
+def record_trace(path, num_steps, env=None, policy=None, chunk_size=1024, metadata=None):
+    env = env if env is not None else Intersection()
+    with TraceRecorder(path, env.get_size(), chunk_size, metadata) as recorder:
+        recorder.record(env, 0)
+        for step in range(1, num_steps + 1):
+            if policy is not None:
+                env.apply_action(policy.get_action(env.get_state(), training=False))
+            env.step()
+            recorder.record(env, step)
+    return env
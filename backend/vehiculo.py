@@ -1,36 +1,42 @@
 import random
 
+# Códigos de dirección y desplazamiento (dx, dy) de cada una
+NORTE, SUR, ESTE, OESTE = 0, 1, 2, 3
+DIRECTIONS = ('norte', 'sur', 'este', 'oeste')
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+DELTAS = ((0, -1), (0, 1), (1, 0), (-1, 0))
+
+
 class Vehiculo:
-    def __init__(self, position, direction):
-        self.__position = [position[0], position[1]]
-        self.__direction = direction
-        self.image = random.randint(1,5)
+    __slots__ = ('x', 'y', 'code', 'dx', 'dy', 'image')
+
+    def __init__(self, position, direction, image=None):
+        self.reset(position, direction, image)
+
+    # Reinicia el vehículo para reutilizarlo (ver SpawnVehicle).
+    # Sin imagen dada, se sortea con el módulo random global.
+    def reset(self, position, direction, image=None):
+        self.x = position[0]
+        self.y = position[1]
+        self.code = DIRECTION_CODES[direction]
+        self.dx, self.dy = DELTAS[self.code]
+        self.image = random.randint(1,5) if image is None else image
 
     def get_position(self):
-        return self.__position
+        return self.x, self.y
     def get_direction(self):
-        return self.__direction
-
-    # Movimiento del vehiculo
-    def move(self, grid_size):
-        match self.__direction:
-            case 'norte':
-                if self.__position[1] == 0:
-                    return False
-                self.__position[1] -= 1
-                return True
-            case 'sur':
-                if self.__position[1] == grid_size - 1:
-                    return False
-                self.__position[1] += 1
-                return True
-            case 'este':
-                if self.__position[0] == grid_size - 1:
-                    return False
-                self.__position[0] += 1
-                return True
-            case 'oeste':
-                if self.__position[0] == 0:
-                    return False
-                self.__position[0] -= 1
-                return True
\ No newline at end of file
+        return DIRECTIONS[self.code]
+
+    # Movimiento del vehiculo, `steps` casillas (falso si saldría de la grilla)
+    def move(self, grid_size, steps=1):
+        x = self.x + self.dx * steps
+        y = self.y + self.dy * steps
+        if x < 0 or y < 0 or x >= grid_size or y >= grid_size:
+            return False
+        self.x = x
+        self.y = y
+        return True
+
+    # Para DEBUG
+    def __repr__(self):
+        return f"Vehiculo(pos=({self.x}, {self.y}), dir={self.get_direction()}, image={self.image})"
\ No newline at end of file
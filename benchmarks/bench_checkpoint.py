@@ -0,0 +1,74 @@
+"""
+Checkpoints del entrenamiento: mide cuánto bloquea el entrenamiento cada forma de guardar:
+pickle de QLearning.save, checkpoint .npz escrito en el mismo hilo y checkpoint en segundo
+plano (con memoria de experiencia llena, que domina el tamaño del archivo). Que retomar
+desde un checkpoint reproduzca el entrenamiento completo se verifica en
+tests/test_checkpoint.py.
+
+Uso:
+    python benchmarks/bench_checkpoint.py
+"""
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'agente')]
+
+from train_agent import TrafficSimulator
+from checkpoint import CheckpointManager
+
+SEED = 0
+
+
+def bench(directory, repeats=20):
+    simulator = TrafficSimulator(seed=SEED, table='numpy')
+    simulator.enable_replay(capacity=100000)
+    # Tabla Q completa y memoria de experiencia llena
+    simulator.agent.q_table[:] = np.random.default_rng(SEED).normal(size=simulator.agent.q_table.shape)
+    simulator.agent.visited[:] = True
+    replay = simulator.replay
+    replay.data['reward'] = np.random.default_rng(SEED).normal(size=replay.capacity)
+    replay.size = replay.capacity
+    metrics = simulator.new_metrics()
+
+    def save_pickle():
+        with contextlib.redirect_stdout(io.StringIO()):
+            simulator.agent.save(os.path.join(directory, 'q_table.pkl'))
+
+    managers = {'npz': CheckpointManager(os.path.join(directory, 'npz'), background=False),
+                'npz fondo': CheckpointManager(os.path.join(directory, 'fondo'))}
+
+    print(f"{'guardado':>12} {'ms bloqueado':>14}")
+    for name, save in (('pickle', save_pickle),
+                       *((name, lambda manager=manager: manager.save(0, *simulator.checkpoint_state(0, metrics)))
+                         for name, manager in managers.items())):
+        best = float('inf')
+        for _ in range(repeats):
+            for manager in managers.values():
+                manager.wait()
+            start = time.perf_counter()
+            save()
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:>12} {1000 * best:>14.2f}")
+    for manager in managers.values():
+        manager.wait()
+    print("\n(pickle guarda sólo la tabla Q; los checkpoints incluyen la memoria de experiencia)")
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    try:
+        bench(directory)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Evaluación paralela de políticas (agente/evaluation.py).
+
+1. Compara el intervalo de confianza de la diferencia entre dos políticas con tráfico
+   común (episodios pareados) y con tráfico independiente, para dos ciclos fijos
+   parecidos y para el agente contra el ciclo fijo de 30 steps.
+2. Mide evaluate + compare_with_baseline como antes (Intersection, un step a la vez, en
+   serie) contra el harness con el motor por eventos y 1, 2, 4, ... workers.
+
+Que los resultados no dependan de los workers y coincidan con Intersection se verifica
+en tests/test_evaluacion.py.
+
+Uso:
+    python benchmarks/bench_evaluacion.py [--episodes 30] [--max-steps 1000] [--train-episodes 40]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'agente')]
+
+from backend.interseccion import Intersection
+from backend.interseccion_eventos import EventIntersection
+from policies import FixedCyclePolicy
+from bench_parallel_train import worker_counts
+from evaluation import EVALUATION_METRICS, evaluate_policies, baseline_policies, confidence_interval
+from train_agent import TrafficSimulator
+
+
+# evaluate y compare_with_baseline antes del harness: episodios en serie, un step a la vez
+def legacy_evaluation(agent, num_episodes, max_steps):
+    for baseline in (False, True):
+        for episode in range(num_episodes):
+            env = Intersection(rng=np.random.default_rng(episode))
+            state = env.get_state()
+            for step in range(max_steps):
+                if baseline:
+                    action = 1 if step % 30 == 0 and step > 0 else 0
+                else:
+                    action = agent.get_action(state, training=False)
+                env.apply_action(action)
+                env.step()
+                env.get_waiting_vehicles_count()
+                env.get_vehicle_count()
+                state = env.get_state()
+
+
+def harness_evaluation(agent, num_episodes, max_steps, workers):
+    spec = (EventIntersection, 40, None, {})
+    evaluate_policies({'agente': agent, **baseline_policies((30,))}, spec, num_episodes, max_steps,
+                      max_workers=workers, reference='agente')
+
+
+def variance_reduction(reference, policy, args):
+    # `reference` y `policy` son pares (nombre, política)
+    spec = (EventIntersection, 40, None, {})
+    (reference_name, reference_policy), (name, other_policy) = reference, policy
+    common = evaluate_policies(dict((reference, policy)), spec, args.episodes, args.max_steps,
+                               reference=reference_name)[name]
+    # Tráfico independiente: la referencia con otra semilla
+    other = evaluate_policies({reference_name: reference_policy}, spec, args.episodes, args.max_steps,
+                              seed=1)[reference_name]
+    independent = confidence_interval(common['episodes'] - other['episodes'])[1]
+
+    print(f"Diferencia {name} - {reference_name} ({args.episodes} episodios, semiancho del intervalo de 95%)")
+    print(f"{'métrica':>16} {'diferencia':>11} {'común':>9} {'independiente':>14} {'episodios equivalentes':>23}")
+    for metric, diff, paired, unpaired in zip(EVALUATION_METRICS, common['diff'], common['diff_ci'], independent):
+        if paired == unpaired == 0:
+            continue
+        # Episodios que necesitaría el tráfico independiente para un intervalo igual de angosto
+        print(f"{metric:>16} {diff:>+11.2f} {paired:>9.3f} {unpaired:>14.3f} "
+              f"{(unpaired / paired) ** 2 * args.episodes:>23.0f}")
+    print()
+
+
+def measure(agent, args):
+    start = time.perf_counter()
+    legacy_evaluation(agent, args.episodes, args.max_steps)
+    legacy = time.perf_counter() - start
+
+    print(f"evaluate + compare_with_baseline, {args.episodes} episodios de {args.max_steps} steps")
+    print(f"{'versión':>28} {'segundos':>9} {'aceleración':>12}")
+    print(f"{'anterior (serie, por step)':>28} {legacy:>9.2f} {1:>11.2f}x")
+    for workers in worker_counts():
+        start = time.perf_counter()
+        harness_evaluation(agent, args.episodes, args.max_steps, workers)
+        elapsed = time.perf_counter() - start
+        print(f"{f'harness, {workers} workers':>28} {elapsed:>9.2f} {legacy / elapsed:>11.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la evaluación paralela")
+    parser.add_argument('--episodes', type=int, default=30)
+    parser.add_argument('--max-steps', type=int, default=1000)
+    parser.add_argument('--train-episodes', type=int, default=40)
+    args = parser.parse_args()
+
+    # train guarda la tabla Q en models/ del directorio actual
+    os.chdir(tempfile.mkdtemp())
+    simulator = TrafficSimulator(engine='events', seed=0)
+    simulator.train(num_episodes=args.train_episodes, max_steps_per_episode=args.max_steps,
+                    save_interval=args.train_episodes + 1, verbose=False)
+
+    # Con políticas parecidas el tráfico común angosta más el intervalo que con políticas muy distintas
+    variance_reduction(('ciclo fijo 30', FixedCyclePolicy(30, offset=1)), ('ciclo fijo 35', FixedCyclePolicy(35, offset=1)),
+                       args)
+    variance_reduction(('agente', simulator.agent), ('ciclo fijo 30', FixedCyclePolicy(30, offset=1)), args)
+    measure(simulator.agent, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Motor por eventos discretos (backend/interseccion_eventos.py) contra Intersection.
+
+1. Mide steps/seg por franja horaria con un semáforo de ciclo fijo: step() y
+   fast_forward() de cada motor entre cambios de fase.
+2. Mide una política que decide sólo según el estado: consultarla en cada step contra
+   EventIntersection.advance, que la consulta sólo cuando cambia el estado.
+
+Que EventIntersection reproduzca exactamente a Intersection con la misma semilla se
+verifica en tests/test_eventos.py.
+
+Uso:
+    python benchmarks/bench_eventos.py [--period 30]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.interseccion import Intersection
+from backend.interseccion_eventos import EventIntersection
+
+# Franjas horarias: (hora de inicio, horas)
+PERIODS = {'madrugada': (0, 5), 'día': (10, 2), 'punta': (7, 2)}
+
+
+def new_env(engine_cls, seed, hour):
+    env = engine_cls(rng=np.random.default_rng(seed))
+    env.current_hour = hour
+    env.exit_queue = []
+    return env
+
+
+# Política determinista: cambia de fase si la cola con luz roja supera a la de luz verde
+def queue_policy(state):
+    north, south, east, west, light, category = state
+    green, red = (north + south, east + west) if light == 0 else (east + west, north + south)
+    return 1 if category > 0 and red > green else 0
+
+
+# Semáforo de ciclo fijo: cambia cada `period` steps; entre cambios se avanza con step() o fast_forward()
+def fixed_cycle(env, num_steps, period, skip):
+    moved = 0
+    for start in range(0, num_steps, period):
+        env.apply_action(1)
+        moved += env.step()
+        steps = min(period, num_steps - start) - 1
+        moved += env.fast_forward(steps) if skip else sum(env.step() for _ in range(steps))
+    return moved
+
+
+def measure_periods(period):
+    print(f"Semáforo de ciclo fijo cada {period} steps (steps/seg)")
+    print(f"{'franja':>10} {'autos':>6} {'step':>10} {'fast_forward':>13} {'eventos step':>13} "
+          f"{'eventos ff':>11} {'vs step':>8}")
+    for name, (hour, hours) in PERIODS.items():
+        num_steps = hours * 3600
+        rates = []
+        for engine_cls, skip in ((Intersection, False), (Intersection, True),
+                                 (EventIntersection, False), (EventIntersection, True)):
+            env = new_env(engine_cls, 0, hour)
+            start = time.perf_counter()
+            fixed_cycle(env, num_steps, period, skip)
+            rates.append(num_steps / (time.perf_counter() - start))
+        vehicles = len(env.vehicles)
+        print(f"{name:>10} {vehicles:>6} {rates[0]:>10.0f} {rates[1]:>13.0f} {rates[2]:>13.0f} "
+              f"{rates[3]:>11.0f} {rates[3] / rates[0]:>7.1f}x")
+
+
+def measure_policy(num_steps=86400):
+    print(f"\nPolítica según el estado durante un día ({num_steps} steps)")
+    print(f"{'motor':>22} {'steps/seg':>10} {'decisiones':>11}")
+    for name, engine_cls in (('Intersection', Intersection), ('EventIntersection', EventIntersection)):
+        env = new_env(engine_cls, 0, 0)
+        decisions = 0
+        waiting = 0
+        start = time.perf_counter()
+        if engine_cls is EventIntersection:
+            step = 0
+            while step < num_steps:
+                decisions += 1
+                for count, _, waiting_now, _ in env.advance(queue_policy(env.get_state()), num_steps - step):
+                    waiting += waiting_now * count
+                    step += count
+        else:
+            for _ in range(num_steps):
+                decisions += 1
+                env.apply_action(queue_policy(env.get_state()))
+                env.step()
+                waiting += env.get_waiting_vehicles_count()
+        rate = num_steps / (time.perf_counter() - start)
+        print(f"{name:>22} {rate:>10.0f} {decisions:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del motor por eventos discretos")
+    parser.add_argument('--period', type=int, default=30)
+    args = parser.parse_args()
+
+    measure_periods(args.period)
+    measure_policy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Modo rápido (Intersection.fast_forward) contra step() uno por uno: mide steps/seg con un
+semáforo de ciclo fijo en la madrugada (00:00 a 05:00) y en un día completo con ambos
+motores (mejor de 3 corridas). Que ambos lleguen al mismo estado se verifica en
+tests/test_fast_forward.py.
+
+Uso:
+    python benchmarks/bench_fast_forward.py
+"""
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.interseccion import Intersection
+from backend.interseccion_numpy import NumpyIntersection
+
+ENGINES = {'python': Intersection, 'numpy': NumpyIntersection}
+
+
+# Semáforo de ciclo fijo: cambia cada `period` steps, avanzando el resto del ciclo con `advance`
+def run_fixed_cycle(env, num_steps, advance, period=30):
+    moved = 0
+    for start in range(0, num_steps, period):
+        env.apply_action(1)
+        moved += env.step()
+        moved += advance(env, min(period, num_steps - start) - 1)
+    return moved
+
+
+def step_by_step(env, num_steps):
+    return sum(env.step() for _ in range(num_steps))
+
+
+def fast_forward(env, num_steps):
+    return env.fast_forward(num_steps)
+
+
+# Mejor tiempo de `repeats` corridas, alternando los modos para que el ruido de la máquina los afecte por igual
+def bench(repeats=3):
+    print(f"\n{'tramo':>10} {'motor':>8} {'modo':>14} {'segundos':>10} {'steps/s':>10}")
+    for label, num_steps in (('madrugada', 5 * 3600), ('día', 86400)):
+        for name, engine_cls in ENGINES.items():
+            best = {}
+            for _ in range(repeats):
+                for advance in (step_by_step, fast_forward):
+                    random.seed(0)
+                    env = engine_cls()
+                    env.current_hour = 0
+                    start = time.perf_counter()
+                    run_fixed_cycle(env, num_steps, advance)
+                    elapsed = time.perf_counter() - start
+                    best[advance.__name__] = min(elapsed, best.get(advance.__name__, elapsed))
+            for mode, elapsed in best.items():
+                print(f"{label:>10} {name:>8} {mode:>14} {elapsed:>10.2f} {num_steps / elapsed:>10.0f}")
+
+
+def main():
+    bench()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Horario precalculado (backend/horario.py) y tablas del semáforo.
+
+1. Compara los autos generados durante un día con el perfil: total por franja y
+   proporción por dirección.
+2. Mide la contabilidad por step (reloj, intervalo de spawn, luz verde y categoría de
+   tiempo) con el cálculo anterior y con las tablas.
+
+Que las tablas coincidan con el cálculo por hora y que los motores reproduzcan a
+Intersection con el perfil de demanda se verifica en tests/test_horario.py.
+
+Uso:
+    python benchmarks/bench_horario.py [--demand resources/demanda_ejemplo.csv]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.horario import Horario, SECONDS_PER_DAY
+from backend.interseccion import Intersection
+from backend.semaforo import Semaforo, GREEN_CODES
+from backend.spawn_vehiculo import SpawnVehicle
+from backend.vehiculo import DIRECTIONS
+
+
+def with_schedule(env, schedule, hour):
+    env.spawn.schedule = schedule
+    env.current_hour = hour
+    return env
+
+
+def report_demand(demand, path):
+    env = with_schedule(Intersection(rng=np.random.default_rng(0)), demand, 0)
+    drawn = np.zeros((24, 4), dtype=np.int64)
+    draw = env.spawn.draw_direction
+
+    # Cuenta las direcciones sorteadas (autos que entran más spawns bloqueados)
+    def counted_draw(second=0):
+        direction = draw(second)
+        drawn[second // 3600, DIRECTIONS.index(direction)] += 1
+        return direction
+    env.spawn.draw_direction = counted_draw
+    for _ in range(SECONDS_PER_DAY):
+        env.step()
+
+    expected = demand.vehicles_per_hour()
+    print(f"Autos generados en un día con {os.path.relpath(path, ROOT)} "
+          f"(spawns bloqueados: {env.blocked_spawns})")
+    print(f"{'hora':>5} {'perfil':>7} {'generados':>10}   " + " ".join(f"{d:>6}" for d in DIRECTIONS))
+    for hour in range(24):
+        total = drawn[hour].sum()
+        shares = " ".join(f"{share:>6.2f}" for share in drawn[hour] / max(total, 1))
+        print(f"{hour:>5} {expected[hour]:>7.0f} {total:>10}   {shares}")
+    print()
+
+
+# Contabilidad por step como antes de las tablas
+def legacy_bookkeeping(num_steps):
+    spawner = SpawnVehicle()
+    semaforo = Semaforo()
+    hour, minute, second = 7, 0, 0
+    counter = 0
+    start = time.perf_counter()
+    for _ in range(num_steps):
+        second += 1
+        if second >= 60:
+            minute += 1
+            second = 0
+        if minute >= 60:
+            hour += 1
+            minute = 0
+        if hour >= 24:
+            hour = 0
+        counter += 1
+        if counter >= spawner.get_spawn_interval(hour):
+            counter = 0
+        semaforo.time_since_change += 1
+        green = 'norte' in (['norte', 'sur'] if semaforo.state == 0 else ['este', 'oeste'])
+        elapsed = semaforo.time_since_change
+        category = 0 if elapsed <= 10 else (1 if elapsed <= 20 else 2)
+        if semaforo.time_since_change > 30:
+            semaforo.time_since_change = 0.0
+    return time.perf_counter() - start
+
+
+def table_bookkeeping(num_steps):
+    spawner = SpawnVehicle()
+    semaforo = Semaforo()
+    time_of_day = 7 * 3600
+    counter = 0
+    start = time.perf_counter()
+    for _ in range(num_steps):
+        time_of_day = (time_of_day + 1) % SECONDS_PER_DAY
+        counter += 1
+        if counter >= spawner.schedule.interval[time_of_day]:
+            counter = 0
+        semaforo.time_since_change += 1
+        green = GREEN_CODES[semaforo.state][0]
+        category = semaforo.get_time_category()
+        if semaforo.time_since_change > 30:
+            semaforo.time_since_change = 0.0
+    return time.perf_counter() - start
+
+
+def measure(num_steps=SECONDS_PER_DAY, repeats=5):
+    legacy = min(legacy_bookkeeping(num_steps) for _ in range(repeats))
+    tables = min(table_bookkeeping(num_steps) for _ in range(repeats))
+    print("Contabilidad por step: reloj, intervalo de spawn, luz verde y categoría de tiempo")
+    print(f"{'cálculo':>9} {'ns/step':>8}")
+    print(f"{'anterior':>9} {legacy / num_steps * 1e9:>8.0f}")
+    print(f"{'tablas':>9} {tables / num_steps * 1e9:>8.0f}   ({legacy / tables:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del horario precalculado")
+    parser.add_argument('--demand', default=os.path.join(ROOT, 'resources', 'demanda_ejemplo.csv'))
+    args = parser.parse_args()
+
+    demand = Horario.from_csv(args.demand)
+    report_demand(demand, os.path.abspath(args.demand))
+    measure()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Compara el motor original de Intersection con el motor NumPy: mide steps/seg según la
+cantidad de vehículos en la grilla. Que ambos generen trayectorias idénticas con la misma
+semilla se verifica en tests/test_interseccion.py.
+
+Uso:
+    python benchmarks/bench_interseccion.py
+"""
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.interseccion import Intersection
+from backend.interseccion_numpy import NumpyIntersection
+
+ENGINES = {'python': Intersection, 'numpy': NumpyIntersection}
+
+
+# Política fija: cambia de fase cada `period` steps
+def fixed_cycle_action(step, period=30):
+    return 1 if step % period == 0 and step > 0 else 0
+
+
+def bench_engine(engine_cls, grid_size, warmup=500, steps=2000, seed=0):
+    random.seed(seed)
+    env = engine_cls(grid_size=grid_size)
+
+    for step in range(warmup):
+        env.apply_action(fixed_cycle_action(step))
+        env.step()
+
+    vehicles_sum = 0
+    start = time.perf_counter()
+    for step in range(warmup, warmup + steps):
+        env.apply_action(fixed_cycle_action(step))
+        env.step()
+        vehicles_sum += env.get_vehicle_count()
+    elapsed = time.perf_counter() - start
+    return vehicles_sum / steps, steps / elapsed
+
+
+def main():
+    # En hora punta la cantidad de vehículos crece con el tamaño de la grilla
+    print(f"\n{'grid':>5} {'vehículos':>10} " + " ".join(f"{name + ' steps/s':>16}" for name in ENGINES))
+    for grid_size in (40, 80, 160, 320, 640):
+        results = [bench_engine(cls, grid_size) for cls in ENGINES.values()]
+        avg_vehicles = results[0][0]
+        print(f"{grid_size:>5} {avg_vehicles:>10.1f} " + " ".join(f"{rate:>16.0f}" for _, rate in results))
+
+
+if __name__ == "__main__":
+    main()
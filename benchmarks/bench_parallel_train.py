@@ -0,0 +1,58 @@
+"""
+Curva de aceleración del entrenamiento paralelo (TrafficSimulator.train_parallel).
+
+Entrena la misma cantidad de episodios con 1, 2, 4, ... hasta os.cpu_count() workers
+y reporta episodios/seg y la aceleración respecto a 1 worker.
+
+Uso:
+    python benchmarks/bench_parallel_train.py [episodios] [steps_por_episodio]
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'agente')]
+
+from train_agent import TrafficSimulator
+
+
+def worker_counts():
+    max_workers = os.cpu_count() or 1
+    counts = []
+    workers = 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def bench_workers(num_workers, num_episodes, max_steps, sync_interval=2, seed=0):
+    simulator = TrafficSimulator(grid_size=40)
+    start = time.perf_counter()
+    simulator.train_parallel(num_episodes=num_episodes, max_steps_per_episode=max_steps,
+                             num_workers=num_workers, sync_interval=sync_interval, seed=seed,
+                             save_interval=num_episodes + 1, verbose=False)
+    return time.perf_counter() - start
+
+
+def main():
+    num_episodes = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    max_steps = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    # Los modelos se guardan en un directorio temporal
+    os.chdir(tempfile.mkdtemp())
+
+    print(f"{num_episodes} episodios de {max_steps} steps")
+    print(f"{'workers':>8} {'segundos':>10} {'episodios/s':>12} {'aceleración':>12}")
+    base_time = None
+    for num_workers in worker_counts():
+        elapsed = bench_workers(num_workers, num_episodes, max_steps)
+        base_time = base_time or elapsed
+        print(f"{num_workers:>8} {elapsed:>10.2f} {num_episodes / elapsed:>12.2f} {base_time / elapsed:>12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
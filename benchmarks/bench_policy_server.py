@@ -0,0 +1,95 @@
+"""
+Servidor de inferencia de la política (agente/policy_server.py): lo levanta en otro
+proceso con un policy.npy, genera carga local con lotes de 1 y 64 estados y muestra
+latencia p50/p99 y requests/seg medidas desde el cliente y desde el servidor. Que
+responda la acción de mayor valor Q y recargue el modelo sin reiniciarse se verifica en
+tests/test_policy_server.py.
+
+Uso:
+    python benchmarks/bench_policy_server.py [--seconds 3]
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'agente')]
+
+from q_learning_numpy import NumpyQLearning, NUM_STATES
+from checkpoint import export_policy
+from policy_server import request, generate_load, format_stats
+
+SEED = 0
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def write_policy(path, q_values):
+    agent = NumpyQLearning()
+    agent.q_table[:] = q_values
+    agent.visited[:] = True
+    export_policy(agent, path)
+
+
+async def query(port, method, target, payload=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        return await request(reader, writer, method, target, payload)
+    finally:
+        writer.close()
+
+
+def wait_for_version(port, version, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            _, health = asyncio.run(query(port, 'GET', '/health'))
+            if health['version'] >= version:
+                return
+        except OSError:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError(f"El servidor no llegó a la versión {version} del modelo")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del servidor de inferencia")
+    parser.add_argument('--seconds', type=float, default=3.0, help="duración de cada carga")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    policy = os.path.join(directory, 'policy.npy')
+    q_values = np.random.default_rng(SEED).normal(size=(NUM_STATES, 2))
+    write_policy(policy, q_values)
+
+    port = free_port()
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'agente', 'policy_server.py'), 'serve', policy,
+                               '--port', str(port), '--reload-interval', '0.2'], stdout=subprocess.DEVNULL)
+    try:
+        wait_for_version(port, 1)
+        for batch in (1, 64):
+            print(f"lote de {batch} estados, 8 clientes")
+            client_stats, server_stats = asyncio.run(generate_load(port=port, batch=batch, seconds=args.seconds))
+            print(format_stats('cliente', client_stats))
+            print(format_stats('servidor', server_stats))
+            print()
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
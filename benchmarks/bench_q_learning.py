@@ -0,0 +1,124 @@
+"""
+Compara la tabla Q de diccionario (QLearning) con la tabla en arreglo (NumpyQLearning).
+
+Mide operaciones/seg de get_action y update, individuales y en lote, y verifica que las
+individuales de NumpyQLearning no sean más lentas que las de QLearning. Que ambas elijan
+las mismas acciones y aprendan los mismos valores, y que update_batch coincida con
+actualizaciones una por una, se verifica en tests/test_q_learning.py.
+
+Uso:
+    python benchmarks/bench_q_learning.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'agente')]
+
+from q_learning import QLearning
+from q_learning_numpy import NumpyQLearning, STATE_RADIX, encode_states
+from replay_buffer import ReplayBuffer
+
+
+def random_states(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [tuple(int(rng.integers(radix)) for radix in STATE_RADIX) for _ in range(count)]
+
+
+def random_transitions(count, seed=0):
+    rng = np.random.default_rng(seed)
+    states = random_states(count + 1, seed)
+    actions = rng.integers(0, 2, size=count).tolist()
+    rewards = rng.normal(0, 5, size=count).tolist()
+    return states, actions, rewards
+
+
+def ops_per_second(function, count):
+    start = time.perf_counter()
+    function()
+    return count / (time.perf_counter() - start)
+
+
+def bench(steps=200000, batch_size=1024, repeats=5):
+    states, actions, rewards = random_transitions(steps)
+    tables = {'dict': QLearning, 'numpy': NumpyQLearning}
+    rates = {name: {} for name in tables}
+    # Las tablas se miden alternadas y se toma la mejor de `repeats` corridas
+    for _ in range(repeats):
+        for name, table_cls in tables.items():
+            np.random.seed(0)
+            agent = table_cls(epsilon=0.1)
+            # Cada tabla recibe los estados como en run_episode: convertidos con state_key
+            state_key = agent.state_key
+            keys = list(map(state_key, states))
+
+            def run_actions():
+                for state in keys[:steps]:
+                    agent.get_action(state)
+
+            def run_updates():
+                for i in range(steps):
+                    agent.update(keys[i], actions[i], rewards[i], keys[i + 1])
+
+            # Un step de entrenamiento: convertir el estado nuevo, elegir acción y actualizar
+            def run_steps():
+                state = state_key(states[0])
+                for i in range(steps):
+                    agent.get_action(state)
+                    next_state = state_key(states[i + 1])
+                    agent.update(state, actions[i], rewards[i], next_state)
+                    state = next_state
+
+            # get_action se mide después de update, con la tabla ya aprendida (menos empates)
+            for column, function in (('update', run_updates), ('get_action', run_actions), ('step', run_steps)):
+                rates[name][column] = max(rates[name].get(column, 0.0), ops_per_second(function, steps))
+
+    print(f"{'tabla':>8} {'get_action/s':>14} {'update/s':>14} {'step/s':>14}")
+    for name, rate in rates.items():
+        print(f"{name:>8} {rate['get_action']:>14.0f} {rate['update']:>14.0f} {rate['step']:>14.0f}")
+    for column in ('get_action', 'update', 'step'):
+        assert rates['numpy'][column] >= rates['dict'][column], f"NumpyQLearning: {column} más lento que QLearning"
+
+    agent = NumpyQLearning(epsilon=0.1)
+    indices = encode_states(states)
+    actions = np.array(actions)
+    rewards = np.array(rewards)
+    dones = np.zeros(steps, dtype=bool)
+
+    def run_batch_actions():
+        for start in range(0, steps, batch_size):
+            agent.get_actions(indices[start:start + batch_size])
+
+    def run_batch_updates():
+        for start in range(0, steps, batch_size):
+            stop = min(start + batch_size, steps)
+            agent.update_batch(indices[start:stop], actions[start:stop], rewards[start:stop],
+                               indices[start + 1:stop + 1], dones[start:stop])
+
+    print(f"{'lote':>8} {ops_per_second(run_batch_actions, steps):>14.0f} "
+          f"{ops_per_second(run_batch_updates, steps):>14.0f}   (lotes de {batch_size})")
+
+    # Memoria de experiencia: guardar cada transición y aprender por lotes
+    for prioritized in (False, True):
+        buffer = ReplayBuffer(capacity=steps, prioritized=prioritized)
+
+        def run_replay():
+            for i in range(steps):
+                buffer.add(indices[i], actions[i], rewards[i], indices[i + 1], False)
+                if (i + 1) % batch_size == 0:
+                    buffer.replay(agent, buffer.last_indices(batch_size))
+                    buffer.replay(agent, buffer.sample_indices(batch_size))
+
+        name = 'replay-p' if prioritized else 'replay'
+        print(f"{name:>8} {'':>14} {ops_per_second(run_replay, steps):>14.0f}   (guardar + lote nuevo + lote muestreado)")
+
+
+def main():
+    bench()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Red de intersecciones (RoadNetwork): mide steps de intersección/seg con 1, 4, 16 y 64
+intersecciones, secuencial y con un proceso por CPU, y muestra las métricas por
+intersección de la red de 2x2. Que dividir la red en regiones paralelas no cambie la
+simulación se verifica en tests/test_red_vial.py.
+
+Uso:
+    python benchmarks/bench_red_vial.py
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.red_vial import RoadNetwork
+
+SEED = 0
+SIDES = (1, 2, 4, 8)
+
+
+def run(side, num_steps, num_workers, warmup=0):
+    with RoadNetwork(side, side, seed=SEED, num_workers=num_workers) as network:
+        network.step(warmup)
+        start = time.perf_counter()
+        network.step(num_steps)
+        elapsed = time.perf_counter() - start
+        return network.get_metrics(), elapsed
+
+
+def bench(num_steps=1000, warmup=500):
+    workers = sorted({1, os.cpu_count() or 1})
+    print(f"{'intersecciones':>14} {'procesos':>9} {'steps/s':>10} {'inters.-steps/s':>16}")
+    for side in SIDES:
+        for num_workers in workers:
+            _, elapsed = run(side, num_steps, num_workers, warmup)
+            print(f"{side * side:>14} {num_workers:>9} {num_steps / elapsed:>10.0f} "
+                  f"{side * side * num_steps / elapsed:>16.0f}")
+
+
+def show_metrics(side=2, num_steps=5000):
+    metrics, _ = run(side, num_steps, num_workers=1)
+    print(f"\n{'inters.':>7} {'autos/step':>11} {'esperando':>10} {'llegadas':>9} "
+          f"{'demoradas':>10} {'salidas':>8} {'cambios':>8}")
+    for junction, junction_metrics in enumerate(metrics):
+        print(f"{junction:>7} {junction_metrics['throughput']:>11.2f} {junction_metrics['avg_waiting']:>10.2f} "
+              f"{junction_metrics['arrivals']:>9} {junction_metrics['delayed_arrivals']:>10} "
+              f"{junction_metrics['network_exits']:>8} {junction_metrics['phase_changes']:>8}")
+
+
+def main():
+    bench()
+    show_metrics()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Tiempo por frame del renderer de frontend/main.py según la cantidad de autos.
+
+Compara Game.draw (sprites rotados en caché, capa estática y dirty rects) con el
+dibujo anterior, que rotaba la imagen de cada auto y dibujaba la grilla completa en
+cada frame. Los autos se ubican al azar y cambian en cada frame (el peor caso: el
+snapshot nunca se repite); la última columna repite el mismo snapshot, como al
+visualizar más lento que los FPS, con el overlay de FPS activo.
+Corre sin ventana con el driver de video dummy de SDL, así que no incluye el costo de
+copiar a la pantalla real lo que evitan los dirty rects.
+
+Uso:
+    python benchmarks/bench_render.py [--frames 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.vehiculo import DIRECTIONS
+from frontend.main import Game
+from frontend.simulacion import Snapshot
+
+SEED = 0
+VEHICLE_COUNTS = (0, 50, 200, 800, 1600)
+
+
+def random_snapshots(count, frames, grid_size):
+    rng = np.random.default_rng(SEED)
+    snapshots = []
+    for step in range(frames):
+        positions = rng.integers(grid_size, size=(count, 2))
+        directions = rng.integers(4, size=count)
+        images = rng.integers(1, 6, size=count)
+        vehicles = tuple((int(x), int(y), DIRECTIONS[d], int(i)) for (x, y), d, i in zip(positions, directions, images))
+        snapshots.append(Snapshot(step + 1, vehicles, step // 30 % 2, 7, step // 60, step % 60))
+    return snapshots
+
+
+# Dibujo anterior a la caché: rotación por auto y grilla completa en cada frame
+def draw_uncached(game, snapshot):
+    screen = game.screen
+    screen.fill((30,30,30))
+    screen.blit(game._Game__background, (0,0))
+    grid_size = game.interseccion.get_size()
+    rec_size = game.screen_size/grid_size
+    cars = game._Game__cars
+    for x, y, direction, image in snapshot.vehicles:
+        car_image = cars[image - 1]
+        cx = x * rec_size
+        cy = y * rec_size
+        if direction == "sur":
+            car_image = pygame.transform.rotate(car_image, 180)
+            cx = (x*rec_size) - 2.2*rec_size
+        elif direction == "este":
+            car_image = pygame.transform.rotate(car_image, -90)
+            cy = (y*rec_size) + (0.8*rec_size)
+        elif direction == "oeste":
+            car_image = pygame.transform.rotate(car_image, 90)
+            cy = (y * rec_size) - (1.8*rec_size)
+        else:
+            cx = (x * rec_size) + 1 * rec_size
+        screen.blit(car_image, (cx, cy))
+    lights = game._Game__trafficlight_img
+    screen.blit(lights[2] if snapshot.light_state == 0 else lights[0], (20*rec_size, 5.5*rec_size))
+    hora = game.font_minecraft.render(f"{snapshot.hour}:{snapshot.minute}:{snapshot.second}", True, (255,255,255))
+    screen.blit(hora, (1*rec_size, 1*rec_size))
+    if game._Game__GRID:
+        occupied = {(x, y) for x, y, _, _ in snapshot.vehicles}
+        for i in range(grid_size):
+            for j in range(grid_size):
+                rec_color = (120,40,20) if (i, j) in occupied else (60, 60, 120)
+                pygame.draw.rect(screen, rec_color, (rec_size*i, rec_size*j, rec_size-30, rec_size-30), border_radius = 15)
+    pygame.display.flip()
+
+
+def frame_ms(game, snapshots, cached, repeat=False):
+    start = time.perf_counter()
+    for snapshot in snapshots:
+        if repeat:
+            # El mismo snapshot en todos los frames (simulación más lenta que el dibujo)
+            game.draw()
+        elif cached:
+            game.simulation.snapshot = snapshot
+            game.draw()
+        else:
+            draw_uncached(game, snapshot)
+    return 1000 * (time.perf_counter() - start) / len(snapshots)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo por frame del renderer")
+    parser.add_argument('--frames', type=int, default=200)
+    args = parser.parse_args()
+
+    # Las imágenes se cargan con rutas relativas a frontend/
+    os.chdir(os.path.join(ROOT, 'frontend'))
+    print(f"{'grilla':>7} {'autos':>6} {'sin caché (ms)':>15} {'con caché (ms)':>15} {'sin cambios (ms)':>17}")
+    for grid in (False, True):
+        game = Game(0, grid, overlay=False)
+        for count in VEHICLE_COUNTS:
+            snapshots = random_snapshots(count, args.frames, game.interseccion.get_size())
+            uncached = frame_ms(game, snapshots, cached=False)
+            game.build_render_cache()
+            game.show_overlay = False
+            cached = frame_ms(game, snapshots, cached=True)
+            game.show_overlay = True
+            repeated = frame_ms(game, snapshots, cached=True, repeat=True)
+            print(f"{str(grid):>7} {count:>6} {uncached:>15.3f} {cached:>15.3f} {repeated:>17.3f}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
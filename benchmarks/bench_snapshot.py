@@ -0,0 +1,142 @@
+"""
+Fotos del entorno: Intersection.snapshot / restore.
+
+1. Mide el costo y el tamaño de una foto en hora punta contra copy.deepcopy del entorno.
+2. Mide el inicio de un episodio con tráfico formado: precalentar `--warmup` steps
+   contra restaurar una foto del pool (TrafficSimulator.enable_warm_starts).
+3. Mide la comparación de las dos acciones en varios puntos de una trayectoria:
+   re-simulando desde el inicio hasta cada punto contra ramas desde una foto
+   (agente/evaluation.branch_returns).
+
+Que restaurar una foto repita exactamente lo que siguió y que las ramas den lo mismo que
+re-simular se verifica en tests/test_snapshot.py.
+
+Uso:
+    python benchmarks/bench_snapshot.py [--warmup 1800] [--horizon 120] [--points 20]
+"""
+import argparse
+import copy
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'agente')]
+
+from backend.interseccion import Intersection
+from backend.interseccion_eventos import EventIntersection
+from backend.interseccion_numpy import NumpyIntersection
+from policies import FixedCyclePolicy
+from evaluation import branch_returns, run_policy_episode
+
+ENGINES = (Intersection, NumpyIntersection, EventIntersection)
+
+
+# Entorno en hora punta tras `warmup` steps con un ciclo fijo
+def warm_environment(engine_cls, warmup, seed=0):
+    env = engine_cls(rng=np.random.default_rng(seed))
+    env.set_clock(17)
+    run_policy_episode(env, FixedCyclePolicy(30), warmup)
+    return env
+
+
+def best_time(function, repeats):
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            function()
+        best = min(best, (time.perf_counter() - start) / repeats)
+    return best
+
+
+def measure_snapshot(warmup):
+    print(f"Foto en hora punta tras {warmup} steps")
+    print(f"{'motor':>18} {'autos':>6} {'snapshot µs':>12} {'restore µs':>11} {'bytes':>7} "
+          f"{'deepcopy µs':>12} {'bytes':>7}")
+    for engine_cls in ENGINES:
+        env = warm_environment(engine_cls, warmup)
+        snapshot = env.snapshot()
+        take = best_time(env.snapshot, 200)
+        restore = best_time(lambda: env.restore(snapshot), 200)
+        deep = best_time(lambda: copy.deepcopy(env), 20)
+        print(f"{engine_cls.__name__:>18} {env.get_vehicle_count():>6} {take * 1e6:>12.0f} {restore * 1e6:>11.0f} "
+              f"{len(pickle.dumps(snapshot)):>7} {deep * 1e6:>12.0f} {len(pickle.dumps(env)):>7}")
+    print()
+
+
+def measure_episode_start(warmup, episodes=20):
+    print(f"Inicio de episodio con tráfico formado ({warmup} steps de precalentamiento)")
+    print(f"{'motor':>18} {'precalentar ms':>15} {'restaurar ms':>13} {'aceleración':>12}")
+    for engine_cls in ENGINES:
+        start = time.perf_counter()
+        for episode in range(episodes):
+            warm_environment(engine_cls, warmup, episode)
+        warming = (time.perf_counter() - start) / episodes
+
+        pool = [warm_environment(engine_cls, warmup, seed).snapshot() for seed in range(8)]
+        start = time.perf_counter()
+        for episode in range(episodes):
+            engine_cls(rng=np.random.default_rng(episode)).restore(pool[episode % len(pool)], draws=False)
+        restoring = (time.perf_counter() - start) / episodes
+        print(f"{engine_cls.__name__:>18} {warming * 1e3:>15.2f} {restoring * 1e3:>13.3f} {warming / restoring:>11.0f}x")
+    print()
+
+
+# Compara las dos acciones en `points` puntos de una trayectoria simulando desde el inicio hasta
+# cada punto, como sin fotos
+def resimulated_branches(engine_cls, warmup, points, every, horizon):
+    policy = FixedCyclePolicy(30)
+    returns = []
+    for point in range(points):
+        for action in (0, 1):
+            env = warm_environment(engine_cls, warmup)
+            run_policy_episode(env, policy, point * every)
+            env.apply_action(action)
+            moved = env.step()
+            reward = env.step_reward(action, moved, env.get_waiting_vehicles_count())
+            returns.append(reward + run_policy_episode(env, policy, horizon - 1)[0])
+    return returns
+
+
+def snapshot_branches(engine_cls, warmup, points, every, horizon):
+    policy = FixedCyclePolicy(30)
+    returns = []
+    env = warm_environment(engine_cls, warmup)
+    for point in range(points):
+        if point:
+            run_policy_episode(env, policy, every)
+        returns.extend(branch_returns(env, policy, horizon))
+    return returns
+
+
+def measure_branching(warmup, points, horizon, every=60):
+    print(f"Comparar las dos acciones en {points} puntos (cada {every} steps, ramas de {horizon} steps)")
+    print(f"{'motor':>18} {'re-simular s':>13} {'fotos s':>8} {'aceleración':>12}")
+    for engine_cls in ENGINES:
+        start = time.perf_counter()
+        resimulated_branches(engine_cls, warmup, points, every, horizon)
+        resimulating = time.perf_counter() - start
+        start = time.perf_counter()
+        snapshot_branches(engine_cls, warmup, points, every, horizon)
+        branching = time.perf_counter() - start
+        print(f"{engine_cls.__name__:>18} {resimulating:>13.2f} {branching:>8.2f} {resimulating / branching:>11.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las fotos del entorno")
+    parser.add_argument('--warmup', type=int, default=1800)
+    parser.add_argument('--horizon', type=int, default=120)
+    parser.add_argument('--points', type=int, default=20)
+    args = parser.parse_args()
+
+    measure_snapshot(args.warmup)
+    measure_episode_start(args.warmup)
+    measure_branching(args.warmup, args.points, args.horizon)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Barrido de hiperparámetros (agente/sweep.py): mide el barrido completo con 1, 2, 4, ...
+hasta os.cpu_count() workers, sin y con detención temprana (episodios corridos y tiempo
+total), y estima cuánto demora con 32 workers un barrido que toma 24 horas en serie. Que
+sin detención temprana la tabla no dependa de los workers se verifica en
+tests/test_sweep.py.
+
+Uso:
+    python benchmarks/bench_sweep.py [--trials 24] [--episodes 60] [--max-steps 300]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'agente')]
+
+from bench_parallel_train import worker_counts
+from sweep import Sweep, RANDOM_SPACE, random_search
+
+
+def run(trials, path, workers, args, early_stopping):
+    sweep = Sweep(trials, path, episodes=args.episodes, max_steps=args.max_steps, min_episodes=args.episodes // 4,
+                  report_every=max(1, args.episodes // 12), early_stopping=early_stopping)
+    start = time.perf_counter()
+    rows = sweep.run(workers, verbose=False)
+    return time.perf_counter() - start, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del barrido de hiperparámetros")
+    parser.add_argument('--trials', type=int, default=24)
+    parser.add_argument('--episodes', type=int, default=60)
+    parser.add_argument('--max-steps', type=int, default=300)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'barrido.csv')
+    trials = random_search(RANDOM_SPACE, args.trials)
+
+    serial_time, _ = run(trials, path, 1, args, early_stopping=False)
+
+    total_episodes = args.trials * args.episodes
+    print(f"{args.trials} pruebas de {args.episodes} episodios de {args.max_steps} steps")
+    print(f"{'workers':>8} {'detención':>10} {'episodios':>10} {'segundos':>10} {'aceleración':>12}")
+    print(f"{1:>8} {'no':>10} {total_episodes:>10} {serial_time:>10.2f} {1:>11.2f}x")
+    speedups = {}
+    for workers in worker_counts():
+        elapsed, rows = run(trials, path, workers, args, early_stopping=True)
+        episodes = sum(row['episodes'] for row in rows)
+        speedups[workers] = (serial_time / elapsed, episodes / total_episodes)
+        print(f"{workers:>8} {'sí':>10} {episodes:>10} {elapsed:>10.2f} {serial_time / elapsed:>11.2f}x")
+    shutil.rmtree(directory)
+
+    # Estimación: los episodios que quedan tras la detención temprana repartidos en 32 workers,
+    # con la eficiencia por worker medida con la mayor cantidad de workers disponible
+    workers = max(speedups)
+    speedup, fraction = speedups[workers]
+    efficiency = min(1.0, speedup * fraction / workers)
+    hours = 24 * fraction / (32 * efficiency)
+    print(f"\nDetención temprana: {100 * fraction:.0f}% de los episodios; eficiencia por worker con "
+          f"{workers} workers: {100 * efficiency:.0f}%")
+    if workers == 1:
+        print("(con un solo núcleo la eficiencia del pool con varios workers no se puede medir)")
+    print(f"Barrido de 24 h en serie con 32 workers: ~{60 * hours:.0f} minutos")
+
+
+if __name__ == "__main__":
+    main()
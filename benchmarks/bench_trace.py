@@ -0,0 +1,136 @@
+"""
+Trazas de simulación (backend/trace.py).
+
+1. Mide el costo de grabar por step: record() en el hilo de la simulación y la escritura
+   del bloque (codificar y comprimir), que normalmente corre en un hilo aparte, comparado
+   con el costo de Intersection.step.
+2. Compara el tamaño de la traza con guardar todos los vehículos en cada step y mide la
+   velocidad de reproducción (snapshots/seg, sin dibujar).
+3. Compara el tiempo de train sin traza, grabando todos los episodios y con el valor por
+   defecto de enable_trace (uno de cada TRACE_EVERY), mejor de --repeats corridas.
+
+Que la reproducción entregue exactamente los snapshots tomados en vivo se verifica en
+tests/test_trace.py.
+
+Uso:
+    python benchmarks/bench_trace.py [--steps 20000] [--repeats 3]
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'agente')]
+
+from backend.interseccion import Intersection
+from backend.interseccion_numpy import NumpyIntersection
+from backend.trace import TraceRecorder, TraceReader
+from train_agent import TrafficSimulator, TRACE_EVERY
+
+SEED = 0
+ENGINES = {'python': Intersection, 'numpy': NumpyIntersection}
+
+
+def rush_hour_env(engine_cls):
+    env = engine_cls(rng=np.random.default_rng(SEED))
+    env.current_hour = 7
+    return env
+
+
+def measure(engine_cls, path, steps):
+    env = rush_hour_env(engine_cls)
+    recorder = TraceRecorder(path, env.get_size(), background=False)
+    write = recorder.write
+    write_time = 0.0
+
+    def timed_write(*chunk):
+        nonlocal write_time
+        start = time.perf_counter()
+        write(*chunk)
+        write_time += time.perf_counter() - start
+    recorder.write = timed_write
+
+    step_time = record_time = 0.0
+    vehicles = 0
+    for step in range(steps):
+        start = time.perf_counter()
+        env.step()
+        middle = time.perf_counter()
+        recorder.record(env, step)
+        record_time += time.perf_counter() - middle
+        step_time += middle - start
+        vehicles += env.get_vehicle_count()
+    start = time.perf_counter()
+    recorder.close()
+    record_time += time.perf_counter() - start
+
+    start = time.perf_counter()
+    replayed = sum(1 for _ in TraceReader(path).frames())
+    replay_rate = replayed / (time.perf_counter() - start)
+    # Guardar todos los vehículos en cada step: 4 enteros int16 por vehículo
+    full_size = vehicles * 4 * 2
+    return step_time, record_time - write_time, write_time, os.path.getsize(path), full_size, vehicles / steps, replay_rate
+
+
+def train_seconds(engine, path, every):
+    simulator = TrafficSimulator(grid_size=40, engine=engine, seed=SEED)
+    if path is not None:
+        simulator.enable_trace(path, every=every)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulator.train(num_episodes=TRACE_EVERY, max_steps_per_episode=1500, save_interval=1000, verbose=False)
+    elapsed = time.perf_counter() - start
+    simulator.close_trace()
+    return elapsed
+
+
+# Mejor tiempo de train sin traza, grabando todos los episodios y con el valor por defecto,
+# alternando las tres para que el ruido de la máquina las afecte por igual
+def train_overhead(engine, path, repeats):
+    runs = ((None, 1), (path, 1), (path, TRACE_EVERY))
+    best = [float('inf')] * len(runs)
+    for _ in range(repeats):
+        for index, (trace_path, every) in enumerate(runs):
+            best[index] = min(best[index], train_seconds(engine, trace_path, every))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las trazas de simulación")
+    parser.add_argument('--steps', type=int, default=20000)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    # train guarda la tabla Q en models/, relativo al directorio actual
+    directory = tempfile.mkdtemp()
+    os.chdir(directory)
+    path = os.path.join(directory, 'traza.bin')
+
+    print(f"{'motor':>7} {'autos':>6} {'step (us)':>10} {'record (us)':>12} {'escritura (us)':>15} "
+          f"{'sobrecosto':>11} {'bytes/step':>11} {'sin deltas':>11} {'reproducción':>14}")
+    for name, engine_cls in ENGINES.items():
+        step_time, record_time, write_time, size, full_size, vehicles, replay_rate = measure(engine_cls, path, args.steps)
+        us = 1e6 / args.steps
+        overhead = 100 * (record_time + write_time) / step_time
+        print(f"{name:>7} {vehicles:>6.1f} {step_time * us:>10.2f} {record_time * us:>12.2f} {write_time * us:>15.2f} "
+              f"{overhead:>10.1f}% {size / args.steps:>11.1f} {full_size / args.steps:>11.1f} {replay_rate:>12.0f}/s")
+
+    print(f"\n{'motor':>7} {'train (s)':>10} {'todos (s)':>10} {'sobrecosto':>11} "
+          f"{f'1 de {TRACE_EVERY} (s)':>11} {'sobrecosto':>11}")
+    for name in ENGINES:
+        plain, every_episode, default = train_overhead(name, path, args.repeats)
+        print(f"{name:>7} {plain:>10.3f} {every_episode:>10.3f} {100 * (every_episode / plain - 1):>10.1f}% "
+              f"{default:>11.3f} {100 * (default / plain - 1):>10.1f}%")
+    os.chdir(ROOT)
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Entorno vectorizado (VectorIntersection) contra intersecciones individuales: mide steps
+de intersección por segundo según el tamaño del lote, y las transiciones/seg de
+TrafficSimulator.train_vectorized. Que cada intersección del lote reproduzca exactamente
+a una Intersection se verifica en tests/test_vector.py.
+
+Uso:
+    python benchmarks/bench_vector.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'agente')]
+
+from backend.interseccion import Intersection
+from backend.interseccion_numpy import NumpyIntersection
+from backend.interseccion_vector import VectorIntersection
+from train_agent import TrafficSimulator
+
+
+def bench_steps(num_steps=1000, warmup=500):
+    print(f"\n{'motor':>10} {'lote':>6} {'steps de intersección/s':>24}")
+    for name, engine_cls in (('python', Intersection), ('numpy', NumpyIntersection)):
+        env = engine_cls(rng=0)
+        for _ in range(warmup):
+            env.step()
+        start = time.perf_counter()
+        for step in range(num_steps):
+            env.apply_action(1 if step % 30 == 0 else 0)
+            env.step()
+        print(f"{name:>10} {1:>6} {num_steps / (time.perf_counter() - start):>24.0f}")
+
+    for num_envs in (1, 16, 64, 256, 1024):
+        env = VectorIntersection(num_envs, rng=0)
+        for _ in range(warmup):
+            env.step()
+        start = time.perf_counter()
+        for step in range(num_steps):
+            env.step(1 if step % 30 == 0 else 0)
+        elapsed = time.perf_counter() - start
+        print(f"{'vector':>10} {num_envs:>6} {num_envs * num_steps / elapsed:>24.0f}")
+
+
+def bench_train(max_steps=1000):
+    # Los modelos se guardan en un directorio temporal
+    os.chdir(tempfile.mkdtemp())
+    print(f"\n{'entrenamiento':>14} {'lote':>6} {'transiciones/s':>16}")
+    simulator = TrafficSimulator(grid_size=40, engine='numpy', table='numpy', seed=0)
+    start = time.perf_counter()
+    simulator.train(num_episodes=2, max_steps_per_episode=max_steps, verbose=False)
+    print(f"{'train':>14} {1:>6} {2 * max_steps / (time.perf_counter() - start):>16.0f}")
+
+    for num_envs in (16, 64, 256):
+        simulator = TrafficSimulator(grid_size=40, table='numpy', seed=0)
+        start = time.perf_counter()
+        simulator.train_vectorized(num_episodes=num_envs, max_steps_per_episode=max_steps,
+                                   num_envs=num_envs, verbose=False)
+        elapsed = time.perf_counter() - start
+        print(f"{'vectorizado':>14} {num_envs:>6} {num_envs * max_steps / elapsed:>16.0f}")
+
+
+def main():
+    bench_steps()
+    bench_train()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Memoria y asignaciones de Vehiculo.
+
+1. Compara los bytes por vehículo de Vehiculo (__slots__, dirección como código)
+   con la representación anterior (atributos en __dict__ y posición en una lista).
+2. Cuenta los vehículos creados en una corrida larga con y sin reutilización
+   (SpawnVehicle.reuse_vehicles), y mide steps/seg.
+3. Mide sorteos/seg de dirección e imagen: módulo random global vs generador propio por bloques.
+
+Que reutilizar vehículos no cambie la simulación se verifica en tests/test_vehiculo.py.
+
+Uso:
+    python benchmarks/bench_vehiculo.py
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.interseccion import Intersection
+from backend.spawn_vehiculo import SpawnVehicle
+from backend.vehiculo import Vehiculo
+
+
+# Representación anterior de Vehiculo, sólo para comparar memoria
+class VehiculoDict:
+    def __init__(self, position, direction):
+        self.__position = [position[0], position[1]]
+        self.__direction = direction
+        self.image = random.randint(1,5)
+
+
+def bytes_per_vehicle(vehicle_cls, count=100000):
+    directions = ['norte', 'sur', 'este', 'oeste']
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    vehicles = [vehicle_cls((1000 + i, 1000 + i), directions[i % 4]) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Descontar la lista que los contiene
+    return (after - before - sys.getsizeof(vehicles)) / len(vehicles)
+
+
+def run(num_steps, reuse_vehicles, seed=0):
+    random.seed(seed)
+    env = Intersection()
+    env.spawn.reuse_vehicles = reuse_vehicles
+    env.current_hour = 7  # Hora punta: la mayor cantidad de autos entrando y saliendo
+    start = time.perf_counter()
+    for step in range(num_steps):
+        if step % 30 == 0:
+            env.apply_action(1)
+        env.step()
+    elapsed = time.perf_counter() - start
+    return env, elapsed
+
+
+def bench(num_steps=100000):
+    print(f"{'representación':>16} {'bytes/vehículo':>16}")
+    for name, vehicle_cls in (('__dict__', VehiculoDict), ('__slots__', Vehiculo)):
+        print(f"{name:>16} {bytes_per_vehicle(vehicle_cls):>16.1f}")
+
+    print(f"\n{'reutilizar':>12} {'creados':>10} {'reutilizados':>14} {'steps/s':>10}")
+    for reuse_vehicles in (False, True):
+        env, elapsed = run(num_steps, reuse_vehicles)
+        print(f"{str(reuse_vehicles):>12} {env.spawn.created_vehicles:>10} "
+              f"{env.spawn.reused_vehicles:>14} {num_steps / elapsed:>10.0f}")
+
+
+def bench_draws(count=200000):
+    print(f"\n{'sorteos':>12} {'por seg':>12}")
+    for name, rng in (('random', None), ('generador', 0)):
+        spawner = SpawnVehicle(rng=rng)
+        start = time.perf_counter()
+        for _ in range(count):
+            spawner.draw_direction()
+            spawner.draw_image()
+        print(f"{name:>12} {count / (time.perf_counter() - start):>12.0f}")
+
+
+def main():
+    bench()
+    bench_draws()
+
+
+if __name__ == "__main__":
+    main()
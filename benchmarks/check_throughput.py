@@ -0,0 +1,62 @@
+"""
+Flujo (movimientos por step) y salida de vehículos con semáforo de ciclo fijo: tiempos
+por motor e imprime los valores que fija tests/test_throughput.py.
+
+La verificación (valores fijados e "ningún auto pierde su movimiento") está en
+tests/test_throughput.py. Si un cambio en la simulación modifica el flujo a propósito,
+copiar en EXPECTED de ese test las líneas que imprime este script.
+
+Uso:
+    python benchmarks/check_throughput.py [--steps 3600]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.interseccion import Intersection
+from backend.interseccion_numpy import NumpyIntersection
+from backend.interseccion_eventos import EventIntersection
+
+ENGINES = {'python': Intersection, 'numpy': NumpyIntersection, 'events': EventIntersection}
+
+
+def throughput(engine_cls, seed, hour, num_steps=3600, period=30):
+    random.seed(seed)
+    env = engine_cls()
+    env.current_hour = hour
+    moved = 0
+    for step in range(num_steps):
+        if step % period == 0:
+            env.apply_action(1)
+        moved += env.step()
+    return moved, env.exited_vehicles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flujo y salida de vehículos por motor")
+    parser.add_argument('--steps', type=int, default=3600)
+    args = parser.parse_args()
+
+    print(f"{'semilla':>8} {'hora':>5} {'motor':>7} {'movimientos':>12} {'salieron':>9} {'steps/s':>10}")
+    values = {}
+    for seed in (0, 1):
+        for hour in (0, 7, 12):
+            for name, engine_cls in ENGINES.items():
+                start = time.perf_counter()
+                moved, exited = throughput(engine_cls, seed, hour, args.steps)
+                elapsed = time.perf_counter() - start
+                values.setdefault((seed, hour), (moved, exited))
+                print(f"{seed:>8} {hour:>5} {name:>7} {moved:>12} {exited:>9} {args.steps / elapsed:>10.0f}")
+
+    print("\nEXPECTED de tests/test_throughput.py:")
+    for (seed, hour), (moved, exited) in values.items():
+        print(f"    ({seed}, {hour:>2}): ({moved}, {exited}),")
+
+
+if __name__ == "__main__":
+    main()
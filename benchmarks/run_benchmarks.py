@@ -0,0 +1,267 @@
+"""
+Suite de benchmarks del simulador, del agente y del entrenamiento, con semillas fijas.
+
+Mide:
+- steps/seg de Intersection.step por motor, grid_size y densidad de tráfico
+  (hora punta vs madrugada, con semáforo de ciclo fijo)
+- steps de intersección/seg de VectorIntersection según el tamaño del lote
+- get_action/seg y update/seg de QLearning y NumpyQLearning
+- latencia de save/load con la tabla Q completa
+- episodios/seg de TrafficSimulator.train
+
+Los resultados se guardan como JSON (por defecto en benchmarks/results/<commit>.json).
+Con --compare se comparan contra otro archivo y se marcan las regresiones
+(cada medida es "mayor es mejor" salvo las latencias, en segundos).
+
+Uso:
+    python benchmarks/run_benchmarks.py [--quick] [--output archivo.json] [--compare anterior.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'agente')]
+
+from backend.interseccion import Intersection
+from backend.interseccion_numpy import NumpyIntersection
+from backend.interseccion_eventos import EventIntersection
+from backend.interseccion_vector import VectorIntersection
+from q_learning import QLearning
+from q_learning_numpy import NumpyQLearning, STATE_RADIX, NUM_STATES, decode_state
+from train_agent import TrafficSimulator
+
+ENGINES = {'python': Intersection, 'numpy': NumpyIntersection, 'events': EventIntersection}
+TABLES = {'dict': QLearning, 'numpy': NumpyQLearning}
+
+# Hora de inicio de cada densidad de tráfico
+DENSITIES = {'punta': 7, 'madrugada': 2}
+
+SEED = 0
+
+
+# Mejor tiempo de `repeats` corridas de function() (cada una con su preparación)
+def best_time(function, repeats, setup=None):
+    best = float('inf')
+    for _ in range(repeats):
+        argument = setup() if setup is not None else None
+        start = time.perf_counter()
+        function(argument)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_step(grid_sizes, num_steps, warmup, repeats):
+    results = {}
+    for engine, engine_cls in ENGINES.items():
+        for grid_size in grid_sizes:
+            for density, hour in DENSITIES.items():
+                def setup():
+                    random.seed(SEED)
+                    env = engine_cls(grid_size=grid_size)
+                    env.current_hour = hour
+                    # Llenar la grilla antes de medir
+                    for step in range(warmup):
+                        if step % 30 == 0:
+                            env.apply_action(1)
+                        env.step()
+                    return env
+
+                def run(env):
+                    for step in range(num_steps):
+                        if step % 30 == 0:
+                            env.apply_action(1)
+                        env.step()
+
+                elapsed = best_time(run, repeats, setup)
+                results[f"step/{engine}/grid{grid_size}/{density}"] = num_steps / elapsed
+    return results
+
+
+def bench_vector(batch_sizes, num_steps, warmup, repeats):
+    results = {}
+    for num_envs in batch_sizes:
+        def setup():
+            env = VectorIntersection(num_envs, rng=SEED)
+            for step in range(warmup):
+                env.step(1 if step % 30 == 0 else 0)
+            return env
+
+        def run(env):
+            for step in range(num_steps):
+                env.step(1 if step % 30 == 0 else 0)
+
+        elapsed = best_time(run, repeats, setup)
+        results[f"step/vector/envs{num_envs}/grid40/punta"] = num_envs * num_steps / elapsed
+    return results
+
+
+def random_transitions(count):
+    rng = np.random.default_rng(SEED)
+    states = [tuple(int(rng.integers(radix)) for radix in STATE_RADIX) for _ in range(count + 1)]
+    actions = rng.integers(0, 2, size=count).tolist()
+    rewards = rng.normal(0, 5, size=count).tolist()
+    return states, actions, rewards
+
+
+def bench_agent(num_ops, repeats):
+    results = {}
+    states, actions, rewards = random_transitions(num_ops)
+    for name, table_cls in TABLES.items():
+        # Estados convertidos como en run_episode (ver QLearning.state_key)
+        keys = list(map(table_cls().state_key, states))
+
+        def setup():
+            np.random.seed(SEED)
+            return table_cls(epsilon=0.1)
+
+        def run_actions(agent):
+            for state in keys[:num_ops]:
+                agent.get_action(state)
+
+        def run_updates(agent):
+            for i in range(num_ops):
+                agent.update(keys[i], actions[i], rewards[i], keys[i + 1])
+
+        results[f"agent/{name}/get_action"] = num_ops / best_time(run_actions, repeats, setup)
+        results[f"agent/{name}/update"] = num_ops / best_time(run_updates, repeats, setup)
+    return results
+
+
+def bench_save_load(repeats):
+    results = {}
+    rng = np.random.default_rng(SEED)
+    # Tabla completa: todos los estados con ambas acciones
+    q_table = {(decode_state(index), action): float(rng.normal())
+               for index in range(NUM_STATES) for action in (0, 1)}
+    directory = tempfile.mkdtemp()
+    for name, table_cls in TABLES.items():
+        agent = table_cls()
+        agent.import_q_table(q_table)
+        path = os.path.join(directory, f"{name}.pkl")
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[f"save/{name}/seconds"] = best_time(lambda _: agent.save(path), repeats)
+            results[f"load/{name}/seconds"] = best_time(lambda _: table_cls().load(path), repeats)
+    return results
+
+
+def bench_train(num_episodes, max_steps, repeats):
+    results = {}
+    previous = os.getcwd()
+    # Los modelos se guardan en un directorio temporal
+    os.chdir(tempfile.mkdtemp())
+    try:
+        for engine in ENGINES:
+            for table in TABLES:
+                def setup():
+                    random.seed(SEED)
+                    np.random.seed(SEED)
+                    return TrafficSimulator(grid_size=40, engine=engine, table=table)
+
+                def run(simulator):
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        simulator.train(num_episodes=num_episodes, max_steps_per_episode=max_steps,
+                                        save_interval=num_episodes + 1, verbose=False)
+
+                elapsed = best_time(run, repeats, setup)
+                results[f"train/{engine}/{table}/episodes_per_second"] = num_episodes / elapsed
+    finally:
+        os.chdir(previous)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_suite(quick=False):
+    if quick:
+        results = bench_step((40, 80), num_steps=1000, warmup=500, repeats=1)
+        results.update(bench_vector((64,), num_steps=200, warmup=200, repeats=1))
+        results.update(bench_agent(num_ops=20000, repeats=1))
+        results.update(bench_save_load(repeats=3))
+        results.update(bench_train(num_episodes=3, max_steps=500, repeats=1))
+    else:
+        results = bench_step((40, 80, 160), num_steps=5000, warmup=2000, repeats=3)
+        results.update(bench_vector((16, 256), num_steps=1000, warmup=500, repeats=3))
+        results.update(bench_agent(num_ops=200000, repeats=3))
+        results.update(bench_save_load(repeats=20))
+        results.update(bench_train(num_episodes=10, max_steps=1000, repeats=3))
+    return results
+
+
+# Compara dos corridas; retorna las medidas que empeoraron más de `tolerance`
+def compare(previous, current, tolerance=0.10):
+    regressions = []
+    print(f"\n{'medida':<44} {'anterior':>12} {'actual':>12} {'cambio':>8}")
+    for name, value in current.items():
+        if name not in previous:
+            continue
+        old = previous[name]
+        lower_is_better = name.endswith('/seconds')
+        change = (old / value if lower_is_better else value / old) - 1.0
+        flag = ''
+        if change < -tolerance:
+            regressions.append(name)
+            flag = '  <- regresión'
+        print(f"{name:<44} {old:>12.4g} {value:>12.4g} {100 * change:>+7.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del simulador con semillas fijas")
+    parser.add_argument('--quick', action='store_true', help="corrida corta para probar la suite")
+    parser.add_argument('--output', help="archivo JSON de resultados")
+    parser.add_argument('--compare', help="archivo JSON de una corrida anterior")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="empeoramiento relativo que se marca como regresión")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    results = run_suite(args.quick)
+    report = {
+        'commit': commit,
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'quick': args.quick,
+        'seed': SEED,
+        'results': results
+    }
+
+    for name, value in results.items():
+        print(f"{name:<44} {value:>12.4g}")
+
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results', f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResultados guardados en {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)['results']
+        regressions = compare(previous, results, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regresiones sobre {100 * args.tolerance:.0f}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
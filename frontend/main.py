@@ -1,10 +1,34 @@
+import argparse
+import os
+import sys
+import time
+from collections import deque
 import pygame
 
+from backend.horario import Horario
 from backend.interseccion import Intersection
+from backend.trace import TraceReader, record_trace
+from frontend.simulacion import SimulationRunner, ReplayRunner
+
 # TRAINING_MODE = 0;  Useful for visualization, few steps per minute
 # TRAINING_MODE = 1; Used to train the model, a lot of steps per minute
+# Velocidad de la visualización: un step cada 1000 frames a 240 FPS, como el tick anterior
+VISUAL_STEPS_PER_SECOND = 240 / 1000
+
+# Zonas a redibujar desde las cuales conviene redibujar la pantalla completa
+MAX_DIRTY_RECTS = 64
+
+
 class Game:
-    def __init__(self, MODE, GRID):
+    # steps_per_second: velocidad de la simulación (None: lo más rápido posible; por defecto según MODE)
+    # render_fps: límite de frames por segundo del dibujo
+    # threaded: correr la simulación en un hilo aparte del dibujo
+    # policy: agente que controla el semáforo (get_action), por ejemplo un QLearning entrenado
+    # overlay: mostrar FPS y tiempo por frame (tecla F)
+    # replay: TraceReader a reproducir en vez de simular (ver backend/trace.py), desde el step `start` de `episode`
+    # schedule: perfil de demanda de la intersección (Horario, ver backend/horario.py)
+    def __init__(self, MODE, GRID, steps_per_second=0, render_fps=60, threaded=False, policy=None, overlay=True,
+                 replay=None, episode=None, start=0, schedule=None):
         pygame.init()
         self.screen_size = 800
         self.screen = pygame.display.set_mode((self.screen_size, self.screen_size))
@@ -13,15 +37,27 @@ class Game:
 
         self.TRAINING_MODE = MODE
         self.__GRID = GRID
-        self.tick = 0
+        self.render_fps = render_fps
+        self.threaded = threaded
 
-        self.font_minecraft = pygame.font.Font("../resources/fonts/minecraft.ttf", 30)
+        self.font_minecraft = pygame.font.Font("../resources/fonts/Minecraft.ttf", 30)
 
         # Objetos
-        self.interseccion = Intersection()
+        if steps_per_second == 0:
+            steps_per_second = None if self.TRAINING_MODE else VISUAL_STEPS_PER_SECOND
+        if replay is None:
+            self.interseccion = Intersection()
+            if schedule is not None:
+                self.interseccion.spawn.schedule = schedule
+            self.grid_size = self.interseccion.get_size()
+            self.simulation = SimulationRunner(self.interseccion, steps_per_second, policy)
+        else:
+            self.interseccion = None
+            self.grid_size = replay.grid_size
+            self.simulation = ReplayRunner(replay, steps_per_second, episode, start)
 
         # Imagenes
-        self.__background = pygame.image.load("../resources/interseccion.png").convert()
+        self.__background = pygame.image.load("../resources/Interseccion.png").convert()
         self.__cars = [
             pygame.image.load("../resources/car1.png").convert_alpha(),
             pygame.image.load("../resources/car2.png").convert_alpha(),
@@ -38,91 +74,239 @@ class Game:
         for i in range(len(self.__trafficlight_img)):
             self.__trafficlight_img[i] = pygame.transform.scale(self.__trafficlight_img[i], (200,200))
 
+        # Caché de dibujo y overlay de rendimiento
+        self.show_overlay = overlay
+        self.overlay_font = pygame.font.Font(None, 24)
+        self.draw_times = deque(maxlen=60)
+        self.build_render_cache()
+
 
     def run(self):
-        while self.running:
-            self.handle_events()
-            self.update()
-            self.draw()
-            self.clock.tick(240)
+        if self.threaded:
+            self.simulation.start()
+        try:
+            while self.running:
+                self.handle_events()
+                self.update()
+                self.draw()
+                self.clock.tick(self.render_fps)
+        finally:
+            self.simulation.stop()
 
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_f:
+                self.show_overlay = not self.show_overlay
+                self.__full_redraw = True
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.__full_redraw = True
 
+    # Sin hilo propio, la simulación avanza aquí lo que corresponda desde el frame anterior
     def update(self):
-        if self.TRAINING_MODE:
-            self.interseccion.step()
-        else:
-            self.tick += 1/1000
-            if self.tick >= 1:
-                self.tick = 0
-                self.interseccion.step()
+        if not self.threaded:
+            # Sin límite de velocidad se usa la mitad del frame para simular
+            self.simulation.update(budget=0.5 / self.render_fps)
+
+
+    # Sprites rotados por (imagen, dirección), capa estática (fondo) y capa de la grilla
+    def build_render_cache(self):
+        grid_size = self.grid_size
+        rec_size = self.screen_size/grid_size
+
+        # Rotación y desplazamiento del sprite respecto a su casilla, según la dirección
+        placement = {
+            "norte": (0, 1*rec_size, 0),
+            "sur": (180, -2.2*rec_size, 0),
+            "este": (-90, 0, 0.8*rec_size),
+            "oeste": (90, 0, -1.8*rec_size)}
+        self.__sprites = {}
+        for image, car in enumerate(self.__cars, start=1):
+            for direction, (angle, dx, dy) in placement.items():
+                sprite = pygame.transform.rotate(car, angle) if angle else car
+                self.__sprites[(image, direction)] = (sprite, dx, dy)
+
+        self.__static_layer = pygame.Surface((self.screen_size, self.screen_size)).convert()
+        self.__static_layer.fill((30,30,30))
+        self.__static_layer.blit(self.__background, (0,0))
+
+        # Grilla con todas las casillas libres; las ocupadas se dibujan encima en cada frame
+        self.__grid_layer = None
+        if self.__GRID:
+            self.__grid_layer = pygame.Surface((self.screen_size, self.screen_size), pygame.SRCALPHA)
+            for i in range(grid_size):
+                for j in range(grid_size):
+                    pygame.draw.rect(self.__grid_layer, (60, 60, 120), (rec_size*i, rec_size*j, rec_size-30, rec_size-30), border_radius = 15)
 
+        self.__light_position = (20*rec_size, 5.5*rec_size)
+        self.__clock_position = (1*rec_size, 1*rec_size)
+        self.__full_redraw = True
+        self.__drawn_step = None
+        self.__dynamic_rects = []  # Zonas con autos, casillas ocupadas y hora del último frame
+        self.__overlay_rect = None
 
+    # Posición en pantalla de cada auto del snapshot: (sprite, x, y)
+    def vehicle_sprites(self, snapshot, rec_size):
+        sprites = self.__sprites
+        for x, y, direction, image in snapshot.vehicles:
+            sprite, dx, dy = sprites[(image if 1 <= image <= 4 else 5, direction)]
+            yield sprite, x*rec_size + dx, y*rec_size + dy
+
+    # Zona de pantalla de la casilla (x, y) de la grilla
+    @staticmethod
+    def grid_cell(x, y, rec_size):
+        rect = pygame.Rect(rec_size*x, rec_size*y, rec_size-30, rec_size-30)
+        rect.normalize()
+        return rect
+
+    # Dibuja el último snapshot publicado por la simulación. Sólo se redibujan y actualizan en
+    # pantalla las zonas que cambiaron: donde estaban y donde están los autos, la hora y el overlay.
     def draw(self):
-        self.screen.fill((30,30,30))
-        self.screen.blit(self.__background, (0,0))
+        start = time.perf_counter()
+        snapshot = self.simulation.snapshot
+        screen = self.screen
+        rec_size = self.screen_size/self.grid_size
 
-        # Tamaños
-        grid_size = self.interseccion.get_size()
-        rec_size = self.screen_size/grid_size
+        if self.__full_redraw or snapshot.step != self.__drawn_step:
+            # Zonas a redibujar: las del frame anterior y las de este
+            cars = [(sprite, sprite.get_rect(topleft=(cx, cy))) for sprite, cx, cy in self.vehicle_sprites(snapshot, rec_size)]
+            light = self.__trafficlight_img[2] if snapshot.light_state == 0 else self.__trafficlight_img[0]
+            hora = self.font_minecraft.render(f"{snapshot.hour}:{snapshot.minute}:{snapshot.second}", True, (255,255,255))
+            self.__clock_surface = hora
+            new_rects = [rect for _, rect in cars]
+            new_rects.append(hora.get_rect(topleft=self.__clock_position))
+            if self.__grid_layer is not None:
+                new_rects.extend(self.grid_cell(x, y, rec_size) for x, y in {(x, y) for x, y, _, _ in snapshot.vehicles})
+
+            dirty = self.__dynamic_rects + new_rects + [light.get_rect(topleft=self.__light_position)]
+            if self.__overlay_rect is not None:
+                dirty.append(self.__overlay_rect)
+            # Con muchas zonas es más rápido redibujar la pantalla completa
+            if self.__full_redraw or len(dirty) > MAX_DIRTY_RECTS:
+                self.__full_redraw = True
+                dirty = [screen.get_rect()]
+            for rect in dirty:
+                screen.blit(self.__static_layer, rect, rect)
+
+            for sprite, rect in cars:
+                screen.blit(sprite, rect)
+            self.draw_overlays(snapshot, light, dirty, rec_size)
+
+            self.__dynamic_rects = new_rects
+            self.__drawn_step = snapshot.step
+        else:
+            # El snapshot no cambió: sólo se redibuja la zona del overlay
+            dirty = [self.__overlay_rect] if self.__overlay_rect is not None else []
+            for rect in dirty:
+                screen.set_clip(rect)
+                screen.blit(self.__static_layer, (0,0))
+                for sprite, cx, cy in self.vehicle_sprites(snapshot, rec_size):
+                    screen.blit(sprite, (cx, cy))
+                light = self.__trafficlight_img[2] if snapshot.light_state == 0 else self.__trafficlight_img[0]
+                self.draw_overlays(snapshot, light, [screen.get_rect()], rec_size)
+                screen.set_clip(None)
+
+        # Overlay con FPS y tiempo por frame
+        self.__overlay_rect = None
+        if self.show_overlay:
+            draw_ms = 1000 * sum(self.draw_times) / max(1, len(self.draw_times))
+            text = (f"FPS: {self.clock.get_fps():.0f}  frame: {self.clock.get_time()} ms  "
+                    f"dibujo: {draw_ms:.2f} ms  steps/s: {self.simulation.measured_rate:.0f}")
+            overlay = self.overlay_font.render(text, True, (255,255,255), (0,0,0))
+            self.__overlay_rect = screen.blit(overlay, overlay.get_rect(topright=(self.screen_size - 5, 5)))
+            dirty.append(self.__overlay_rect)
 
-        # Dibujar autos en pantalla
-        for auto in self.interseccion.vehicles:
-            # Imagen del auto
-            if auto.image == 1:
-                car_image = self.__cars[0]
-            elif auto.image == 2:
-                car_image = self.__cars[1]
-            elif auto.image == 3:
-                car_image = self.__cars[2]
-            elif auto.image == 4:
-                car_image = self.__cars[3]
-            else:
-                car_image = self.__cars[4]
-
-            # Posición del auto
-            x, y = auto.get_position()
-            cx = x * rec_size
-            cy = y * rec_size
-            if auto.get_direction() == "sur":
-                car_image = pygame.transform.rotate(car_image, 180)
-                cx = (x*rec_size) - 2.2*rec_size
-            elif auto.get_direction() == "este":
-                car_image = pygame.transform.rotate(car_image, -90)
-                cy = (y*rec_size) + (0.8*rec_size)
-            elif auto.get_direction() == "oeste":
-                car_image = pygame.transform.rotate(car_image, 90)
-                cy = (y * rec_size) - (1.8*rec_size)
-            else:
-                cx = (x * rec_size) + 1 * rec_size
-            self.screen.blit(car_image, (cx, cy))
-        # Dibujar semáforo
-        if self.interseccion.semaforo.is_green("norte"):
-            self.screen.blit(self.__trafficlight_img[2], (20*rec_size, 5.5*rec_size))
+        if self.__full_redraw:
+            pygame.display.flip()
+            self.__full_redraw = False
         else:
-            self.screen.blit(self.__trafficlight_img[0], (20 * rec_size, 5.5 * rec_size))
+            pygame.display.update(dirty)
+        self.draw_times.append(time.perf_counter() - start)
 
-        # Dibujar hora
-        hora = self.font_minecraft.render(f"{self.interseccion.current_hour}:{self.interseccion.current_minute}:{self.interseccion.current_second}", True, (255,255,255))
-        self.screen.blit(hora, (1*rec_size, 1*rec_size))
+    # Semáforo, hora y grilla sobre los autos, dentro de las zonas `dirty`
+    def draw_overlays(self, snapshot, light, dirty, rec_size):
+        screen = self.screen
+        screen.blit(light, self.__light_position)
+        screen.blit(self.__clock_surface, self.__clock_position)
 
         # Dibujar grilla para ver posiciones exactar de autos
         # No es necesaria dibujarla al visualizar
-        if self.__GRID:
-            for i in range(grid_size):
-                for j in range(grid_size):
-                    x = rec_size*i
-                    y = rec_size*j
-                    rec_color = (60, 60, 120)
-                    if self.interseccion.get_position(i,j) == 1:
-                        rec_color = (120,40,20)
+        if self.__grid_layer is not None:
+            for rect in dirty:
+                screen.blit(self.__grid_layer, rect, rect)
+            for x, y in {(x, y) for x, y, _, _ in snapshot.vehicles}:
+                pygame.draw.rect(screen, (120,40,20), (rec_size*x, rec_size*y, rec_size-30, rec_size-30), border_radius = 15)
+
 
-                    pygame.draw.rect(self.screen, rec_color, (x,y,rec_size-30,rec_size-30), border_radius = 15)
+# Dibuja los snapshots de una traza sin ventana (driver de video dummy de SDL) y los guarda como PNG
+# en `directory`: uno de cada `every` steps desde `start`, a lo más `count` imágenes
+def export_frames(reader, directory, GRID=False, episode=None, start=0, every=1, count=None):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    game = Game(0, GRID, overlay=False, replay=reader, episode=episode, start=start)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index, snapshot in enumerate(reader.frames(episode, start)):
+        if count is not None and len(paths) >= count:
+            break
+        if index % every:
+            continue
+        game.simulation.snapshot = snapshot
+        game.draw()
+        path = os.path.join(directory, f"frame_{index:06d}.png")
+        pygame.image.save(game.screen, path)
+        paths.append(path)
+    pygame.quit()
+    return paths
+
+
+# Agente entrenado para controlar el semáforo: policy.npy (ver agente/checkpoint.py) o pickle de QLearning
+def load_policy(path):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'agente'))
+    from checkpoint import load_policy as load_policy_file
+    from q_learning import QLearning
+
+    if path.endswith('.npy'):
+        return load_policy_file(path)
+    agent = QLearning(epsilon=0.0)
+    if not agent.load(path):
+        raise FileNotFoundError(path)
+    return agent
 
 
-        pygame.display.flip()
 if __name__ == "__main__":
-    Game(0, 0).run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Visualización de la intersección")
+    parser.add_argument('--mode', type=int, default=0, help="0: visualización lenta, 1: lo más rápido posible")
+    parser.add_argument('--grid', action='store_true', help="dibujar la grilla")
+    parser.add_argument('--steps-per-second', type=float, default=0,
+                        help="velocidad de la simulación (100 = 100x tiempo real); por defecto según --mode")
+    parser.add_argument('--fps', type=int, default=60, help="límite de frames por segundo")
+    parser.add_argument('--threaded', action='store_true', help="simular en un hilo aparte del dibujo")
+    parser.add_argument('--model', help="agente entrenado que controla el semáforo")
+    parser.add_argument('--no-overlay', action='store_true', help="ocultar FPS y tiempo por frame")
+    parser.add_argument('--record', metavar='TRAZA', help="grabar --steps steps en una traza, sin ventana")
+    parser.add_argument('--steps', type=int, default=3600, help="steps a grabar con --record")
+    parser.add_argument('--replay', metavar='TRAZA', help="reproducir una traza en vez de simular")
+    parser.add_argument('--episode', type=int, help="episodio de la traza a reproducir (por defecto todos)")
+    parser.add_argument('--start', type=int, default=0, help="step desde el que se reproduce la traza")
+    parser.add_argument('--export', metavar='DIRECTORIO', help="guardar los frames de --replay como PNG, sin ventana")
+    parser.add_argument('--every', type=int, default=1, help="con --export, guardar uno de cada N steps")
+    parser.add_argument('--frames', type=int, help="con --export, cantidad máxima de imágenes")
+    parser.add_argument('--demand', metavar='CSV', help="perfil de demanda: autos por hora y dirección")
+    args = parser.parse_args()
+
+    policy = load_policy(args.model) if args.model else None
+    schedule = Horario.from_csv(args.demand) if args.demand else None
+    if args.record:
+        env = Intersection()
+        if schedule is not None:
+            env.spawn.schedule = schedule
+        record_trace(args.record, args.steps, env=env, policy=policy)
+    elif args.replay and args.export:
+        paths = export_frames(TraceReader(args.replay), args.export, args.grid, args.episode, args.start,
+                              args.every, args.frames)
+        print(f"{len(paths)} frames guardados en {args.export}")
+    else:
+        replay = TraceReader(args.replay) if args.replay else None
+        Game(args.mode, args.grid, args.steps_per_second, args.fps, args.threaded, policy, not args.no_overlay,
+             replay, args.episode, args.start, schedule).run()
\ No newline at end of file
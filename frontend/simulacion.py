@@ -0,0 +1,151 @@
+import threading
+import time
+from backend.trace import Snapshot, take_snapshot
+
+
+class SimulationRunner:
+    """
+    Avanza una Intersection a paso fijo, independiente de la tasa de dibujo.
+
+    steps_per_second fija la velocidad de la simulación (1 step = 1 segundo simulado,
+    así que 100 es 100x tiempo real); None corre lo más rápido posible. Si la simulación
+    se atrasa más de max_lag steps (por ejemplo, con la ventana congelada) se descarta
+    el atraso en vez de correrlo de golpe.
+
+    Tras avanzar se publica un Snapshot en self.snapshot: el renderer sólo lee el último
+    snapshot publicado, así que nunca ve un step a medias. La simulación corre en el
+    hilo del renderer (update() en cada frame) o en un hilo propio (start()).
+
+    `policy` es opcional: cualquier objeto con get_action(state, training), como un
+    QLearning entrenado, que decide el semáforo en cada step.
+    """
+
+    def __init__(self, env, steps_per_second=None, policy=None, max_lag=1000, publish_interval=1 / 120):
+        self.env = env
+        self.steps_per_second = steps_per_second
+        self.policy = policy
+        self.max_lag = max_lag
+        self.publish_interval = publish_interval  # Segundos entre snapshots con el hilo propio
+
+        self.steps = 0
+        self.dropped_steps = 0
+        self.snapshot = self.current_snapshot()
+        self.thread = None
+        self.running = False
+
+        # Reloj de la simulación: steps debidos = (ahora - inicio) * steps_per_second
+        self.clock_start = time.perf_counter()
+        self.clock_steps = 0
+
+        # Velocidad medida (steps/seg), actualizada cada segundo
+        self.measured_rate = 0.0
+        self._rate_start = self.clock_start
+        self._rate_steps = 0
+
+    def step(self):
+        env = self.env
+        if self.policy is not None:
+            env.apply_action(self.policy.get_action(env.get_state(), training=False))
+        env.step()
+        self.steps += 1
+
+    # Cantidad de steps que corresponde correr ahora según el reloj
+    def due_steps(self, now):
+        due = int((now - self.clock_start) * self.steps_per_second) - (self.steps - self.clock_steps)
+        if due > self.max_lag:
+            self.dropped_steps += due - self.max_lag
+            self.clock_start = now
+            self.clock_steps = self.steps
+            due = self.max_lag
+        return due
+
+    def current_snapshot(self):
+        return take_snapshot(self.env, self.steps)
+
+    def publish(self, now):
+        self.snapshot = self.current_snapshot()
+        if now - self._rate_start >= 1.0:
+            self.measured_rate = (self.steps - self._rate_steps) / (now - self._rate_start)
+            self._rate_start = now
+            self._rate_steps = self.steps
+
+    # Avanza lo que corresponda hasta ahora (sin límite de velocidad: durante `budget` segundos)
+    def update(self, budget=1 / 120):
+        now = time.perf_counter()
+        if self.steps_per_second is None:
+            deadline = now + budget
+            while True:
+                self.step()
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+        else:
+            for _ in range(self.due_steps(now)):
+                self.step()
+            now = time.perf_counter()
+        self.publish(now)
+
+    def run_thread(self):
+        last_publish = time.perf_counter()
+        while self.running:
+            if self.steps_per_second is None:
+                self.step()
+                now = time.perf_counter()
+            else:
+                now = time.perf_counter()
+                due = self.due_steps(now)
+                for _ in range(due):
+                    self.step()
+                if due == 0:
+                    # Dormir hasta el próximo step
+                    next_step = self.clock_start + (self.steps - self.clock_steps + 1) / self.steps_per_second
+                    time.sleep(min(max(0.0, next_step - now), self.publish_interval))
+                now = time.perf_counter()
+            if now - last_publish >= self.publish_interval:
+                self.publish(now)
+                last_publish = now
+
+    # Corre la simulación en un hilo propio hasta stop()
+    def start(self):
+        self.running = True
+        self.clock_start = time.perf_counter()
+        self.clock_steps = self.steps
+        self.thread = threading.Thread(target=self.run_thread, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+class ReplayRunner(SimulationRunner):
+    """
+    Reproduce una traza (ver backend/trace.py) con la misma interfaz y el mismo reloj que
+    SimulationRunner, sin correr Intersection.step: cada step avanza al siguiente snapshot
+    grabado. Al terminar la traza se queda en el último snapshot.
+    """
+
+    def __init__(self, reader, steps_per_second=None, episode=None, start=0, max_lag=1000,
+                 publish_interval=1 / 120):
+        self.frames = reader.frames(episode, start)
+        self.frame = next(self.frames, None)
+        if self.frame is None:
+            raise ValueError(f"La traza {reader.path} no tiene steps para reproducir")
+        self.finished = False
+        super().__init__(None, steps_per_second, max_lag=max_lag, publish_interval=publish_interval)
+
+    def step(self):
+        frame = next(self.frames, None)
+        if frame is None:
+            # Fin de la traza: se publica el último snapshot y se detiene el hilo propio
+            self.finished = True
+            self.running = False
+            self.snapshot = self.frame
+            return
+        self.frame = frame
+        self.steps += 1
+
+    def current_snapshot(self):
+        return self.frame
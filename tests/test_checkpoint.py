@@ -0,0 +1,42 @@
+"""
+Checkpoints del entrenamiento (agente/checkpoint.py): train(..., resume_from=...) desde
+un checkpoint intermedio llega a la misma tabla Q, epsilon y métricas que un
+entrenamiento sin interrumpir.
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'agente')]
+
+from train_agent import TrafficSimulator
+from checkpoint import q_table_arrays
+
+
+def train(directory, num_episodes, resume_from=None):
+    simulator = TrafficSimulator(seed=0, table='numpy')
+    simulator.enable_replay(capacity=10000, batch_size=64)
+    simulator.enable_checkpoints(str(directory))
+    metrics = simulator.train(num_episodes=num_episodes, max_steps_per_episode=300, save_interval=5,
+                              verbose=False, resume_from=resume_from and str(resume_from))
+    return simulator, metrics
+
+
+def test_resume_matches_uninterrupted_training(tmp_path, monkeypatch):
+    # El pickle final de train se guarda en models/ del directorio actual
+    monkeypatch.chdir(tmp_path)
+    full, full_metrics = train(tmp_path / 'completo', 10)
+    # Entrenamiento "interrumpido" después del checkpoint del episodio 5
+    partial = tmp_path / 'parcial'
+    train(partial, 5)
+    resumed, resumed_metrics = train(partial, 10, resume_from=partial)
+
+    for a, b in zip(q_table_arrays(full.agent), q_table_arrays(resumed.agent)):
+        assert np.array_equal(a, b)
+    assert resumed.agent.epsilon == full.agent.epsilon
+    assert resumed_metrics == full_metrics
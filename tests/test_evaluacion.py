@@ -0,0 +1,87 @@
+"""
+Evaluación de políticas con tráfico común (agente/evaluation.py): resultados
+independientes de los workers, iguales con el motor por eventos y con Intersection,
+y diferencias pareadas entre políticas.
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'agente')]
+
+from backend.interseccion import Intersection
+from backend.interseccion_eventos import EventIntersection
+from evaluation import evaluate_policies, baseline_policies, make_environment
+from policies import FixedCyclePolicy
+from train_agent import TrafficSimulator
+
+EPISODES = 6
+MAX_STEPS = 400
+SPEC = (EventIntersection, 40, None, {})
+
+
+@pytest.fixture(scope='module')
+def policies(tmp_path_factory):
+    # train guarda la tabla Q en models/ del directorio actual
+    previous = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('modelos'))
+    try:
+        simulator = TrafficSimulator(engine='events', seed=0)
+        simulator.train(num_episodes=5, max_steps_per_episode=MAX_STEPS, save_interval=10, verbose=False)
+    finally:
+        os.chdir(previous)
+    return {'agente': simulator.agent, **baseline_policies()}
+
+
+@pytest.fixture(scope='module')
+def reference(policies):
+    return evaluate_policies(policies, SPEC, EPISODES, MAX_STEPS, max_workers=1)
+
+
+@pytest.mark.parametrize('workers', [2, 3])
+def test_workers_do_not_change_results(policies, reference, workers):
+    report = evaluate_policies(policies, SPEC, EPISODES, MAX_STEPS, max_workers=workers)
+    for name in policies:
+        assert np.array_equal(report[name]['episodes'], reference[name]['episodes'])
+
+
+def test_events_engine_matches_intersection(policies, reference):
+    report = evaluate_policies(policies, (Intersection, 40, None, {}), EPISODES, MAX_STEPS, max_workers=1)
+    for name in policies:
+        assert np.allclose(report[name]['episodes'], reference[name]['episodes'])
+
+
+# El ciclo fijo de 30 steps repite el baseline anterior de compare_with_baseline
+# (cambio si step % 30 == 0 and step > 0) en el entorno del episodio
+def test_fixed_cycle_repeats_legacy_baseline(reference):
+    baseline = reference['ciclo fijo 30']['episodes'][:, 1:3]
+    for episode in range(EPISODES):
+        env = make_environment((Intersection, 40, None, {}), 0, episode)
+        total_wait_time = total_moved = 0
+        for step in range(MAX_STEPS):
+            env.apply_action(1 if step % 30 == 0 and step > 0 else 0)
+            total_moved += env.step()
+            total_wait_time += env.get_waiting_vehicles_count()
+        assert tuple(baseline[episode]) == (total_wait_time / MAX_STEPS, total_moved / MAX_STEPS)
+
+
+# Con tráfico común la misma política bajo dos nombres no tiene diferencia, y la diferencia
+# con la referencia es el promedio de las diferencias episodio a episodio
+def test_common_traffic_pairs_episodes():
+    policies = {'a': FixedCyclePolicy(30, offset=1), 'b': FixedCyclePolicy(30, offset=1),
+                'c': FixedCyclePolicy(45, offset=1)}
+    report = evaluate_policies(policies, SPEC, EPISODES, MAX_STEPS, max_workers=1, reference='a')
+    assert np.array_equal(report['b']['episodes'], report['a']['episodes'])
+    assert not report['b']['diff'].any() and not report['b']['diff_ci'].any()
+    assert np.allclose(report['c']['diff'], (report['c']['episodes'] - report['a']['episodes']).mean(axis=0))
+
+
+def test_evaluation_uses_configured_engine():
+    assert TrafficSimulator(engine='events').evaluation_spec()[0] is EventIntersection
+    assert TrafficSimulator(engine='events').evaluation_spec('python')[0] is Intersection
@@ -0,0 +1,86 @@
+"""
+Motor por eventos discretos (backend/interseccion_eventos.py) contra Intersection: con la
+misma semilla reproduce vehículos, grilla, zonas, reloj, semáforo, métricas y autos que
+salen, avanzando con step(), fast_forward() y advance().
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.interseccion import Intersection
+from backend.interseccion_eventos import EventIntersection
+
+
+def snapshot(env):
+    if isinstance(env, EventIntersection):
+        env._sync_zones()
+    return (env.get_vehicle_records(), env.grid.tobytes(), env.zone_counts, env.get_state(),
+            env.current_hour, env.current_minute, env.current_second, env.spawn_counter,
+            env.semaforo.time_since_change, env.exited_vehicles, env.blocked_spawns,
+            env.phase_changes, env.refused_phase_changes, env.exit_queue)
+
+
+def new_env(engine_cls, seed, hour):
+    env = engine_cls(rng=np.random.default_rng(seed))
+    env.current_hour = hour
+    env.exit_queue = []
+    return env
+
+
+# Política determinista: cambia de fase si la cola con luz roja supera a la de luz verde
+def queue_policy(state):
+    north, south, east, west, light, category = state
+    green, red = (north + south, east + west) if light == 0 else (east + west, north + south)
+    return 1 if category > 0 and red > green else 0
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+@pytest.mark.parametrize('hour', [0, 7, 12])
+def test_step_and_fast_forward_match_intersection(seed, hour, num_steps=3000):
+    rng = random.Random(seed)
+    reference = new_env(Intersection, seed, hour)
+    env = new_env(EventIntersection, seed, hour)
+    step = 0
+    while step < num_steps:
+        if rng.random() < 0.3:
+            # Salto sin acciones
+            steps = rng.randint(2, 60)
+            moved = sum(reference.step() for _ in range(steps))
+            assert env.fast_forward(steps) == moved, f"fast_forward no coincide en step {step}"
+        else:
+            steps = 1
+            action = int(rng.random() < 0.08)
+            reference.apply_action(action)
+            env.apply_action(action)
+            assert env.step() == reference.step(), f"step no coincide en step {step}"
+        step += steps
+        assert snapshot(env) == snapshot(reference), f"El estado no coincide en step {step}"
+
+
+# advance contra consultar la política en cada step
+@pytest.mark.parametrize('seed', [0, 1])
+@pytest.mark.parametrize('hour', [0, 7, 12])
+def test_advance_matches_policy_every_step(seed, hour, num_steps=3000):
+    reference = new_env(Intersection, seed, hour)
+    env = new_env(EventIntersection, seed, hour)
+    expected = []
+    for _ in range(num_steps):
+        action = queue_policy(reference.get_state())
+        reference.apply_action(action)
+        moved = reference.step()
+        expected.append((moved, reference.get_waiting_vehicles_count(), reference.get_vehicle_count()))
+    steps = []
+    while len(steps) < num_steps:
+        for count, moved, waiting, vehicles in env.advance(queue_policy(env.get_state()), num_steps - len(steps)):
+            steps.extend([(moved, waiting, vehicles)] * count)
+    assert steps == expected
+    assert snapshot(env) == snapshot(reference)
@@ -0,0 +1,142 @@
+"""
+Modo rápido (Intersection.fast_forward) y saltos en bloque (skip_ahead) contra step()
+uno por uno, y entrenamiento con fast_forward contra el entrenamiento normal
+(agente/train_agent.py).
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'agente')]
+
+from train_agent import ENGINES, TrafficSimulator
+
+
+def snapshot(env):
+    vehicles = tuple((tuple(v.get_position()), v.get_direction(), v.image) for v in env.vehicles)
+    return (env.current_hour, env.current_minute, env.current_second, env.spawn_counter,
+            env.semaforo.state, env.semaforo.time_since_change, env.get_state(),
+            env.get_waiting_vehicles_count(), vehicles, env.grid.tobytes(), random.getstate())
+
+
+# Semáforo de ciclo fijo: cambia cada `period` steps, avanzando el resto del ciclo con step() o fast_forward()
+def run_fixed_cycle(env, num_steps, skip, period=30):
+    moved = 0
+    for start in range(0, num_steps, period):
+        env.apply_action(1)
+        moved += env.step()
+        steps = min(period, num_steps - start) - 1
+        moved += env.fast_forward(steps) if skip else sum(env.step() for _ in range(steps))
+    return moved
+
+
+# Mismo estado (vehículos, grilla, reloj, semáforo, generador aleatorio) y movimientos en cada hora
+@pytest.mark.parametrize('engine', sorted(ENGINES))
+@pytest.mark.parametrize('seed', [0, 1])
+def test_fast_forward_matches_step(engine, seed, hours=3):
+    results = []
+    for skip in (False, True):
+        random.seed(seed)
+        env = ENGINES[engine]()
+        env.current_hour = 0
+        states = []
+        total = 0
+        for _ in range(hours):
+            total += run_fixed_cycle(env, 3600, skip)
+            states.append((total, snapshot(env)))
+        results.append(states)
+    assert results[1] == results[0]
+
+
+# Avanza dos entornos a la par: uno con skip_ahead y otro con step(), comparando cada step saltado
+@pytest.mark.parametrize('engine', sorted(ENGINES))
+def test_skip_ahead_reports_moves_per_step(engine, num_steps=10000):
+    engine_cls = ENGINES[engine]
+    random.seed(0)
+    skipping = engine_cls()
+    skipping.current_hour = 0
+    random.seed(0)
+    stepping = engine_cls()
+    stepping.current_hour = 0
+    rng_skipping = rng_stepping = random.getstate()
+
+    step = 0
+    skipped = 0
+    while step < num_steps:
+        if step % 30 == 0:
+            skipping.apply_action(1)
+            stepping.apply_action(1)
+        steps = min(skipping.skip_ahead_limit(), 30 - step % 30)
+        random.setstate(rng_skipping)
+        if steps > 1:
+            moved = skipping.skip_ahead(steps)
+            skipped += steps
+        else:
+            steps = 1
+            moved = [skipping.step()]
+        rng_skipping = random.getstate()
+
+        random.setstate(rng_stepping)
+        expected = [stepping.step() for _ in range(steps)]
+        rng_stepping = random.getstate()
+        assert moved == expected, f"Movimientos por step distintos en step {step}"
+        step += steps
+    assert skipped > 0
+
+
+@pytest.mark.parametrize('engine', sorted(ENGINES))
+@pytest.mark.parametrize('hour', [0, 12])
+def test_skip_matches_step_by_step(engine, hour):
+    env = ENGINES[engine](rng=np.random.default_rng(hour))
+    env.current_hour = hour
+    reference = ENGINES[engine](rng=np.random.default_rng(0))
+    rng = np.random.default_rng(1)
+    skipped = 0
+    for _ in range(3000):
+        steps = env.skip_ahead_limit(phase_locked=True)
+        if steps > 1:
+            reference.restore(env.snapshot())
+            expected = []
+            for _ in range(steps):
+                moved = reference.step()
+                expected.append((moved, reference.get_waiting_vehicles_count(),
+                                 reference.get_vehicle_count(), reference.get_state()))
+            waiting = env.get_waiting_vehicles_count()
+            vehicles = env.get_vehicle_count()
+            states = env.skip_states(steps)
+            moved = env.skip_ahead(steps)
+            assert [(m, waiting, vehicles, s) for m, s in zip(moved, states)] == expected
+            assert env.get_state() == reference.get_state()
+            skipped += steps
+        else:
+            env.apply_action(int(rng.random() < 0.1))
+            env.step()
+    assert skipped > 0
+
+
+def train(engine, fast_forward, table='numpy', replay=False, warm_starts=0):
+    simulator = TrafficSimulator(seed=11, engine=engine, table=table)
+    if replay:
+        simulator.enable_replay(capacity=5000, batch_size=64, samples=1)
+    if warm_starts:
+        simulator.enable_warm_starts(warm_starts, 600)
+    metrics = simulator.train(num_episodes=3, max_steps_per_episode=800, save_interval=100,
+                              verbose=False, fast_forward=fast_forward)
+    env = simulator.env
+    return ({name: list(values) for name, values in metrics.items()}, simulator.agent.export_q_table(),
+            env.phase_changes, env.refused_phase_changes)
+
+
+# En los tramos saltados el agente igual decide y aprende: fast_forward no cambia el resultado
+@pytest.mark.parametrize('engine', sorted(ENGINES))
+@pytest.mark.parametrize('options', [{'table': 'dict'}, {'warm_starts': 3}, {'replay': True}])
+def test_training_same_with_fast_forward(engine, options, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert train(engine, True, **options) == train(engine, False, **options)
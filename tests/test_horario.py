@@ -0,0 +1,90 @@
+"""
+Horario precalculado (backend/horario.py): tablas por segundo del día y motores con el
+perfil de demanda de ejemplo.
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.horario import Horario, SECONDS_PER_DAY
+from backend.interseccion import Intersection
+from backend.interseccion_eventos import EventIntersection
+from backend.interseccion_numpy import NumpyIntersection
+from backend.interseccion_vector import VectorIntersection
+from backend.spawn_vehiculo import SpawnVehicle
+
+DEMAND = Horario.from_csv(os.path.join(ROOT, 'resources', 'demanda_ejemplo.csv'))
+
+
+# Steps hasta el próximo spawn avanzando de a un step
+def brute_force_spawn(schedule, second, counter):
+    steps = 0
+    while True:
+        steps += 1
+        second = (second + 1) % SECONDS_PER_DAY
+        if counter + steps >= schedule.interval[second]:
+            return steps
+
+
+def records(env, b=None):
+    vehicles = env.vehicles if b is None else env.get_vehicles(b)
+    return [(v.get_position(), v.get_direction(), v.image) for v in vehicles]
+
+
+def with_schedule(env, schedule, hour):
+    env.spawn.schedule = schedule
+    env.current_hour = hour
+    return env
+
+
+def test_default_schedule_matches_hourly_interval():
+    spawner = SpawnVehicle()
+    expected = [spawner.get_spawn_interval(second // 3600) for second in range(SECONDS_PER_DAY)]
+    assert list(spawner.schedule.interval) == expected
+
+
+@pytest.mark.parametrize('schedule', [SpawnVehicle().schedule, DEMAND], ids=['por defecto', 'demanda'])
+def test_steps_until_spawn_matches_stepping(schedule):
+    rng = random.Random(0)
+    for _ in range(5000):
+        second = rng.randrange(SECONDS_PER_DAY)
+        counter = rng.randrange(15)
+        assert schedule.steps_until_spawn(second, counter) == brute_force_spawn(schedule, second, counter)
+
+
+@pytest.mark.parametrize('hour', [6, 7, 17, 23])
+def test_engines_match_with_demand(hour, seed=0, num_steps=2000):
+    envs = [with_schedule(engine_cls(rng=np.random.default_rng(seed)), DEMAND, hour)
+            for engine_cls in (Intersection, NumpyIntersection, EventIntersection)]
+    rng = random.Random(seed)
+    for step in range(num_steps):
+        action = int(rng.random() < 0.08)
+        moved = set()
+        for env in envs:
+            env.apply_action(action)
+            moved.add(env.step())
+        assert len(moved) == 1, f"Movimientos distintos en step {step}"
+        assert all(records(env) == records(envs[0]) for env in envs[1:]), f"Vehículos distintos en step {step}"
+
+
+# Lote con un generador por intersección
+@pytest.mark.parametrize('hour', [6, 7, 17, 23])
+def test_vector_matches_with_demand(hour, seed=0, num_steps=2000, num_envs=3):
+    children = np.random.SeedSequence(seed).spawn(num_envs)
+    references = [with_schedule(Intersection(rng=np.random.default_rng(child)), DEMAND, hour) for child in children]
+    vector = with_schedule(VectorIntersection(num_envs, rng=seed), DEMAND, hour)
+    for _ in range(num_steps):
+        vector.step()
+        for env in references:
+            env.step()
+    for b, env in enumerate(references):
+        assert records(vector, b) == records(env)
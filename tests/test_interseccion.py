@@ -0,0 +1,52 @@
+"""
+Motor NumPy (backend/interseccion_numpy.py) contra el motor original de Intersection:
+trayectorias idénticas con la misma semilla y grilla incremental consistente.
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.interseccion import Intersection
+from backend.interseccion_numpy import NumpyIntersection
+
+
+def run_trajectory(engine_cls, seed, steps, grid_size, spawn_interval, own_rng):
+    random.seed(seed)
+    actions = random.Random(seed + 1)
+    env = engine_cls(grid_size=grid_size, rng=np.random.default_rng(seed) if own_rng else None)
+    if spawn_interval is not None:
+        env.spawn.base_spawn_interval = spawn_interval
+
+    trajectory = []
+    for step in range(steps):
+        env.apply_action(actions.randint(0, 1) if step % 7 == 0 else 0)
+        moved = env.step()
+
+        # La grilla incremental debe coincidir con una reconstrucción completa
+        expected = np.zeros_like(env.grid)
+        for v in env.vehicles:
+            x, y = v.get_position()
+            expected[y, x] = 1
+        assert np.array_equal(env.grid, expected), f"Grilla inconsistente en step {step}"
+
+        vehicles = tuple((tuple(v.get_position()), v.get_direction(), v.image) for v in env.vehicles)
+        trajectory.append((moved, env.get_state(), env.get_waiting_vehicles_count(), vehicles))
+    return trajectory
+
+
+@pytest.mark.parametrize('grid_size', [40, 80])
+@pytest.mark.parametrize('spawn_interval', [None, 20])
+@pytest.mark.parametrize('own_rng', [False, True])
+def test_numpy_engine_matches_python(grid_size, spawn_interval, own_rng):
+    reference = run_trajectory(Intersection, 0, 1500, grid_size, spawn_interval, own_rng)
+    candidate = run_trajectory(NumpyIntersection, 0, 1500, grid_size, spawn_interval, own_rng)
+    assert candidate == reference
@@ -0,0 +1,68 @@
+"""
+Escritura y lectura del registro de métricas en disco (agente/metrics_log.py).
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'agente')]
+
+from metrics_log import MetricsWriter, MetricsLog, column_path
+
+TABLES = {'episodes': (('episode', np.int32), ('reward', np.float64))}
+
+
+def write_rows(writer, values):
+    for value in values:
+        writer.append('episodes', (value, value * 0.5))
+
+
+def test_append_after_truncate(tmp_path):
+    with MetricsWriter(str(tmp_path), TABLES, chunk_size=4) as writer:
+        write_rows(writer, range(10))
+        writer.truncate('episodes', 5)
+        write_rows(writer, [99])
+
+    log = MetricsLog(str(tmp_path))
+    assert log['episode'].tolist() == [0, 1, 2, 3, 4, 99]
+    assert log['reward'].tolist() == [0.0, 0.5, 1.0, 1.5, 2.0, 49.5]
+
+
+def test_resume_continues_log(tmp_path):
+    with MetricsWriter(str(tmp_path), TABLES) as writer:
+        write_rows(writer, range(3))
+    # Fila incompleta de una escritura interrumpida
+    with open(column_path(str(tmp_path), 'episodes', 'episode'), 'ab') as f:
+        f.write(np.int32(7).tobytes())
+
+    with MetricsWriter(str(tmp_path), TABLES, resume=True) as writer:
+        assert writer.rows('episodes') == 3
+        write_rows(writer, [3])
+
+    assert MetricsLog(str(tmp_path))['episode'].tolist() == [0, 1, 2, 3]
+
+
+def test_resume_without_schema_starts_new_log(tmp_path):
+    with MetricsWriter(str(tmp_path), TABLES) as writer:
+        write_rows(writer, range(3))
+    os.remove(os.path.join(str(tmp_path), 'schema.json'))
+
+    with MetricsWriter(str(tmp_path), TABLES, resume=True) as writer:
+        assert writer.rows('episodes') == 0
+        write_rows(writer, [5])
+
+    assert MetricsLog(str(tmp_path))['episode'].tolist() == [5]
+
+
+def test_new_log_replaces_old_one(tmp_path):
+    with MetricsWriter(str(tmp_path), TABLES) as writer:
+        write_rows(writer, range(3))
+    with MetricsWriter(str(tmp_path), TABLES) as writer:
+        write_rows(writer, [8])
+
+    assert MetricsLog(str(tmp_path))['episode'].tolist() == [8]
@@ -0,0 +1,90 @@
+"""
+Servidor de inferencia de la política (agente/policy_server.py), levantado en otro
+proceso con un policy.npy: responde la acción de mayor valor Q para los 486 estados y
+recarga el modelo sin reiniciarse cuando se reemplaza el archivo.
+
+Uso:
+    python -m pytest tests
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'agente')]
+
+from q_learning_numpy import NumpyQLearning, NUM_STATES, decode_state
+from checkpoint import export_policy
+from policy_server import request
+
+ALL_STATES = [list(decode_state(index)) for index in range(NUM_STATES)]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def write_policy(path, q_values):
+    agent = NumpyQLearning()
+    agent.q_table[:] = q_values
+    agent.visited[:] = True
+    export_policy(agent, path)
+
+
+async def query(port, method, target, payload=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        return await request(reader, writer, method, target, payload)
+    finally:
+        writer.close()
+
+
+def wait_for_version(port, version, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            _, health = asyncio.run(query(port, 'GET', '/health'))
+            if health['version'] >= version:
+                return
+        except OSError:
+            pass
+        time.sleep(0.05)
+    pytest.fail(f"El servidor no llegó a la versión {version} del modelo")
+
+
+def served_actions(port):
+    _, response = asyncio.run(query(port, 'POST', '/actions', {'states': ALL_STATES}))
+    return response['actions']
+
+
+def greedy_actions(q_values):
+    return (q_values[:, 1] > q_values[:, 0]).astype(int).tolist()
+
+
+def test_serves_and_reloads_policy(tmp_path):
+    policy = str(tmp_path / 'policy.npy')
+    q_values = np.random.default_rng(0).normal(size=(NUM_STATES, 2))
+    write_policy(policy, q_values)
+
+    port = free_port()
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'agente', 'policy_server.py'), 'serve', policy,
+                               '--port', str(port), '--reload-interval', '0.2'], stdout=subprocess.DEVNULL)
+    try:
+        wait_for_version(port, 1)
+        assert served_actions(port) == greedy_actions(q_values)
+
+        # Reemplazar el archivo, como al escribir un checkpoint nuevo
+        write_policy(policy, -q_values)
+        wait_for_version(port, 2)
+        assert served_actions(port) == greedy_actions(-q_values)
+    finally:
+        server.terminate()
+        server.wait()
@@ -0,0 +1,69 @@
+"""
+Tabla Q de diccionario (QLearning) contra la tabla en arreglo (NumpyQLearning):
+codificación de estados, mismas acciones y valores con la misma semilla, y update_batch.
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'agente')]
+
+from q_learning import QLearning
+from q_learning_numpy import NumpyQLearning, NUM_STATES, STATE_RADIX, encode_state, encode_states, decode_state
+
+
+def random_transitions(count, seed=0):
+    rng = np.random.default_rng(seed)
+    states = [tuple(int(rng.integers(radix)) for radix in STATE_RADIX) for _ in range(count + 1)]
+    actions = rng.integers(0, 2, size=count).tolist()
+    rewards = rng.normal(0, 5, size=count).tolist()
+    return states, actions, rewards
+
+
+def test_encoder_round_trip():
+    assert [encode_state(decode_state(index)) for index in range(NUM_STATES)] == list(range(NUM_STATES))
+    states = random_transitions(100)[0]
+    assert encode_states(states).tolist() == [encode_state(state) for state in states]
+
+
+# Con own_rng cada agente sortea con su propio generador en vez de np.random global
+@pytest.mark.parametrize('own_rng', [False, True])
+def test_tables_choose_and_learn_the_same(own_rng, steps=10000):
+    states, actions, rewards = random_transitions(steps)
+    agents = [QLearning(epsilon=0.3, rng=0 if own_rng else None),
+              NumpyQLearning(epsilon=0.3, rng=0 if own_rng else None)]
+    chosen = []
+    for agent in agents:
+        np.random.seed(0)
+        agent_actions = []
+        for i in range(steps):
+            state, next_state = agent.state_key(states[i]), agent.state_key(states[i + 1])
+            agent_actions.append(agent.get_action(state))
+            agent.update(state, actions[i], rewards[i], next_state, done=(i % 500 == 0))
+        chosen.append(agent_actions)
+    assert chosen[1] == chosen[0]
+    assert agents[1].export_q_table() == agents[0].q_table
+
+
+# update_batch calcula los objetivos con la tabla previa al lote
+def test_update_batch_matches_sequential_updates(steps=5000, batch_size=256):
+    states, actions, rewards = random_transitions(steps)
+    indices = encode_states(states)
+    sequential = NumpyQLearning()
+    batched = NumpyQLearning()
+    for start in range(0, steps, batch_size):
+        stop = min(start + batch_size, steps)
+        frozen = sequential.q_table.copy()
+        for i in range(start, stop):
+            target = rewards[i] + sequential.gamma * frozen[indices[i + 1]].max()
+            current = sequential.q_table[indices[i], actions[i]]
+            sequential.q_table[indices[i], actions[i]] = current + sequential.alpha * (target - current)
+        batched.update_batch(indices[start:stop], actions[start:stop], rewards[start:stop],
+                             indices[start + 1:stop + 1], np.zeros(stop - start, dtype=bool))
+    assert np.allclose(batched.q_table, sequential.q_table, rtol=1e-12, atol=1e-12)
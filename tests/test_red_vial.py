@@ -0,0 +1,27 @@
+"""
+Red de intersecciones (backend/red_vial.py): dividir la red en regiones que avanzan en
+procesos paralelos no cambia la simulación.
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.red_vial import RoadNetwork
+
+
+def run(side, num_steps, num_workers, seed=0):
+    with RoadNetwork(side, side, seed=seed, num_workers=num_workers) as network:
+        network.step(num_steps)
+        return network.get_metrics()
+
+
+@pytest.mark.parametrize('num_workers', [2, 4])
+def test_workers_do_not_change_results(num_workers, side=3, num_steps=1000):
+    assert run(side, num_steps, num_workers) == run(side, num_steps, 1)
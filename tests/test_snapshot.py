@@ -0,0 +1,91 @@
+"""
+Fotos del entorno (Intersection.snapshot / restore) en los tres motores, y ramas desde
+una foto para comparar acciones (agente/evaluation.branch_returns).
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'agente')]
+
+from backend.interseccion import Intersection, SNAPSHOT_FIELDS
+from backend.interseccion_eventos import EventIntersection
+from backend.interseccion_numpy import NumpyIntersection
+from evaluation import branch_returns, run_policy_episode
+from policies import FixedCyclePolicy
+
+ENGINES = (Intersection, NumpyIntersection, EventIntersection)
+
+
+# Lo que se observa de cada step: movidos, estado, vehículos, contadores y semáforo
+def observe(env, actions):
+    steps = []
+    for action in actions:
+        env.apply_action(action)
+        moved = env.step()
+        records = [tuple(map(int, record)) for record in env.get_vehicle_records()]
+        steps.append((moved, env.get_state(), records, tuple(getattr(env, name) for name in SNAPSHOT_FIELDS),
+                      env.semaforo.time_since_change))
+    return steps
+
+
+def random_actions(rng, count):
+    return [int(rng.random() < 0.05) for _ in range(count)]
+
+
+# Restaurar una foto (en la misma intersección, en una nueva o en otro motor) repite lo que
+# siguió después de tomarla; el motor por eventos sólo carga fotos propias
+@pytest.mark.parametrize('engine_cls', ENGINES, ids=lambda cls: cls.__name__)
+@pytest.mark.parametrize('seed', [0, 1])
+def test_restore_repeats_what_followed(engine_cls, seed):
+    rng = random.Random(seed)
+    env = engine_cls(rng=np.random.default_rng(seed))
+    env.set_clock(17)
+    observe(env, random_actions(rng, 1500))
+    snapshot = env.snapshot()
+    actions = random_actions(rng, 1500)
+    expected = observe(env, actions)
+
+    env.restore(snapshot)
+    assert observe(env, actions) == expected
+    assert observe(engine_cls(rng=np.random.default_rng(seed + 100)).restore(snapshot), actions) == expected
+    for other_cls in (Intersection, NumpyIntersection):
+        assert observe(other_cls(rng=np.random.default_rng(seed + 100)).restore(snapshot), actions) == expected
+
+
+# Entorno en hora punta tras `warmup` steps con un ciclo fijo
+def warm_environment(engine_cls, warmup, seed=0):
+    env = engine_cls(rng=np.random.default_rng(seed))
+    env.set_clock(17)
+    run_policy_episode(env, FixedCyclePolicy(30), warmup)
+    return env
+
+
+# Las ramas desde una foto dan lo mismo que simular desde el inicio hasta cada punto
+@pytest.mark.parametrize('engine_cls', ENGINES, ids=lambda cls: cls.__name__)
+def test_branches_match_resimulation(engine_cls, warmup=600, points=4, every=60, horizon=60):
+    policy = FixedCyclePolicy(30)
+    expected = []
+    for point in range(points):
+        for action in (0, 1):
+            env = warm_environment(engine_cls, warmup)
+            run_policy_episode(env, policy, point * every)
+            env.apply_action(action)
+            moved = env.step()
+            reward = env.step_reward(action, moved, env.get_waiting_vehicles_count())
+            expected.append(reward + run_policy_episode(env, policy, horizon - 1)[0])
+
+    returns = []
+    env = warm_environment(engine_cls, warmup)
+    for point in range(points):
+        if point:
+            run_policy_episode(env, policy, every)
+        returns.extend(branch_returns(env, policy, horizon))
+    assert returns == expected
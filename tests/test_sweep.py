@@ -0,0 +1,59 @@
+"""
+Barrido de hiperparámetros (agente/sweep.py): sin detención temprana la tabla no depende
+de los workers, y con un worker la detención temprana sigue el orden de las pruebas.
+
+Uso:
+    python -m pytest tests
+"""
+import csv
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'agente')]
+
+from sweep import Sweep
+
+TRIALS = [{'alpha': alpha, 'epsilon_decay': decay} for alpha in (0.02, 0.1, 0.5) for decay in (0.9, 0.995)]
+
+
+def new_sweep(path, early_stopping=True):
+    return Sweep(TRIALS, str(path), episodes=20, max_steps=200, window=4, early_stopping=early_stopping,
+                 min_episodes=4, report_every=4, quantile=0.5, min_trials=1)
+
+
+def by_trial(rows):
+    return sorted(({name: value for name, value in row.items() if name != 'seconds'} for row in rows),
+                  key=lambda row: row['trial'])
+
+
+def test_workers_do_not_change_results_without_early_stopping(tmp_path):
+    serial = by_trial(new_sweep(tmp_path / 'serie.csv', early_stopping=False).run(1, verbose=False))
+    pool = by_trial(new_sweep(tmp_path / 'pool.csv', early_stopping=False).run(2, verbose=False))
+    assert pool == serial
+
+
+# Con un worker cada prueba se compara sólo con las anteriores: la primera nunca se detiene
+def test_trials_compare_with_earlier_ones(tmp_path):
+    rows = by_trial(new_sweep(tmp_path / 'barrido.csv').run(1, verbose=False))
+    assert rows[0]['status'] == 'completado'
+    assert len(rows[0]['scores'].split()) == new_sweep(tmp_path).settings['milestones']
+    assert any(row['status'] == 'detenido' for row in rows)
+    for row in rows:
+        if row['status'] == 'detenido':
+            assert len(row['scores'].split()) == (row['episodes'] - 4) // 4 + 1
+
+
+# Un barrido interrumpido y continuado con resume detiene las mismas pruebas que uno completo
+def test_resume_restores_scores(tmp_path):
+    full = by_trial(new_sweep(tmp_path / 'completo.csv').run(1, verbose=False))
+
+    path = tmp_path / 'continuado.csv'
+    with open(tmp_path / 'completo.csv', newline='') as f:
+        lines = list(csv.reader(f))
+    with open(path, 'w', newline='') as f:
+        csv.writer(f).writerows(lines[:3])
+    resumed = by_trial(new_sweep(path).run(1, resume=True, verbose=False))
+
+    assert [row['status'] for row in resumed] == [row['status'] for row in full]
+    assert resumed == full
@@ -0,0 +1,77 @@
+"""
+Regresión de la salida de vehículos y del flujo (movimientos por step), que alimenta la
+recompensa del agente (moved_this_step).
+
+Si un cambio en la simulación modifica estos valores a propósito, actualizar EXPECTED
+con los que imprime benchmarks/check_throughput.py.
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.interseccion import Intersection
+from backend.interseccion_numpy import NumpyIntersection
+from backend.interseccion_eventos import EventIntersection
+
+ENGINES = {'python': Intersection, 'numpy': NumpyIntersection, 'events': EventIntersection}
+
+# (semilla, hora de inicio) -> (movimientos, autos que salieron) en una hora con semáforo de ciclo fijo
+EXPECTED = {
+    (0,  0): (11598, 296),
+    (0,  7): (106066, 2696),
+    (0, 12): (23260, 593),
+    (1,  0): (11610, 296),
+    (1,  7): (106269, 2700),
+    (1, 12): (23236, 592),
+}
+
+
+class CheckedIntersection(Intersection):
+    # Revisa cada auto contra la grilla al inicio del movimiento
+    def move_vehicles(self):
+        before = [(auto, auto.get_position()) for auto in self.vehicles]
+        grid = self.grid.copy()
+        moved_this_step = super().move_vehicles()
+
+        remaining = set(map(id, self.vehicles))
+        for auto, (x, y) in before:
+            to_edge, to_stop = self.get_distances(auto.get_direction(), x, y)
+            if to_edge == 0:
+                assert id(auto) not in remaining, f"{auto} no salió de la grilla"
+            elif to_stop != 0 and grid[y + auto.dy, x + auto.dx] != 1:
+                assert auto.get_position() != (x, y), f"{auto} perdió su movimiento"
+        return moved_this_step
+
+
+# Movimientos y autos que salieron en `num_steps` steps desde `hour`, cambiando de fase cada `period` steps
+def throughput(engine_cls, seed, hour, num_steps=3600, period=30):
+    random.seed(seed)
+    env = engine_cls()
+    env.current_hour = hour
+    moved = 0
+    for step in range(num_steps):
+        if step % period == 0:
+            env.apply_action(1)
+        moved += env.step()
+    return moved, env.exited_vehicles
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('seed, hour', EXPECTED)
+def test_pinned_throughput(engine, seed, hour):
+    assert throughput(ENGINES[engine], seed, hour) == EXPECTED[(seed, hour)]
+
+
+@pytest.mark.parametrize('hour', (0, 7, 12))
+def test_no_missed_moves(hour):
+    # Todo auto fuera de la línea de detención con la casilla siguiente libre avanza,
+    # y todo auto en el borde de salida deja la grilla
+    throughput(CheckedIntersection, hour, hour)
@@ -0,0 +1,40 @@
+"""
+Trazas de simulación (backend/trace.py): grabar una simulación en hora punta (varios
+bloques y dos episodios) y reproducirla entrega exactamente los snapshots tomados en vivo.
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'agente')]
+
+from backend.trace import TraceRecorder, TraceReader, take_snapshot
+from policies import FixedCyclePolicy
+from train_agent import ENGINES
+
+
+@pytest.mark.parametrize('engine', sorted(ENGINES))
+def test_replay_matches_live_simulation(engine, tmp_path, steps=2000):
+    path = str(tmp_path / 'traza.bin')
+    env = ENGINES[engine](rng=np.random.default_rng(0))
+    env.current_hour = 7
+    policy = FixedCyclePolicy()
+    live = []
+    with TraceRecorder(path, env.get_size(), chunk_size=500) as recorder:
+        for step in range(steps):
+            if step == steps // 2:
+                recorder.new_episode(1)
+            env.apply_action(policy.get_action(env.get_state()))
+            env.step()
+            recorder.record(env, step)
+            live.append(take_snapshot(env, step))
+
+    reader = TraceReader(path)
+    assert list(reader.frames()) == live
+    assert list(reader.frames(episode=1)) == live[steps // 2:]
@@ -0,0 +1,77 @@
+"""
+Entorno vectorizado (backend/interseccion_vector.py): cada intersección del lote
+reproduce exactamente a una Intersection (vehículos, grilla, estado, recompensa y
+métricas), con el módulo random global y con un generador por intersección.
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.interseccion import Intersection
+from backend.interseccion_vector import VectorIntersection
+
+
+def snapshot(env, b=None):
+    if b is None:
+        vehicles = env.vehicles
+        grid = env.grid
+        counters = (env.exited_vehicles, env.blocked_spawns, env.phase_changes, env.refused_phase_changes)
+    else:
+        vehicles = env.get_vehicles(b)
+        grid = env.grid[b]
+        counters = (int(env.exited_vehicles[b]), int(env.blocked_spawns[b]),
+                    int(env.phase_changes[b]), int(env.refused_phase_changes[b]))
+    return tuple((v.get_position(), v.get_direction(), v.image) for v in vehicles), grid.tobytes(), counters
+
+
+@pytest.mark.parametrize('own_rng', [False, True])
+@pytest.mark.parametrize('grid_size', [40, 80])
+@pytest.mark.parametrize('hour', [7, 2, 12])
+def test_batch_matches_intersections(own_rng, grid_size, hour, num_envs=4, num_steps=1500, seed=0):
+    random.seed(seed)
+    if own_rng:
+        children = np.random.SeedSequence(seed).spawn(num_envs)
+        references = [Intersection(grid_size, rng=np.random.default_rng(child)) for child in children]
+        vector = VectorIntersection(num_envs, grid_size, rng=seed)
+    else:
+        references = [Intersection(grid_size) for _ in range(num_envs)]
+        vector = VectorIntersection(num_envs, grid_size)
+    # Las intersecciones individuales y el lote consumen el módulo random global por separado
+    rng_references = rng_vector = random.getstate()
+
+    for env in references:
+        env.current_hour = hour
+    vector.current_hour = hour
+    policy = np.random.default_rng(seed + 1)
+
+    for step in range(num_steps):
+        actions = (policy.random(num_envs) < 0.1).astype(np.int64)
+
+        random.setstate(rng_references)
+        moved = []
+        for env, action in zip(references, actions.tolist()):
+            env.apply_action(action)
+            moved.append(env.step())
+        rng_references = random.getstate()
+
+        random.setstate(rng_vector)
+        vector_moved = vector.step(actions)
+        rng_vector = random.getstate()
+
+        states = vector.get_state()
+        rewards = vector.calculate_reward(actions, vector_moved)
+        for b, env in enumerate(references):
+            assert vector_moved[b] == moved[b], f"Intersección {b} distinta en step {step}"
+            assert tuple(states[b].tolist()) == env.get_state(), f"Intersección {b} distinta en step {step}"
+            assert rewards[b] == env.calculate_reward(actions[b], moved[b]), f"Intersección {b} distinta en step {step}"
+            if step % 100 == 0:
+                assert snapshot(vector, b) == snapshot(env), f"Intersección {b} distinta en step {step}"
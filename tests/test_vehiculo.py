@@ -0,0 +1,36 @@
+"""
+Reutilización de vehículos (SpawnVehicle.reuse_vehicles): no cambia la simulación.
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend.interseccion import Intersection
+
+
+def run(num_steps, reuse_vehicles, seed=0):
+    random.seed(seed)
+    env = Intersection()
+    env.spawn.reuse_vehicles = reuse_vehicles
+    env.current_hour = 7  # Hora punta: la mayor cantidad de autos entrando y saliendo
+    states = []
+    for step in range(num_steps):
+        if step % 30 == 0:
+            env.apply_action(1)
+        env.step()
+        if step % 500 == 0:
+            states.append(tuple((v.get_position(), v.get_direction(), v.image) for v in env.vehicles))
+    return env, states
+
+
+def test_reuse_does_not_change_simulation(num_steps=5000):
+    _, without_reuse = run(num_steps, reuse_vehicles=False)
+    env, with_reuse = run(num_steps, reuse_vehicles=True)
+    assert env.spawn.reused_vehicles > 0
+    assert with_reuse == without_reuse